@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import hmac
+import os
+
+from fastapi import HTTPException, Request
+
+
+# 관리자 전용 엔드포인트(/_internal/profile 등) 보호용 토큰. 미설정 시 관리자 기능은 비활성.
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def _admin_token() -> str:
+    return os.getenv("MCP_ADMIN_TOKEN", "")
+
+
+def is_admin_request(request: Request) -> bool:
+    """요청 헤더의 관리자 토큰이 설정값과 일치하는지 확인한다."""
+    expected = _admin_token()
+    if not expected:
+        return False
+    provided = request.headers.get(ADMIN_TOKEN_HEADER, "")
+    return hmac.compare_digest(provided.encode("utf-8"), expected.encode("utf-8"))
+
+
+async def require_admin(request: Request) -> None:
+    """FastAPI 의존성: 관리자 토큰이 없거나 틀리면 403."""
+    if not _admin_token():
+        raise HTTPException(status_code=403, detail="admin endpoints disabled (MCP_ADMIN_TOKEN not set)")
+    if not is_admin_request(request):
+        raise HTTPException(status_code=403, detail="admin token required")
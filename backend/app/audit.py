@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import copy
+import datetime as dt
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, FrozenSet, List, Mapping, Optional, TextIO, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# 감사 로그 파일 디렉터리. 지정해야만 파일에 쓴다(기본: 쓰지 않고 최근 항목 조회용 메모리 링만 유지).
+# 상대 경로는 작업 디렉터리 기준이므로 배포에서는 절대 경로를 권장한다.
+AUDIT_DIR = os.getenv("MCP_AUDIT_DIR", "")
+AUDIT_ENABLED = os.getenv("MCP_AUDIT_ENABLED", "1") not in ("0", "false", "False")
+# 호출 경로에서 넣는 큐의 상한. 가득 차면 기다리지 않고 버린 뒤 dropped로 센다.
+AUDIT_QUEUE_SIZE = int(os.getenv("MCP_AUDIT_QUEUE_SIZE", "10000"))
+# 백그라운드 스레드가 한 번에 모아 쓰는 최대 건수와 최대 대기 시간
+AUDIT_BATCH_SIZE = int(os.getenv("MCP_AUDIT_BATCH_SIZE", "512"))
+AUDIT_FLUSH_INTERVAL_S = float(os.getenv("MCP_AUDIT_FLUSH_INTERVAL_MS", "500")) / 1000.0
+# 파일 회전: 현재 파일이 이 크기를 넘으면 audit.ndjson.1, .2 ... 로 밀어내고 BACKUPS개만 남긴다.
+AUDIT_MAX_FILE_BYTES = int(os.getenv("MCP_AUDIT_MAX_FILE_BYTES", str(64 * 1024 * 1024)))
+AUDIT_BACKUPS = int(os.getenv("MCP_AUDIT_BACKUPS", "5"))
+# /_internal/audit/recent 로 조회할 수 있도록 메모리에 남기는 최근 항목 수
+AUDIT_RECENT = int(os.getenv("MCP_AUDIT_RECENT", "1000"))
+# 인자 문자열 값이 이보다 길면 잘라서 기록한다(0이면 자르지 않음).
+AUDIT_MAX_VALUE_CHARS = int(os.getenv("MCP_AUDIT_MAX_VALUE_CHARS", "256"))
+
+REDACTED = "***"
+
+
+def _normalize(name: str) -> str:
+    return name.lower().replace("-", "").replace("_", "")
+
+
+def _name_set(raw: str) -> FrozenSet[str]:
+    return frozenset(_normalize(p.strip()) for p in raw.split(",") if p.strip())
+
+
+# 이름이 이 목록에 있는 인자 필드(중첩 포함, 대소문자·-·_ 무시)는 값을 가린다.
+REDACT_FIELDS = _name_set(os.getenv(
+    "MCP_AUDIT_REDACT_FIELDS",
+    "password,passwd,secret,token,access_token,refresh_token,api_key,client_secret,authorization",
+))
+# 툴의 paramMapping.headers가 이 헤더로 보내는 인자도 값을 가린다.
+REDACT_HEADERS = _name_set(os.getenv(
+    "MCP_AUDIT_REDACT_HEADERS", "authorization,proxy-authorization,cookie,x-api-key,x-auth-token",
+))
+
+# 중첩 호출(FastMCP 경로가 dispatch_tool 안에서 다시 툴 함수를 부르는 경우) 이중 기록 방지
+_recording: contextvars.ContextVar[bool] = contextvars.ContextVar("mcp_audit_recording", default=False)
+
+# (ts, request_id, caller, server_id, tool_name, args, header_mapping, status, outcome, duration_ms, error)
+_Record = Tuple[float, Optional[str], str, str, str, Any, Mapping[str, str], Optional[int], str, float, Optional[str]]
+_STOP = object()
+
+
+def _redact(value: Any, depth: int = 0) -> Any:
+    if depth > 8:
+        return "…"
+    if isinstance(value, Mapping):
+        return {
+            k: REDACTED if _normalize(str(k)) in REDACT_FIELDS else _redact(v, depth + 1)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_redact(v, depth + 1) for v in value]
+    if isinstance(value, str) and AUDIT_MAX_VALUE_CHARS > 0 and len(value) > AUDIT_MAX_VALUE_CHARS:
+        return f"{value[:AUDIT_MAX_VALUE_CHARS]}…(+{len(value) - AUDIT_MAX_VALUE_CHARS})"
+    return value
+
+
+def redact_args(args: Any, header_mapping: Mapping[str, str]) -> Any:
+    """인자에서 민감 필드와 인증 헤더로 매핑되는 인자 값을 가린 사본을 만든다."""
+    redacted = _redact(args)
+    if isinstance(redacted, dict):
+        for header, arg_name in header_mapping.items():
+            if _normalize(header) in REDACT_HEADERS and arg_name in redacted:
+                redacted[arg_name] = REDACTED
+    return redacted
+
+
+class _CallAudit:
+    """dispatch 한 건을 감싸 결과(status/outcome/소요 시간)를 감사 큐에 넣는 컨텍스트."""
+
+    __slots__ = ("log", "caller", "server_id", "tool_name", "args", "header_mapping", "request_id",
+                 "status", "started", "_token")
+
+    def __init__(self, log: "AuditLog", caller: str, server_id: str, tool_name: str, args: Any,
+                 header_mapping: Mapping[str, str], request_id: Optional[str]) -> None:
+        self.log = log
+        self.caller = caller
+        self.server_id = server_id
+        self.tool_name = tool_name
+        # 호출 측이 이후에 인자(중첩 dict/list 포함)를 고쳐도 기록이 바뀌지 않도록 깊은 사본을 잡는다(가림 처리는 쓰기 스레드에서).
+        self.args = copy.deepcopy(args)
+        self.header_mapping = header_mapping
+        self.request_id = request_id
+        self.status: Optional[int] = None
+        self.started = 0.0
+        self._token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> "_CallAudit":
+        self.started = time.perf_counter()
+        if not _recording.get():
+            self._token = _recording.set(True)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if self._token is None:
+            return  # 바깥 컨텍스트가 기록한다
+        _recording.reset(self._token)
+        if exc_type is None:
+            outcome = "ok" if self.status is None or self.status < 400 else "upstream_error"
+            error = None
+        elif issubclass(exc_type, asyncio.CancelledError):
+            outcome, error = "cancelled", None
+        else:
+            outcome, error = "error", f"{exc_type.__name__}: {exc}"[:500]
+        self.log.enqueue((
+            time.time(), self.request_id, self.caller, self.server_id, self.tool_name, self.args,
+            self.header_mapping, self.status, outcome, (time.perf_counter() - self.started) * 1000.0, error,
+        ))
+
+
+class AuditLog:
+    """툴 호출 감사 로그. 호출 경로는 튜플 하나를 큐에 넣기만 하고(블로킹 없음),
+    백그라운드 스레드가 배치로 가림 처리·NDJSON 직렬화·파일 쓰기·회전을 한다.
+    """
+
+    def __init__(
+        self,
+        directory: str = AUDIT_DIR,
+        enabled: bool = AUDIT_ENABLED,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        recent: int = AUDIT_RECENT,
+    ) -> None:
+        self.directory = directory
+        self.enabled = enabled
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=max(1, recent))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._file: Optional[TextIO] = None
+        self._file_bytes = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.rotations = 0
+        self.write_errors = 0
+
+    @property
+    def path(self) -> Optional[str]:
+        return os.path.join(self.directory, "audit.ndjson") if self.directory else None
+
+    def call(self, caller: str, server_id: str, tool_name: str, args: Any,
+             header_mapping: Mapping[str, str], request_id: Optional[str] = None) -> _CallAudit:
+        """`with audit_log.call(...) as entry:` 블록 안에서 entry.status를 채우면 종료 시 한 건을 기록한다."""
+        return _CallAudit(self, caller, server_id, tool_name, args, header_mapping, request_id)
+
+    def enqueue(self, record: _Record) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            self.start()
+
+    # Background writer
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None or not self.enabled:
+                return
+            self._thread = threading.Thread(target=self._run, name="mcp-audit", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """남은 항목을 기록하고 스레드를 멈춘다(앱 종료 시)."""
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Any] = []
+            try:
+                batch.append(self._queue.get(timeout=AUDIT_FLUSH_INTERVAL_S))
+            except queue.Empty:
+                continue
+            while len(batch) < AUDIT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            self._write_batch([item for item in batch if item is not _STOP])
+            if stop:
+                self._close_file()
+                return
+
+    def _entry(self, record: _Record) -> Dict[str, Any]:
+        ts, request_id, caller, server_id, tool_name, args, header_mapping, status, outcome, duration_ms, error = record
+        entry: Dict[str, Any] = {
+            "ts": dt.datetime.fromtimestamp(ts, dt.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "requestId": request_id,
+            "caller": caller,
+            "serverId": server_id,
+            "tool": tool_name,
+            "args": redact_args(args, header_mapping),
+            "status": status,
+            "outcome": outcome,
+            "durationMs": round(duration_ms, 2),
+        }
+        if error is not None:
+            entry["error"] = error
+        return entry
+
+    def _write_batch(self, records: List[_Record]) -> None:
+        if not records:
+            return
+        lines: List[str] = []
+        for record in records:
+            entry = self._entry(record)
+            self._recent.append(entry)
+            lines.append(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str))
+        self.batches += 1
+        if not self.directory:
+            self.written += len(lines)
+            return
+        payload = "\n".join(lines) + "\n"
+        try:
+            handle = self._open_file()
+            handle.write(payload)
+            handle.flush()
+            self._file_bytes += len(payload.encode("utf-8"))
+            self.written += len(lines)
+            if self._file_bytes >= AUDIT_MAX_FILE_BYTES:
+                self._rotate()
+        except OSError:
+            self.write_errors += 1
+            logger.exception("audit.write_failed path=%s records=%d", self.path, len(lines))
+            self._close_file()
+
+    def _open_file(self) -> TextIO:
+        if self._file is None:
+            path = self.path
+            assert path is not None
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+            self._file_bytes = self._file.tell()
+        return self._file
+
+    def _close_file(self) -> None:
+        handle, self._file = self._file, None
+        if handle is not None:
+            try:
+                handle.close()
+            except OSError:
+                pass
+
+    def _rotate(self) -> None:
+        self._close_file()
+        path = self.path
+        assert path is not None
+        for index in range(AUDIT_BACKUPS - 1, 0, -1):
+            source = f"{path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{path}.{index + 1}")
+        if AUDIT_BACKUPS > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+        self._file_bytes = 0
+        self.rotations += 1
+
+    # Query
+    def recent(
+        self,
+        limit: int = 100,
+        server_id: Optional[str] = None,
+        tool_name: Optional[str] = None,
+        caller: Optional[str] = None,
+        outcome: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """최근 기록(가림 처리 후)을 최신순으로. 아직 큐에 있는 항목은 포함하지 않는다."""
+        matches: List[Dict[str, Any]] = []
+        for entry in reversed(list(self._recent)):
+            if server_id is not None and entry["serverId"] != server_id:
+                continue
+            if tool_name is not None and entry["tool"] != tool_name:
+                continue
+            if caller is not None and entry["caller"] != caller:
+                continue
+            if outcome is not None and entry["outcome"] != outcome:
+                continue
+            matches.append(entry)
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "queueLimit": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "writeErrors": self.write_errors,
+            "fileBytes": self._file_bytes,
+        }
+
+
+audit_log = AuditLog()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+from .models import ServerConfig
+from .registry import registry
+
+
+logger = logging.getLogger(__name__)
+
+# 지연시간 EWMA 가중치(클수록 최근 측정을 더 반영)
+EWMA_ALPHA = float(os.getenv("MCP_LB_EWMA_ALPHA", "0.3"))
+# 연속 실패가 이 횟수에 이르면 MCP_LB_EJECT_S 동안 후보에서 제외한다.
+EJECT_AFTER_FAILURES = int(os.getenv("MCP_LB_EJECT_FAILURES", "3"))
+EJECT_S = float(os.getenv("MCP_LB_EJECT_S", "30"))
+PROBE_INTERVAL_S = float(os.getenv("MCP_LB_PROBE_INTERVAL_S", "10"))
+PROBE_TIMEOUT_S = float(os.getenv("MCP_LB_PROBE_TIMEOUT_S", "2"))
+
+
+class EndpointState:
+    """엔드포인트 하나의 실측 지연·진행 중 요청·건강 상태."""
+
+    __slots__ = (
+        "url", "weight", "ewma_ms", "inflight", "consecutive_failures", "ejected_until",
+        "requests", "failures", "last_error",
+    )
+
+    def __init__(self, url: str, weight: float) -> None:
+        self.url = url
+        self.weight = weight
+        self.ewma_ms: Optional[float] = None
+        self.inflight = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def record_success(self, latency_ms: float) -> None:
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        if self.ewma_ms is None:
+            self.ewma_ms = latency_ms
+        else:
+            self.ewma_ms += EWMA_ALPHA * (latency_ms - self.ewma_ms)
+
+    def record_failure(self, error: str, latency_ms: Optional[float] = None) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        if latency_ms is not None and self.ewma_ms is not None:
+            self.ewma_ms += EWMA_ALPHA * (latency_ms - self.ewma_ms)
+        if self.consecutive_failures >= EJECT_AFTER_FAILURES:
+            if self.ejected_until <= time.monotonic():
+                logger.warning("lb.endpoint.ejected url=%s failures=%d error=%s", self.url, self.consecutive_failures, error)
+            self.ejected_until = time.monotonic() + EJECT_S
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "ewmaMs": round(self.ewma_ms, 2) if self.ewma_ms is not None else None,
+            "inFlight": self.inflight,
+            "healthy": self.available(now),
+            "ejectedForS": round(max(0.0, self.ejected_until - now), 1),
+            "requests": self.requests,
+            "failures": self.failures,
+            "lastError": self.last_error,
+        }
+
+
+class ServerBalancer:
+    """서버 하나의 엔드포인트 집합에서 호출 대상을 고른다."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.policy = "ewma"
+        self.endpoints: Dict[str, EndpointState] = {}
+        self.failovers = 0
+
+    def sync(self, server: ServerConfig) -> None:
+        """설정의 엔드포인트 목록/가중치를 반영한다(기존 측정값은 유지)."""
+        self.policy = server.lbPolicy
+        wanted = {ep.url: ep.weight for ep in server.endpoints}
+        if wanted.keys() != self.endpoints.keys():
+            self.endpoints = {
+                url: self.endpoints.get(url) or EndpointState(url, weight) for url, weight in wanted.items()
+            }
+        for url, weight in wanted.items():
+            self.endpoints[url].weight = weight
+
+    def _score(self, ep: EndpointState, unmeasured_ms: float) -> float:
+        latency = ep.ewma_ms if ep.ewma_ms is not None else unmeasured_ms
+        if self.policy == "least_latency":
+            return latency / ep.weight
+        return latency * (ep.inflight + 1) / ep.weight
+
+    def pick(self, exclude: Set[str]) -> Optional[EndpointState]:
+        now = time.monotonic()
+        candidates = [ep for url, ep in self.endpoints.items() if url not in exclude and ep.available(now)]
+        if not candidates:
+            # 모두 제외된 상태면 시도하지 않은 것 중 아무거나(전부 막혔어도 요청은 보내 본다)
+            candidates = [ep for url, ep in self.endpoints.items() if url not in exclude]
+        if not candidates:
+            return None
+        # 측정값이 없는 엔드포인트는 가장 빠른 측정값과 같다고 보고 시도되게 한다.
+        measured = [ep.ewma_ms for ep in candidates if ep.ewma_ms is not None]
+        unmeasured_ms = min(measured) if measured else 1.0
+        scores = [self._score(ep, unmeasured_ms) for ep in candidates]
+        best = min(scores)
+        return random.choice([ep for ep, score in zip(candidates, scores) if score == best])
+
+    def has_alternative(self, exclude: Set[str]) -> bool:
+        return any(url not in exclude for url in self.endpoints)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "policy": self.policy,
+            "failovers": self.failovers,
+            "endpoints": [ep.stats(now) for ep in self.endpoints.values()],
+        }
+
+
+class BalancerRegistry:
+    """서버 키별 ServerBalancer 보관소와 백그라운드 헬스 프로버."""
+
+    def __init__(self) -> None:
+        self._balancers: Dict[str, ServerBalancer] = {}
+        self._prober: Optional[asyncio.Task] = None
+
+    def for_server(self, key: str, server: ServerConfig) -> Optional[ServerBalancer]:
+        """endpoints가 설정된 서버면 동기화된 balancer를, 아니면 None을 반환한다."""
+        if not server.endpoints:
+            if key in self._balancers:
+                del self._balancers[key]
+            return None
+        balancer = self._balancers.get(key)
+        if balancer is None:
+            balancer = self._balancers[key] = ServerBalancer(key)
+        balancer.sync(server)
+        return balancer
+
+    def forget(self, key: str) -> None:
+        self._balancers.pop(key, None)
+
+    async def _probe(self, client: httpx.AsyncClient, ep: EndpointState, path: str) -> None:
+        started = time.perf_counter()
+        try:
+            resp = await client.get(ep.url.rstrip("/") + "/" + path.lstrip("/"))
+        except httpx.HTTPError as e:
+            ep.record_failure(f"probe: {type(e).__name__}")
+            return
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        if resp.status_code >= 500:
+            ep.record_failure(f"probe: HTTP {resp.status_code}", latency_ms)
+        elif ep.consecutive_failures or not ep.available(time.monotonic()):
+            # 실패 이력이 있는 엔드포인트만 프로브 결과로 복귀시킨다(정상 엔드포인트의 EWMA는 실제 호출로 갱신).
+            ep.record_success(latency_ms)
+
+    async def probe_once(self, client: httpx.AsyncClient) -> None:
+        probes: List[Any] = []
+        for server_id, server in registry.list_servers().items():
+            balancer = self.for_server(server_id, server)
+            if balancer is None or not server.active:
+                continue
+            probes.extend(self._probe(client, ep, server.healthPath) for ep in balancer.endpoints.values())
+        if probes:
+            await asyncio.gather(*probes)
+
+    async def run_prober(self, interval: float = PROBE_INTERVAL_S) -> None:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(PROBE_TIMEOUT_S)) as client:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.probe_once(client)
+                except Exception:
+                    logger.exception("lb.probe failed")
+
+    def start_prober(self) -> None:
+        if self._prober is None and PROBE_INTERVAL_S > 0:
+            self._prober = asyncio.ensure_future(self.run_prober())
+
+    async def stop_prober(self) -> None:
+        if self._prober is not None:
+            self._prober.cancel()
+            await asyncio.gather(self._prober, return_exceptions=True)
+            self._prober = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {key: balancer.stats() for key, balancer in sorted(self._balancers.items())}
+
+
+balancers = BalancerRegistry()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import sys
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+from .models import CompositeSpec, HedgePolicy, HttpMethod, PaginationSpec, ParamMapping, ResponseMapping, ToolBinding
+from .shaping import ResponseShaper, compile_response
+
+
+def _istr(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def _idict(mapping: Mapping[str, str]) -> Dict[str, str]:
+    return {sys.intern(k): sys.intern(v) for k, v in mapping.items()}
+
+
+class _Frozen:
+    """생성 후 속성을 바꿀 수 없는 슬롯 레코드(공유되므로 제자리 수정 금지)."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+class ParamMappingRecord(_Frozen):
+    """ParamMapping의 런타임 표현. 내용이 같은 매핑은 인스턴스 하나를 공유한다."""
+
+    __slots__ = ("path", "query", "headers", "body", "rawBody")
+
+    path: Dict[str, str]
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: Dict[str, str]
+    rawBody: Optional[str]
+
+    def __init__(self, mapping: ParamMapping) -> None:
+        setattr_ = object.__setattr__
+        setattr_(self, "path", _idict(mapping.path))
+        setattr_(self, "query", _idict(mapping.query))
+        setattr_(self, "headers", _idict(mapping.headers))
+        setattr_(self, "body", _idict(mapping.body))
+        setattr_(self, "rawBody", _istr(mapping.rawBody))
+
+    def to_model(self) -> ParamMapping:
+        return ParamMapping(
+            path=dict(self.path), query=dict(self.query), headers=dict(self.headers), body=dict(self.body),
+            rawBody=self.rawBody,
+        )
+
+
+def _mapping_key(mapping: Any) -> Tuple[Hashable, ...]:
+    # body 키 순서는 요청 JSON 순서가 되므로 순서까지 같아야 같은 매핑으로 본다.
+    return (
+        tuple(mapping.path.items()), tuple(mapping.query.items()), tuple(mapping.headers.items()),
+        tuple(mapping.body.items()), mapping.rawBody,
+    )
+
+
+def _schema_key(schema: Mapping[str, Any]) -> bytes:
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+class ToolRecord(_Frozen):
+    """레지스트리가 보관하는 툴 바인딩의 런타임 표현. 속성 재할당은 막지만 안쪽 객체까지 얼리지는 않는다.
+
+    - 속성 이름은 ToolBinding과 같아 호출 경로(http_adapter 등)가 그대로 읽는다.
+    - inputSchema / paramMapping / responseMapping / hedge는 내용이 같은 툴끼리 공유하는 가변 객체다.
+      호출 경로는 읽기만 하고, 밖으로 내보낼 때는 to_model()이 깊은 복사본을 만든다.
+    - responseShaper는 responseMapping을 컴파일한 후처리기(내용이 같으면 공유)다.
+    - composite가 있으면 컴포지트 툴이며 method / pathTemplate은 None이다.
+    - pydantic 모델은 API 경계에서만 to_model()로 만든다.
+    """
+
+    __slots__ = (
+        "name", "description", "method", "pathTemplate", "paramMapping", "inputSchema",
+        "responseMapping", "responseShaper", "hedge", "pagination", "composite", "active",
+    )
+
+    name: str
+    description: Optional[str]
+    method: Optional[HttpMethod]
+    pathTemplate: Optional[str]
+    paramMapping: ParamMappingRecord
+    inputSchema: Dict[str, Any]
+    responseMapping: Optional[ResponseMapping]
+    responseShaper: Optional[ResponseShaper]
+    hedge: Optional[HedgePolicy]
+    pagination: Optional[PaginationSpec]
+    composite: Optional[CompositeSpec]
+    active: bool
+
+    def __init__(
+        self,
+        name: str,
+        description: Optional[str],
+        method: Optional[HttpMethod],
+        pathTemplate: Optional[str],
+        paramMapping: ParamMappingRecord,
+        inputSchema: Dict[str, Any],
+        responseMapping: Optional[ResponseMapping],
+        hedge: Optional[HedgePolicy],
+        active: bool,
+        pagination: Optional[PaginationSpec] = None,
+        composite: Optional[CompositeSpec] = None,
+    ) -> None:
+        setattr_ = object.__setattr__
+        setattr_(self, "name", name)
+        setattr_(self, "description", description)
+        setattr_(self, "method", method)
+        setattr_(self, "pathTemplate", pathTemplate)
+        setattr_(self, "paramMapping", paramMapping)
+        setattr_(self, "inputSchema", inputSchema)
+        setattr_(self, "responseMapping", responseMapping)
+        setattr_(self, "responseShaper", compile_response(responseMapping) if responseMapping is not None else None)
+        setattr_(self, "hedge", hedge)
+        setattr_(self, "pagination", pagination)
+        setattr_(self, "composite", composite)
+        setattr_(self, "active", active)
+
+    def to_model(self) -> ToolBinding:
+        """공유 부분을 깊은 복사한 ToolBinding을 만든다(돌려받은 모델을 고쳐도 다른 툴에 번지지 않음)."""
+        return ToolBinding(
+            name=self.name,
+            description=self.description,
+            method=self.method,
+            pathTemplate=self.pathTemplate,
+            paramMapping=self.paramMapping.to_model(),
+            inputSchema=copy.deepcopy(self.inputSchema),
+            responseMapping=self.responseMapping.model_copy(deep=True) if self.responseMapping is not None else None,
+            hedge=self.hedge.model_copy(deep=True) if self.hedge is not None else None,
+            pagination=self.pagination.model_copy(deep=True) if self.pagination is not None else None,
+            composite=self.composite.model_copy(deep=True) if self.composite is not None else None,
+            active=self.active,
+        )
+
+
+class _SharedTable:
+    """내용 키 → 공유 객체. 참조 수가 0이 되면 지운다."""
+
+    __slots__ = ("_entries",)
+
+    def __init__(self) -> None:
+        self._entries: Dict[Hashable, List[Any]] = {}
+
+    def acquire(self, key: Hashable, make: Callable[[], Any]) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [make(), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def release(self, key: Hashable) -> None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BindingInterner:
+    """ToolBinding → ToolRecord 변환기. 스키마(내용 해시), 매핑, 응답 규칙, 헤지 정책을 공유한다."""
+
+    def __init__(self) -> None:
+        self._schemas = _SharedTable()
+        self._mappings = _SharedTable()
+        self._responses = _SharedTable()
+        self._hedges = _SharedTable()
+
+    def compact(self, binding: Any) -> ToolRecord:
+        """ToolBinding(또는 이미 만든 ToolRecord)을 공유 부분의 참조를 잡은 ToolRecord로 만든다."""
+        if isinstance(binding, ToolRecord):
+            self._acquire_parts(binding)
+            return binding
+        mapping = binding.paramMapping
+        schema = binding.inputSchema
+        response = binding.responseMapping
+        hedge = binding.hedge
+        return ToolRecord(
+            name=sys.intern(binding.name),
+            description=_istr(binding.description),
+            method=HttpMethod(binding.method) if binding.method is not None else None,
+            pathTemplate=_istr(binding.pathTemplate),
+            paramMapping=self._mappings.acquire(_mapping_key(mapping), lambda: ParamMappingRecord(mapping)),
+            inputSchema=self._schemas.acquire(_schema_key(schema), lambda: copy.deepcopy(dict(schema))),
+            responseMapping=(
+                self._responses.acquire(response.model_dump_json(), lambda: response.model_copy()) if response is not None else None
+            ),
+            hedge=self._hedges.acquire(hedge.model_dump_json(), lambda: hedge.model_copy()) if hedge is not None else None,
+            active=binding.active,
+            pagination=binding.pagination.model_copy() if binding.pagination is not None else None,
+            composite=binding.composite.model_copy(deep=True) if binding.composite is not None else None,
+        )
+
+    def _acquire_parts(self, record: ToolRecord) -> None:
+        self._mappings.acquire(_mapping_key(record.paramMapping), lambda: record.paramMapping)
+        self._schemas.acquire(_schema_key(record.inputSchema), lambda: record.inputSchema)
+        if record.responseMapping is not None:
+            self._responses.acquire(record.responseMapping.model_dump_json(), lambda: record.responseMapping)
+        if record.hedge is not None:
+            self._hedges.acquire(record.hedge.model_dump_json(), lambda: record.hedge)
+
+    def release(self, record: ToolRecord) -> None:
+        """레지스트리에서 빠진 레코드의 공유 부분 참조를 놓는다."""
+        self._mappings.release(_mapping_key(record.paramMapping))
+        self._schemas.release(_schema_key(record.inputSchema))
+        if record.responseMapping is not None:
+            self._responses.release(record.responseMapping.model_dump_json())
+        if record.hedge is not None:
+            self._hedges.release(record.hedge.model_dump_json())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sharedSchemas": len(self._schemas),
+            "sharedParamMappings": len(self._mappings),
+            "sharedResponseMappings": len(self._responses),
+            "sharedHedgePolicies": len(self._hedges),
+        }
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Dict
+
+
+class CallStats:
+    """툴 호출(`/mcp/{server}/{tool}`) 결과별 카운터.
+
+    - abandoned: SSE 클라이언트가 끊겨 업스트림 호출을 취소한 건수
+    - in_flight: 현재 실행 중인 호출 수
+    - progress_waits: 진행 이벤트 큐가 가득 차 생산자가 대기한 횟수(느린 SSE 소비자)
+    - progress_dropped: 큐가 가득 차 버린 중간 진행 이벤트(step.started) 수
+    """
+
+    def __init__(self) -> None:
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.abandoned = 0
+        self.in_flight = 0
+        self.progress_waits = 0
+        self.progress_dropped = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+            "inFlight": self.in_flight,
+            "progressWaits": self.progress_waits,
+            "progressDropped": self.progress_dropped,
+        }
+
+
+call_stats = CallStats()
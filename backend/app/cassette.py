@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import httpx
+
+from .models import CassetteConfig, ServerConfig
+
+
+logger = logging.getLogger(__name__)
+
+# 서버에 cassette 설정이 없을 때 적용할 전역 모드(off/record/replay)와 재생 옵션
+CASSETTE_MODE = os.getenv("MCP_CASSETTE_MODE", "off")
+CASSETTE_DIR = os.getenv("MCP_CASSETTE_DIR", "cassettes")
+CASSETTE_LATENCY = os.getenv("MCP_CASSETTE_LATENCY", "none")
+CASSETTE_LATENCY_SCALE = float(os.getenv("MCP_CASSETTE_LATENCY_SCALE", "1.0"))
+CASSETTE_ON_MISS = os.getenv("MCP_CASSETTE_ON_MISS", "error")
+
+# 데이터 파일(.cas): 매직 뒤에 레코드가 이어 붙는다.
+#   레코드 = 헤더(키 16B, status u16, 지연 ms f32, 응답 헤더 길이 u32, 본문 길이 u32) + 응답 헤더 JSON + 본문
+# 인덱스 파일(.idx): 헤더(매직, 색인한 데이터 파일 크기 u64, 항목 수 u32) + (키, 레코드 오프셋 u64)를 키 순으로 정렬한 고정 폭 항목
+_DATA_MAGIC = b"MCPCAS01"
+_INDEX_MAGIC = b"MCPIDX01"
+_RECORD = struct.Struct("<16sHfII")
+_INDEX_HEADER = struct.Struct("<8sQI")
+_INDEX_ENTRY = struct.Struct("<16sQ")
+
+# 재생 응답에 다시 붙이면 안 되는 헤더(본문은 이미 디코드·전체 수신된 상태로 저장한다)
+_DROP_HEADERS = frozenset({"content-length", "content-encoding", "transfer-encoding", "connection", "set-cookie"})
+
+
+class CassetteMiss(Exception):
+    """replay 모드에서 요청과 일치하는 기록이 카세트에 없음."""
+
+
+def request_key(
+    method: str,
+    path: str,
+    query: Mapping[str, Any],
+    json_body: Any,
+    raw_body: Optional[str],
+    ignore_query: Optional[str] = None,
+) -> bytes:
+    """업스트림 요청의 재생 매칭 키(16B). baseUrl·엔드포인트·헤더(요청 ID, 인증)는 포함하지 않는다."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(method.encode("ascii"))
+    digest.update(b"\0" + path.encode("utf-8") + b"\0")
+    items = sorted((str(k), str(v)) for k, v in query.items() if k != ignore_query)
+    digest.update(json.dumps(items, ensure_ascii=False).encode("utf-8"))
+    digest.update(b"\0")
+    if raw_body is not None:
+        digest.update(raw_body.encode("utf-8"))
+    elif json_body is not None:
+        digest.update(json.dumps(json_body, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8"))
+    return digest.digest()
+
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Cassette:
+    """업스트림 요청/응답 쌍을 담는 디스크 카세트 하나.
+
+    - record: 응답을 데이터 파일 끝에 붙이고(스레드에서) 인덱스 항목을 메모리에 모았다가 flush 때 .idx로 쓴다.
+    - replay: 데이터·인덱스 파일을 mmap하고 인덱스를 이진 탐색해 레코드를 찾는다. 같은 키의 기록이 여럿이면 차례로 돌려준다.
+    - .idx가 없거나 데이터 파일 크기와 맞지 않으면(녹화 중 비정상 종료 등) 데이터 파일을 훑어 다시 만든다.
+    """
+
+    def __init__(self, name: str, mode: str, directory: str = CASSETTE_DIR) -> None:
+        # 이름(서버 ID 폴백 포함)이 디렉터리 밖을 가리키면 파일을 만들거나 mmap하지 않는다.
+        root = os.path.realpath(directory)
+        if os.path.dirname(os.path.realpath(os.path.join(root, f"{name}.cas"))) != root:
+            raise ValueError(f"invalid cassette name {name!r}: must be a plain file name inside {directory!r}")
+        self.name = name
+        self.mode = mode
+        self.data_path = os.path.join(directory, f"{name}.cas")
+        self.index_path = os.path.join(directory, f"{name}.idx")
+        self._lock = threading.Lock()
+        self._file: Optional[Any] = None
+        self._entries: List[Tuple[bytes, int]] = []
+        self._dirty = False
+        self._data: Optional[mmap.mmap] = None
+        self._index: Optional[mmap.mmap] = None
+        self._count = 0
+        self._cursor: Dict[bytes, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.recorded_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        if mode == "replay":
+            self._open_replay()
+        elif os.path.exists(self.data_path):
+            # 기존 카세트에 이어서 녹화: 기존 항목을 인덱스에 포함시킨다.
+            self._entries = self._scan()
+
+    # Index
+    def _scan(self) -> List[Tuple[bytes, int]]:
+        """데이터 파일을 처음부터 훑어 (키, 오프셋) 목록을 만든다. 끝의 잘린 레코드는 무시한다."""
+        entries: List[Tuple[bytes, int]] = []
+        data = _map(self.data_path) if os.path.exists(self.data_path) else None
+        if data is None:
+            return entries
+        try:
+            if data[:len(_DATA_MAGIC)] != _DATA_MAGIC:
+                raise ValueError(f"not a cassette file: {self.data_path}")
+            offset, size = len(_DATA_MAGIC), len(data)
+            while offset + _RECORD.size <= size:
+                key, _status, _latency, headers_len, body_len = _RECORD.unpack_from(data, offset)
+                end = offset + _RECORD.size + headers_len + body_len
+                if end > size:
+                    break
+                entries.append((key, offset))
+                offset = end
+        finally:
+            data.close()
+        return entries
+
+    def _write_index(self, entries: List[Tuple[bytes, int]]) -> None:
+        data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, data_size, len(entries)))
+            for key, offset in sorted(entries):
+                f.write(_INDEX_ENTRY.pack(key, offset))
+        os.replace(tmp, self.index_path)
+
+    def _index_valid(self) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, data_size, count = _INDEX_HEADER.unpack(f.read(_INDEX_HEADER.size))
+            return (
+                magic == _INDEX_MAGIC
+                and data_size == os.path.getsize(self.data_path)
+                and os.path.getsize(self.index_path) == _INDEX_HEADER.size + count * _INDEX_ENTRY.size
+            )
+        except (OSError, struct.error):
+            return False
+
+    def _open_replay(self) -> None:
+        if not os.path.exists(self.data_path):
+            logger.warning("cassette.missing name=%s path=%s", self.name, self.data_path)
+            return
+        if not self._index_valid():
+            logger.info("cassette.reindex name=%s", self.name)
+            self._write_index(self._scan())
+        self._data = _map(self.data_path)
+        self._index = _map(self.index_path)
+        self._count = _INDEX_HEADER.unpack_from(self._index, 0)[2] if self._index is not None else 0
+
+    def _key_at(self, i: int) -> bytes:
+        assert self._index is not None
+        start = _INDEX_HEADER.size + i * _INDEX_ENTRY.size
+        return self._index[start:start + 16]
+
+    def _offsets(self, key: bytes) -> List[int]:
+        """인덱스를 이진 탐색해 key의 레코드 오프셋들을 녹화 순서대로 돌려준다."""
+        if self._index is None:
+            return []
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        offsets: List[int] = []
+        while lo < self._count and self._key_at(lo) == key:
+            offsets.append(_INDEX_ENTRY.unpack_from(self._index, _INDEX_HEADER.size + lo * _INDEX_ENTRY.size)[1])
+            lo += 1
+        return offsets
+
+    # Replay
+    def lookup(self, key: bytes) -> Optional[Tuple[int, float, List[Tuple[str, str]], bytes]]:
+        """(status, 녹화 지연 ms, 응답 헤더, 본문). 같은 키의 기록은 녹화 순서대로 돌아가며 쓴다."""
+        offsets = self._offsets(key)
+        if not offsets or self._data is None:
+            self.misses += 1
+            return None
+        turn = self._cursor.get(key, 0)
+        self._cursor[key] = turn + 1
+        offset = offsets[turn % len(offsets)]
+        _key, status, latency_ms, headers_len, body_len = _RECORD.unpack_from(self._data, offset)
+        start = offset + _RECORD.size
+        headers = json.loads(self._data[start:start + headers_len])
+        body = self._data[start + headers_len:start + headers_len + body_len]
+        self.hits += 1
+        return status, latency_ms, [(k, v) for k, v in headers], body
+
+    # Record
+    def _append(self, key: bytes, status: int, latency_ms: float, headers: bytes, body: bytes) -> None:
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.data_path, "ab")
+                if self._file.tell() == 0:
+                    self._file.write(_DATA_MAGIC)
+            offset = self._file.tell()
+            self._file.write(_RECORD.pack(key, status, latency_ms, len(headers), len(body)))
+            self._file.write(headers)
+            self._file.write(body)
+            self._file.flush()
+            self._entries.append((key, offset))
+            self._dirty = True
+            self.recorded += 1
+            self.recorded_bytes += _RECORD.size + len(headers) + len(body)
+
+    async def record(self, key: bytes, resp: httpx.Response, latency_ms: float) -> None:
+        headers = [(k, v) for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS]
+        encoded = json.dumps(headers, ensure_ascii=False).encode("utf-8")
+        await asyncio.to_thread(self._append, key, resp.status_code, latency_ms, encoded, resp.content)
+
+    def flush(self) -> None:
+        """녹화한 항목까지 포함해 .idx를 다시 쓴다."""
+        with self._lock:
+            if self._dirty:
+                self._write_index(self._entries)
+                self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            for handle in (self._file, self._data, self._index):
+                if handle is not None:
+                    handle.close()
+            self._file = self._data = self._index = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": self.data_path,
+            "entries": self._count if self.mode == "replay" else len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+            "recordedBytes": self.recorded_bytes,
+        }
+
+
+def _global_config() -> Optional[CassetteConfig]:
+    if CASSETTE_MODE not in ("record", "replay"):
+        return None
+    return CassetteConfig(
+        mode=CASSETTE_MODE, latency=CASSETTE_LATENCY, latencyScale=CASSETTE_LATENCY_SCALE, onMiss=CASSETTE_ON_MISS,
+    )
+
+
+class CassetteRegistry:
+    """카세트 이름별 Cassette 보관소. 서버 설정(cassette)이 없으면 전역 MCP_CASSETTE_MODE를 따른다."""
+
+    def __init__(self) -> None:
+        self._cassettes: Dict[str, Cassette] = {}
+        self._global = _global_config()
+
+    def config_for(self, server: ServerConfig) -> Optional[CassetteConfig]:
+        config = server.cassette if server.cassette is not None else self._global
+        if config is None or config.mode == "off":
+            return None
+        return config
+
+    def for_server(self, key: str, server: ServerConfig) -> Optional[Tuple[Cassette, CassetteConfig]]:
+        config = self.config_for(server)
+        if config is None:
+            return None
+        name = config.name or key
+        cassette = self._cassettes.get(name)
+        if cassette is None or cassette.mode != config.mode:
+            if cassette is not None:
+                # 모드가 바뀌면(녹화 → 재생 등) 인덱스를 마무리하고 새로 연다.
+                cassette.close()
+            cassette = self._cassettes[name] = Cassette(name, config.mode)
+        return cassette, config
+
+    async def replay(self, cassette: Cassette, config: CassetteConfig, key: bytes,
+                     request: httpx.Request) -> Optional[httpx.Response]:
+        """일치하는 기록이 있으면 (지연을 재현한 뒤) 응답을 만든다. 없으면 onMiss에 따라 None 또는 CassetteMiss."""
+        found = cassette.lookup(key)
+        if found is None:
+            if config.onMiss == "passthrough":
+                return None
+            raise CassetteMiss(f"no recorded response in cassette {cassette.name!r} for {request.method} {request.url.path}")
+        status, latency_ms, headers, body = found
+        delay_ms = 0.0
+        if config.latency == "recorded":
+            delay_ms = latency_ms * config.latencyScale
+        elif config.latency == "fixed":
+            delay_ms = float(config.fixedLatencyMs)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000.0)
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+    def flush(self) -> None:
+        for cassette in self._cassettes.values():
+            cassette.flush()
+
+    def close_all(self) -> None:
+        cassettes, self._cassettes = self._cassettes, {}
+        for cassette in cassettes.values():
+            cassette.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "globalMode": self._global.mode if self._global is not None else "off",
+            "cassettes": {name: cassette.stats() for name, cassette in sorted(self._cassettes.items())},
+        }
+
+
+cassettes = CassetteRegistry()
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .bindings import ToolRecord
+from .http_adapter import call_via_binding
+from .models import CompositeSpec, CompositeStep
+from .registry import registry
+from .tracing import current_trace
+
+
+# forEach 한 단계가 만들 수 있는 최대 호출 수(큰 배열이 업스트림 폭주로 이어지지 않도록)
+COMPOSITE_MAX_FANOUT = int(os.getenv("MCP_COMPOSITE_MAX_FANOUT", "100"))
+
+# 값 전체가 참조 하나인 경우(타입 유지)와 문자열 안에 섞인 참조(문자열 치환)
+_WHOLE_REF = re.compile(r"^\$\{\s*([^}]+?)\s*\}$")
+_EMBEDDED_REF = re.compile(r"\$\{\s*([^}]+?)\s*\}")
+_PATH_TOKEN = re.compile(r"([^.\[\]]+)|\[(-?\d+)\]")
+
+# 진행 이벤트 콜백: (이벤트 이름, 페이로드). 소비자가 느리면 await에서 대기한다(배압).
+ProgressCallback = Callable[[str, Any], Awaitable[None]]
+
+
+class CompositeError(Exception):
+    """컴포지트 툴 실행 실패(참조 해석 실패, 단계 툴 없음/비활성, 업스트림 오류 상태 등)."""
+
+
+def _lookup(scope: Dict[str, Any], expr: str) -> Any:
+    """`input.x` / `steps.a.items[0].id` / `item` 같은 경로를 scope에서 찾는다."""
+    tokens = _PATH_TOKEN.findall(expr)
+    if not tokens or "".join(f"[{i}]" if i else f".{k}" for k, i in tokens).lstrip(".") != expr.replace(" ", ""):
+        raise CompositeError(f"invalid reference: ${{{expr}}}")
+    value: Any = scope
+    for key, index in tokens:
+        try:
+            value = value[int(index)] if index else value[key]
+        except (KeyError, IndexError, TypeError):
+            raise CompositeError(f"reference ${{{expr}}} did not resolve") from None
+    return value
+
+
+def resolve_template(template: Any, scope: Dict[str, Any]) -> Any:
+    """인자/출력 템플릿의 `${...}` 참조를 scope 값으로 바꾼다(dict/list는 재귀)."""
+    if isinstance(template, str):
+        whole = _WHOLE_REF.match(template)
+        if whole:
+            return _lookup(scope, whole.group(1))
+        if "${" not in template:
+            return template
+        return _EMBEDDED_REF.sub(lambda m: _as_text(_lookup(scope, m.group(1))), template)
+    if isinstance(template, dict):
+        return {key: resolve_template(value, scope) for key, value in template.items()}
+    if isinstance(template, list):
+        return [resolve_template(value, scope) for value in template]
+    return template
+
+
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _validate_args(tool: ToolRecord, args: Dict[str, Any], step_id: str) -> None:
+    if not tool.inputSchema:
+        return
+    try:
+        from jsonschema import ValidationError, validate  # type: ignore
+    except ImportError:
+        return
+    try:
+        validate(instance=args, schema=tool.inputSchema)
+    except ValidationError as ve:
+        raise CompositeError(f"step {step_id!r}: schema_validation_error: {ve.message}") from None
+
+
+class CompositeRunner:
+    """컴포지트 툴의 단계 DAG를 허브 안에서 실행한다.
+
+    - 선행 단계가 모두 끝난 단계는 바로 시작하므로 서로 독립인 단계는 동시에 실행된다.
+    - 업스트림 호출은 공유 커넥션 풀(call_via_binding)을 쓰고, 컴포지트 하나당 spec.maxConcurrency개로 제한한다.
+    - 한 단계라도 실패(예외 또는 상태 코드 400 이상)하면 나머지 단계를 취소하고 CompositeError를 던진다(fail-fast).
+    - 단계 툴로 다른 컴포지트 툴은 쓸 수 없다(중첩 금지).
+    """
+
+    def __init__(self, max_fanout: int = COMPOSITE_MAX_FANOUT) -> None:
+        self.max_fanout = max_fanout
+        self.runs = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.steps = 0
+        self.upstream_calls = 0
+
+    async def run(
+        self,
+        server_id: str,
+        tool: ToolRecord,
+        args: Dict[str, Any],
+        request_id: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Any:
+        """컴포지트 툴을 실행해 output 템플릿(없으면 {단계 id: 결과})을 돌려준다.
+
+        progress가 있으면 단계마다 `step.started` / `step.completed` 이벤트를 보낸다.
+        """
+        spec = tool.composite
+        if spec is None:
+            raise CompositeError(f"tool {tool.name!r} is not a composite tool")
+        self.runs += 1
+        self.in_flight += 1
+        try:
+            results = await self._run_steps(server_id, spec, args, request_id, progress)
+            if spec.output is None:
+                return results
+            return resolve_template(spec.output, {"input": args, "steps": results})
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def _run_steps(
+        self,
+        server_id: str,
+        spec: CompositeSpec,
+        args: Dict[str, Any],
+        request_id: Optional[str],
+        progress: Optional[ProgressCallback],
+    ) -> Dict[str, Any]:
+        limit = asyncio.Semaphore(spec.maxConcurrency)
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: CompositeStep, needs: List[asyncio.Task]) -> None:
+            if needs:
+                await asyncio.gather(*needs)
+            results[step.id] = await self._run_step(
+                server_id, step, {"input": args, "steps": results}, limit, request_id, progress,
+            )
+
+        # 모델 검증에서 순환이 없음을 확인했으므로 선행 단계 태스크가 먼저 만들어지도록 위상 순서로 만든다.
+        pending = list(spec.steps)
+        while pending:
+            for step in list(pending):
+                needs = step.dependencies()
+                if all(d in tasks for d in needs):
+                    tasks[step.id] = asyncio.ensure_future(run_step(step, [tasks[d] for d in needs]))
+                    pending.remove(step)
+        try:
+            done, _ = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()  # type: ignore[misc]
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return {step.id: results[step.id] for step in spec.steps}
+
+    async def _run_step(
+        self,
+        server_id: str,
+        step: CompositeStep,
+        scope: Dict[str, Any],
+        limit: asyncio.Semaphore,
+        request_id: Optional[str],
+        progress: Optional[ProgressCallback],
+    ) -> Any:
+        target_id = step.server or server_id
+        server = registry.list_servers().get(target_id)
+        target = registry.list_tools(target_id).get(step.tool) if server is not None else None
+        if server is None or target is None:
+            raise CompositeError(f"step {step.id!r}: tool {target_id}/{step.tool} not found")
+        if not server.active or not target.active:
+            raise CompositeError(f"step {step.id!r}: tool {target_id}/{step.tool} is inactive")
+        if target.composite is not None:
+            raise CompositeError(f"step {step.id!r}: nested composite tools are not supported")
+
+        if step.forEach is not None:
+            items = resolve_template(step.forEach, scope)
+            if not isinstance(items, list):
+                raise CompositeError(f"step {step.id!r}: forEach must resolve to a list, got {type(items).__name__}")
+            if len(items) > self.max_fanout:
+                raise CompositeError(f"step {step.id!r}: forEach has {len(items)} items (limit {self.max_fanout})")
+            calls = [resolve_template(step.args, {**scope, "item": item, "index": i}) for i, item in enumerate(items)]
+        else:
+            calls = [resolve_template(step.args, scope)]
+        for call_args in calls:
+            _validate_args(target, call_args, step.id)
+
+        self.steps += 1
+        started = time.perf_counter()
+        if progress is not None:
+            await progress("step.started", {"step": step.id, "server": target_id, "tool": step.tool, "calls": len(calls)})
+
+        async def call(call_args: Dict[str, Any]) -> Any:
+            async with limit:
+                self.upstream_calls += 1
+                result = await call_via_binding(server, target, call_args, request_id=request_id, server_id=target_id)
+            status_code = result.get("status_code", 200)
+            if status_code >= 400:
+                raise CompositeError(
+                    f"step {step.id!r}: {target_id}/{step.tool} returned status {status_code}: {result.get('data')}"
+                )
+            return result.get("data")
+
+        # 한 호출이 실패하면 형제 호출(업스트림 요청)도 취소하고 끝날 때까지 기다린다(fail-fast).
+        call_tasks = [asyncio.ensure_future(call(call_args)) for call_args in calls]
+        try:
+            outputs = await asyncio.gather(*call_tasks)
+        finally:
+            for task in call_tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*call_tasks, return_exceptions=True)
+        data = list(outputs) if step.forEach is not None else outputs[0]
+        finished = time.perf_counter()
+        current_trace().add("composite.step", started, finished, step=step.id, tool=f"{target_id}/{step.tool}", calls=len(calls))
+        if progress is not None:
+            await progress("step.completed", {
+                "step": step.id, "status": 200, "elapsedMs": round((finished - started) * 1000.0, 3), "data": data,
+            })
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failed": self.failed,
+            "inFlight": self.in_flight,
+            "steps": self.steps,
+            "upstreamCalls": self.upstream_calls,
+            "maxFanout": self.max_fanout,
+        }
+
+
+composite_runner = CompositeRunner()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from .bindings import ToolRecord
+from .registry import InMemoryRegistry, registry
+from .sse import encode_json_event
+
+
+logger = logging.getLogger(__name__)
+
+# 재연결 시 이어 보낼 수 있도록 보관하는 최근 변경(델타) 수. 이보다 오래 끊겼으면 스냅샷부터 다시 보낸다.
+EVENTS_BACKLOG = int(os.getenv("MCP_EVENTS_BACKLOG", "1024"))
+# 구독자별 미전송 델타 상한. 넘으면 밀린 델타를 버리고 스냅샷으로 다시 맞춘다.
+EVENTS_SUBSCRIBER_QUEUE = int(os.getenv("MCP_EVENTS_SUBSCRIBER_QUEUE", "1000"))
+
+
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _tool_json(record: ToolRecord) -> Dict[str, Any]:
+    return record.to_model().model_dump(mode="json")
+
+
+class _Subscriber:
+    """스트림 하나의 미전송 델타 큐. 넘치면 큐를 비우고 resync를 표시한다."""
+
+    __slots__ = ("queue", "wakeup", "resync")
+
+    def __init__(self) -> None:
+        self.queue: Deque[Tuple[int, bytes]] = deque()
+        self.wakeup = asyncio.Event()
+        self.resync = False
+
+    def push(self, version: int, frame: bytes) -> None:
+        if self.resync:
+            return
+        if len(self.queue) >= EVENTS_SUBSCRIBER_QUEUE:
+            self.queue.clear()
+            self.resync = True
+        else:
+            self.queue.append((version, frame))
+        self.wakeup.set()
+
+
+class RegistryEventStream:
+    """레지스트리 변경을 버전 번호가 붙은 SSE 델타로 내보낸다.
+
+    - 쓰기마다 델타 프레임을 한 번만 직렬화해 모든 구독자가 같은 바이트를 공유한다.
+    - 스냅샷은 버전별로 캐시해 여러 대시보드가 동시에 붙어도 한 번만 만든다.
+    - 이벤트 id는 `<epoch>-<version>`. epoch는 프로세스마다 달라 재시작 후 재연결은 스냅샷부터 받는다.
+    """
+
+    def __init__(self, source: InMemoryRegistry, backlog: int = EVENTS_BACKLOG) -> None:
+        self.source = source
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._backlog: Deque[Tuple[int, bytes]] = deque(maxlen=max(1, backlog))
+        self._subscribers: Set[_Subscriber] = set()
+        self._snapshot: Optional[Tuple[int, bytes]] = None
+        self.deltas = 0
+        self.snapshots_built = 0
+        self.snapshots_sent = 0
+        self.resumed = 0
+        self.resyncs = 0
+        source.add_listener(self.on_registry_event)
+
+    def event_id(self, version: int) -> str:
+        return f"{self.epoch}-{version}"
+
+    def parse_since(self, value: Optional[str]) -> Optional[int]:
+        """`since` 쿼리 또는 Last-Event-ID를 이 프로세스의 버전 번호로 바꾼다(다른 epoch/형식 오류면 None)."""
+        if not value:
+            return None
+        epoch, _, version = value.strip().rpartition("-")
+        if epoch and epoch != self.epoch:
+            return None
+        try:
+            since = int(version)
+        except ValueError:
+            return None
+        return since if 0 <= since <= self.version else None
+
+    def on_registry_event(self, event: str, server_id: str, tool_name: Optional[str], record: Optional[ToolRecord]) -> None:
+        self.version += 1
+        payload: Dict[str, Any] = {"version": self.version, "serverId": server_id}
+        if event == "server.upsert":
+            cfg = self.source.list_servers().get(server_id)
+            payload["server"] = cfg.model_dump(mode="json") if cfg is not None else None
+        elif event.startswith("tool."):
+            payload["toolName"] = tool_name
+            if event == "tool.upsert" and record is not None:
+                payload["tool"] = _tool_json(record)
+        frame = encode_json_event(event, _dumps(payload), self.event_id(self.version))
+        self._backlog.append((self.version, frame))
+        self._snapshot = None
+        self.deltas += 1
+        for subscriber in self._subscribers:
+            subscriber.push(self.version, frame)
+
+    def snapshot_frame(self) -> Tuple[int, bytes]:
+        """(버전, snapshot 이벤트 프레임). 현재 버전의 캐시가 있으면 재사용한다."""
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            servers = self.source.list_servers()
+            payload = {
+                "version": self.version,
+                "servers": {sid: cfg.model_dump(mode="json") for sid, cfg in servers.items()},
+                "tools": {
+                    sid: {name: _tool_json(record) for name, record in self.source.list_tools(sid).items()}
+                    for sid in servers
+                },
+            }
+            self._snapshot = (self.version, encode_json_event("snapshot", _dumps(payload), self.event_id(self.version)))
+            self.snapshots_built += 1
+        self.snapshots_sent += 1
+        return self._snapshot
+
+    def _replay(self, since: int) -> Optional[List[bytes]]:
+        """since 이후 델타 프레임. 보관 범위를 벗어났으면 None."""
+        if since == self.version:
+            return []
+        if not self._backlog or self._backlog[0][0] > since + 1:
+            return None
+        return [frame for version, frame in self._backlog if version > since]
+
+    async def stream(self, since: Optional[int] = None) -> AsyncIterator[bytes]:
+        """since가 있고 보관 범위 안이면 이어서, 아니면 스냅샷부터 보낸 뒤 실시간 델타를 보낸다."""
+        subscriber = _Subscriber()
+        # 구독 등록과 초기 상태 계산 사이에 await가 없으므로 델타 누락/중복이 없다.
+        self._subscribers.add(subscriber)
+        try:
+            frames = self._replay(since) if since is not None else None
+            if frames is None:
+                version, frame = self.snapshot_frame()
+                frames = [frame]
+            else:
+                version = self.version
+                self.resumed += 1
+            for frame in frames:
+                yield frame
+            while True:
+                while subscriber.queue:
+                    delta_version, frame = subscriber.queue.popleft()
+                    if delta_version > version:
+                        version = delta_version
+                        yield frame
+                if subscriber.resync:
+                    subscriber.resync = False
+                    self.resyncs += 1
+                    version, frame = self.snapshot_frame()
+                    yield frame
+                    continue
+                subscriber.wakeup.clear()
+                await subscriber.wakeup.wait()
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "version": self.version,
+            "subscribers": len(self._subscribers),
+            "backlog": len(self._backlog),
+            "oldestVersion": self._backlog[0][0] if self._backlog else None,
+            "deltas": self.deltas,
+            "snapshotsBuilt": self.snapshots_built,
+            "snapshotsSent": self.snapshots_sent,
+            "resumed": self.resumed,
+            "resyncs": self.resyncs,
+        }
+
+
+registry_events = RegistryEventStream(registry)
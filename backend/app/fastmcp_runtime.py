@@ -1,16 +1,22 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, Optional, Set
 import os
 import logging
 from uuid import UUID
-from urllib.parse import parse_qsl, urlencode
+from urllib.parse import unquote_plus
 
 from fastmcp import FastMCP
 from fastmcp.tools.tool import FunctionTool
 
 from .registry import registry
 from .http_adapter import call_via_binding
+from .sse import SSEGuardASGI
+from .sessions import GLOBAL_SCOPE, SessionLimitASGI
+from .scheduler import ANONYMOUS_CALLER, caller_from_request, scheduler
+from .audit import audit_log
+from .composite import composite_runner
 
 
 fastmcp_server = FastMCP(name="MCP Hub")
@@ -37,12 +43,8 @@ def _normalize_uuid_if_possible(value: str) -> str:
     # Strip hyphens and lowercase for validation
     c2 = candidate.replace("-", "").strip().lower()
     if len(c2) == 32 and all(ch in "0123456789abcdef" for ch in c2):
-        try:
-            # Validate by constructing UUID from hex, then return hex form
-            u = UUID(hex=c2)
-            return u.hex
-        except Exception:
-            return value
+        # 32자리 소문자 hex는 UUID(hex=c2).hex와 동일하므로 UUID 생성 없이 반환
+        return c2
     # Try parsing generic string (may include hyphens), then emit hex
     try:
         u = UUID(candidate)
@@ -51,52 +53,85 @@ def _normalize_uuid_if_possible(value: str) -> str:
         return value
 
 
+_SESSION_KEYS = (b"session_id=", b"sessionId=")
+_HEX_DIGITS = b"0123456789abcdef"
+
+
+@lru_cache(maxsize=int(os.getenv("MCP_SESSION_NORMALIZE_CACHE", "4096")))
+def _normalize_session_id(raw: bytes) -> bytes:
+    """쿼리스트링의 session_id 원본 바이트를 32-hex 바이트로 정규화한다(결과는 LRU로 메모이즈).
+
+    UUID로 정규화되는 값만 바꾸고, 그 밖의 값은 디코드한 문자(`&`, 공백, 비 latin-1 등)가
+    query_string에 섞이지 않도록 원본 바이트를 그대로 돌려준다.
+    """
+    text = unquote_plus(raw.decode("latin-1")) if (b"%" in raw or b"+" in raw) else raw.decode("latin-1")
+    normalized = _normalize_uuid_if_possible(text)
+    if len(normalized) != 32 or normalized.strip(_HEX_DIGITS.decode("ascii")):
+        return raw
+    try:
+        return normalized.encode("ascii")
+    except UnicodeEncodeError:
+        return raw
+
+
+def _rewrite_session_ids(qs: bytes) -> Optional[bytes]:
+    """query_string에서 session_id/sessionId 값을 바이트 단위로 찾아 정규화한다.
+
+    - 이미 32자리 소문자 hex면 아무것도 하지 않는다(할당 없음).
+    - 값이 바뀐 경우에만 새 query_string을 반환하고, 아니면 None.
+    """
+    out: Optional[bytes] = None
+    for key in _SESSION_KEYS:
+        pos = qs.find(key)
+        while pos >= 0:
+            if pos == 0 or qs[pos - 1] == 0x26:  # b"&"
+                start = pos + len(key)
+                end = qs.find(b"&", start)
+                if end < 0:
+                    end = len(qs)
+                value = qs[start:end]
+                if not (len(value) == 32 and not value.translate(None, _HEX_DIGITS)):
+                    norm = _normalize_session_id(value)
+                    if norm != value:
+                        qs = qs[:start] + norm + qs[end:]
+                        out = qs
+                        end = start + len(norm)
+                pos = qs.find(key, end)
+            else:
+                pos = qs.find(key, pos + len(key))
+    return out
+
+
 class MessagesNormalizerASGI:
-    """/messages 요청의 쿼리파라미터 중 `session_id` 값을 정규화하는 ASGI 래퍼."""
+    """/messages 요청의 쿼리파라미터 중 `session_id` 값을 정규화하는 ASGI 래퍼.
+
+    - message_path로 들어온 HTTP 요청만 검사하고, /sse 등 다른 경로는 그대로 통과시킨다.
+    - session_id는 바이트 단위로 찾고, 바뀔 때만 scope의 query_string을 교체한다.
+    """
 
     def __init__(self, app: Any, message_path: str = "/messages") -> None:
         self.app = app
         self.message_path = message_path.rstrip("/") or "/messages"
+        self._message_prefix = self.message_path + "/"
 
     async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> Any:
-        if scope.get("type") != "http":
+        if scope["type"] != "http":
             return await self.app(scope, receive, send)
 
-        # Parse query string
-        raw_qs: bytes = scope.get("query_string", b"")
-        try:
-            pairs = parse_qsl(raw_qs.decode("utf-8"), keep_blank_values=True)
-        except Exception:
-            pairs = []
-        if not pairs:
+        # Mount 하위에서는 path가 전체 경로이므로 root_path를 떼고 비교한다.
+        path: str = scope["path"]
+        root_path: str = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        if path != self.message_path and not path.startswith(self._message_prefix):
             return await self.app(scope, receive, send)
 
-        # Normalize session_id (and sessionId as a courtesy)
-        changed = False
-        new_pairs = []
-        sid_in: Optional[str] = None
-        for k, v in pairs:
-            if k in ("session_id", "sessionId"):
-                sid_in = v
-                sid_norm = _normalize_uuid_if_possible(v)
-                if sid_norm != v:
-                    changed = True
-                    new_pairs.append((k, sid_norm))
-                else:
-                    new_pairs.append((k, v))
-            else:
-                new_pairs.append((k, v))
-
-        if changed:
-            norm_qs = urlencode(new_pairs, doseq=True)
-            scope = dict(scope)
-            scope["query_string"] = norm_qs.encode("utf-8")
-            try:
-                # path 변수가 정의되지 않아 오류가 나던 부분 수정
-                path_val = scope.get("path", "")
-                logger.info("messages.normalize applied path=%s session_id.in=%s", path_val, sid_in)
-            except Exception:
-                pass
+        raw_qs: bytes = scope.get("query_string", b"")
+        if raw_qs:
+            norm_qs = _rewrite_session_ids(raw_qs)
+            if norm_qs is not None:
+                scope["query_string"] = norm_qs
+                logger.debug("messages.normalize applied path=%s", scope["path"])
 
         return await self.app(scope, receive, send)
 
@@ -112,6 +147,16 @@ def get_or_create_fastmcp(server_id: str) -> FastMCP:
     return _server_fastmcp[server_id]
 
 
+def _current_caller() -> str:
+    """FastMCP 전송(SSE /messages 등)으로 들어온 호출의 호출자 식별자."""
+    try:
+        from fastmcp.server.dependencies import get_http_request
+
+        return caller_from_request(get_http_request())
+    except Exception:
+        return ANONYMOUS_CALLER
+
+
 def tool_key(server_id: str, tool_name: str) -> str:
     return f"{server_id}.{tool_name}"
 
@@ -132,7 +177,15 @@ def register_tool_with_fastmcp(server_id: str, tool_name: str) -> None:
 
     async def _tool_fn(args: Dict[str, Any] | None = None) -> Any:
         provided_args: Dict[str, Any] = args or {}
-        result: Dict[str, Any] = await call_via_binding(server_cfg, binding, provided_args)
+        caller = _current_caller()
+        with audit_log.call(caller, server_id, tool_name, provided_args, binding.paramMapping.headers) as audit:
+            async with scheduler.slot(caller, server_id):
+                if binding.composite is not None:
+                    data = await composite_runner.run(server_id, binding, provided_args)
+                    audit.status = 200
+                    return data
+                result: Dict[str, Any] = await call_via_binding(server_cfg, binding, provided_args, server_id=server_id)
+            audit.status = result.get("status_code")
         return result.get("data")
 
     # 1) Register to global FastMCP (for legacy/custom SSE)
@@ -167,6 +220,41 @@ def deregister_tool_with_fastmcp(server_id: str, tool_name: str) -> None:
         pass
 
 
+def _session_cleanup_for(subapp: Any) -> Optional[Any]:
+    """서브앱의 SseServerTransport를 찾아, 종료된 세션의 writer를 테이블에서 제거하는 콜백을 만든다.
+
+    - mcp의 SseServerTransport는 연결이 끊겨도 `_read_stream_writers`에서 세션을 지우지 않는다.
+    """
+    from mcp.server.sse import SseServerTransport
+
+    transport = None
+    for route in getattr(subapp, "routes", []):
+        owner = getattr(getattr(route, "app", None), "__self__", None)
+        if isinstance(owner, SseServerTransport):
+            transport = owner
+            break
+    if transport is None:
+        return None
+
+    def _cleanup(session_id: str) -> None:
+        try:
+            transport._read_stream_writers.pop(UUID(hex=session_id), None)
+        except ValueError:
+            pass
+
+    return _cleanup
+
+
+def _wrap_sse_app(subapp: Any, scope_key: str) -> Any:
+    on_close = _session_cleanup_for(subapp)
+    wrapped: Any = SSEGuardASGI(subapp)
+    wrapped = SessionLimitASGI(wrapped, scope_key, sse_path="/sse", message_path="/messages", on_close=on_close)
+    # 선택적 정규화 래퍼 적용 (환경변수로 끌 수 있음). 세션 래퍼보다 바깥에 두어 정규화된 session_id를 보게 한다.
+    if os.getenv("MCP_SESSION_NORMALIZE", "1") not in ("0", "false", "False"):
+        wrapped = MessagesNormalizerASGI(wrapped, message_path="/messages")
+    return wrapped
+
+
 def build_fastmcp_sse_app():
     # 글로벌(레거시) SSE 엔드포인트를 /mcp-sdk/{sse|messages} 아래에 노출
     from fastmcp.server.http import create_sse_app
@@ -178,10 +266,7 @@ def build_fastmcp_sse_app():
         auth=None,
         debug=False,
     )
-    # 선택적 정규화 래퍼 적용 (환경변수로 끌 수 있음)
-    if os.getenv("MCP_SESSION_NORMALIZE", "1") not in ("0", "false", "False"):
-        subapp = MessagesNormalizerASGI(subapp, message_path="/messages")
-    return subapp
+    return _wrap_sse_app(subapp, GLOBAL_SCOPE)
 
 
 def build_fastmcp_sse_app_for(server_id: str):
@@ -195,9 +280,7 @@ def build_fastmcp_sse_app_for(server_id: str):
         auth=None,
         debug=False,
     )
-    if os.getenv("MCP_SESSION_NORMALIZE", "1") not in ("0", "false", "False"):
-        subapp = MessagesNormalizerASGI(subapp, message_path="/messages")
-    return subapp
+    return _wrap_sse_app(subapp, server_id)
 
 
 def ensure_server_mounted(server_id: str) -> None:
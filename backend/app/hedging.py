@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from .models import HedgePolicy
+
+
+# 지연 분위수 계산에 쓰는 최근 샘플 수와, 분위수를 쓰기 시작하는 최소 샘플 수
+WINDOW_SIZE = int(os.getenv("MCP_HEDGE_WINDOW", "256"))
+MIN_SAMPLES = int(os.getenv("MCP_HEDGE_MIN_SAMPLES", "20"))
+# 헤지 예산이 한 번에 쌓일 수 있는 최대치(유휴 후 몰아서 헤지하지 않도록)
+_MAX_BUDGET_TOKENS = 10.0
+# 분위수는 이 샘플 수마다 다시 계산한다.
+_RECOMPUTE_EVERY = 8
+
+R = TypeVar("R")
+
+
+class HedgeState:
+    """툴 하나의 최근 지연 분포와 헤지 예산."""
+
+    __slots__ = (
+        "samples", "_since_recompute", "_cached_pct", "_cached_value", "budget",
+        "requests", "hedged", "hedge_wins", "budget_denied",
+    )
+
+    def __init__(self) -> None:
+        self.samples: Deque[float] = deque(maxlen=WINDOW_SIZE)
+        self._since_recompute = 0
+        self._cached_pct = -1.0
+        self._cached_value = 0.0
+        self.budget = 1.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    def record(self, latency_s: float) -> None:
+        self.samples.append(latency_s)
+        self._since_recompute += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        if pct != self._cached_pct or self._since_recompute >= _RECOMPUTE_EVERY:
+            ordered = sorted(self.samples)
+            index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+            self._cached_pct, self._cached_value = pct, ordered[index]
+            self._since_recompute = 0
+        return self._cached_value
+
+    def delay_s(self, policy: HedgePolicy) -> float:
+        learned = self.percentile(policy.percentile)
+        delay = learned if learned is not None else policy.initialDelayMs / 1000.0
+        return min(max(delay, policy.minDelayMs / 1000.0), policy.maxDelayMs / 1000.0)
+
+    def _earn(self, policy: HedgePolicy) -> None:
+        self.requests += 1
+        self.budget = min(_MAX_BUDGET_TOKENS, self.budget + policy.budgetPct / 100.0)
+
+    def _has_budget(self) -> bool:
+        if self.budget < 1.0:
+            self.budget_denied += 1
+            return False
+        return True
+
+    def _spend(self) -> None:
+        self.budget -= 1.0
+
+    async def run(
+        self,
+        policy: HedgePolicy,
+        attempt: Callable[[int], Awaitable[R]],
+        can_hedge: Callable[[], bool],
+        succeeded: Callable[[R], bool],
+    ) -> R:
+        """attempt(0)을 보내고 delay 안에 끝나지 않으면 attempt(1)을 추가로 보내 먼저 성공한 결과를 쓴다.
+
+        - can_hedge: 두 번째 요청을 보낼 수 있는지(업스트림 속도 제한 등) 호출 직전에 확인
+        - 진 쪽은 취소한다. 취소된 시도는 그때까지의 경과 시간을 지연 샘플로 남겨 꼬리 분포를 유지한다.
+        """
+        self._earn(policy)
+        started: Dict[int, float] = {}
+
+        async def timed(index: int) -> Tuple[int, R]:
+            started[index] = time.perf_counter()
+            result = await attempt(index)
+            self.record(time.perf_counter() - started[index])
+            return index, result
+
+        primary = asyncio.ensure_future(timed(0))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.delay_s(policy))
+            # 예산은 두 번째 요청을 실제로 보낼 때만 쓴다(can_hedge는 속도 제한 토큰을 가져가므로 예산 확인 뒤에 부른다).
+            if done or not self._has_budget() or not can_hedge():
+                pending = set()
+                return (await primary)[1]
+
+            self._spend()
+            self.hedged += 1
+            backup = asyncio.ensure_future(timed(1))
+            pending = {primary, backup}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        index, result = task.result()
+                        if succeeded(result):
+                            if index == 1:
+                                self.hedge_wins += 1
+                            return result
+            # 둘 다 성공하지 못함: 끝난 순서와 무관하게 첫 요청의 결과(또는 예외)를 돌려준다.
+            return primary.result()[1]
+        finally:
+            # 진 쪽(또는 바깥 취소 시 남은 시도)을 취소한다.
+            now = time.perf_counter()
+            for task in pending:
+                task.cancel()
+                index = 0 if task is primary else 1
+                if index in started:
+                    self.record(now - started[index])
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self, policy: Optional[HedgePolicy] = None) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100.0 * len(ordered)) - 1))] * 1000.0, 2)
+
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedgeRatePct": round(self.hedged * 100.0 / self.requests, 2) if self.requests else 0.0,
+            "hedgeWins": self.hedge_wins,
+            "budgetDenied": self.budget_denied,
+            "samples": len(ordered),
+            "p50Ms": pct(50),
+            "p95Ms": pct(95),
+            "p99Ms": pct(99),
+            "delayMs": round(self.delay_s(policy) * 1000.0, 2) if policy is not None else None,
+        }
+
+
+class HedgeRegistry:
+    """(server_id, tool) 별 HedgeState 보관소."""
+
+    def __init__(self) -> None:
+        self._states: Dict[str, HedgeState] = {}
+        self._policies: Dict[str, HedgePolicy] = {}
+
+    def state(self, key: str, policy: HedgePolicy) -> HedgeState:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = HedgeState()
+        self._policies[key] = policy
+        return state
+
+    def stats(self) -> Dict[str, Any]:
+        return {key: state.stats(self._policies.get(key)) for key, state in sorted(self._states.items())}
+
+
+hedgers = HedgeRegistry()
@@ -1,18 +1,69 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Dict, Optional, Tuple
+import os
+import time
+from typing import Any, Awaitable, Dict, Optional, Set, Tuple
 
 import httpx
 from pydantic import ValidationError
 
-from .models import ServerConfig, ToolBinding, AuthType, HttpMethod
+from .models import ServerConfig, AuthType, HttpMethod
+from .bindings import ToolRecord
+from .balancer import EndpointState, balancers
+from .hedging import hedgers
+from .offload import offloader
+from .shaping import ResponseShaper
+from .pagination import PageSink, paginator
+from .cassette import cassettes, request_key
+from .rate_limit import is_idempotent, rate_limiters
+from .tracing import REQUEST_ID_HEADER, HttpxTraceHook, current_trace
 
 
 class BindingError(Exception):
     pass
 
 
+# 응답 규칙(responseMapping)이 없는 JSON 응답을 파싱·재직렬화 없이 원본 바이트 그대로 전달한다(호출 측이 직렬화 바이트만 쓰는 경우).
+JSON_PASSTHROUGH = os.getenv("MCP_JSON_PASSTHROUGH", "1") not in ("0", "false", "False")
+# JSON 텍스트의 첫/마지막 바이트로 가능한 값(객체, 배열, 문자열, 숫자, true/false/null)
+_JSON_FIRST = frozenset(b'{["-0123456789tfn')
+_JSON_LAST = frozenset(b'}]"0123456789el')
+_UTF8_NAMES = frozenset({"utf-8", "utf8", "ascii", "us-ascii"})
+
+
+# 업스트림 호출용 공유 커넥션 풀 (이벤트 루프별 1개)
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """커넥션을 재사용하는 공유 AsyncClient를 반환한다.
+
+    - 호출마다 클라이언트(SSL 컨텍스트, 커넥션)를 새로 만들지 않도록 풀을 공유한다.
+    - 이벤트 루프가 바뀌면(테스트 클라이언트 재기동 등) 새로 만든다.
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("MCP_HTTP_MAX_CONNECTIONS", "200")),
+            max_keepalive_connections=int(os.getenv("MCP_HTTP_MAX_KEEPALIVE", "50")),
+        )
+        _http_client = httpx.AsyncClient(timeout=httpx.Timeout(30.0), limits=limits)
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """앱 종료 시 공유 커넥션 풀을 닫는다."""
+    global _http_client, _http_client_loop
+    client, _http_client, _http_client_loop = _http_client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
 def _interpolate_path(path_template: str, path_mapping: Dict[str, str], args: Dict[str, Any]) -> str:
     """pathTemplate에 지정된 {placeholder}를 실제 args 값으로 치환한다.
 
@@ -90,17 +141,108 @@ def _build_body(body_mapping: Dict[str, str], raw_body_key: Optional[str], args:
     return None, None
 
 
-async def call_via_binding(server: ServerConfig, tool: ToolBinding, args: Dict[str, Any]) -> Dict[str, Any]:
+def _decode_body(content: bytes, encoding: str, is_json: bool) -> Tuple[Optional[Any], Optional[str]]:
+    """본문을 (json, text) 중 하나로 디코드한다. JSON 파싱에 실패하면 텍스트로 보관."""
+    if is_json:
+        try:
+            return json.loads(content), None
+        except Exception:
+            pass
+    return None, content.decode(encoding, errors="replace")
+
+
+def _passthrough_json(content: bytes, encoding: str) -> Optional[bytes]:
+    """JSON 본문을 파싱하지 않고 그대로 쓸 바이트를 돌려준다. 명백히 JSON이 아니거나 UTF-8이 아니면 None.
+
+    문자열 안에는 날 줄바꿈이 올 수 없으므로 CR/LF를 지워도 값은 같다(SSE data 한 줄로 보내기 위한 압축).
+    """
+    if encoding.lower() not in _UTF8_NAMES:
+        return None
+    body = content.strip()
+    if not body or body[0] not in _JSON_FIRST or body[-1] not in _JSON_LAST:
+        return None
+    if b"\n" in body or b"\r" in body:
+        body = body.translate(None, b"\r\n")
+    return body
+
+
+def _postprocess(
+    content: bytes, encoding: str, is_json: bool, shaper: Optional[ResponseShaper], need_data: bool,
+) -> Tuple[Any, bytes]:
+    """워커 풀에서 실행하는 응답 후처리: 파싱 → 응답 규칙(pick·투영·자르기) → JSON 직렬화(SSE/JSON-RPC 본문용 바이트).
+
+    need_data가 False면 직렬화 바이트만 돌려준다(프로세스 풀에서 결과 객체를 다시 복사하지 않도록).
+    """
+    response_json, response_text = _decode_body(content, encoding, is_json)
+    if shaper is not None and response_json is not None:
+        picked, encoded = shaper.shape(response_json)
+    else:
+        picked = response_json if response_json is not None else response_text
+        encoded = json.dumps(picked).encode("utf-8")
+    return (picked if need_data else None), encoded
+
+
+async def _send(client: httpx.AsyncClient, request: httpx.Request) -> httpx.Response:
+    """요청을 보내고 본문까지 읽는다.
+
+    - 호출이 취소되면(클라이언트 이탈) httpcore가 진행 중인 커넥션을 닫고,
+      본문 수신 중 취소되면 finally의 aclose()가 즉시 커넥션을 풀에 반환/폐기한다.
+    """
+    resp = await client.send(request, stream=True)
+    body_started = time.perf_counter()
+    try:
+        await resp.aread()
+    finally:
+        await resp.aclose()
+    current_trace().add("upstream.body", body_started, time.perf_counter(), bytes=len(resp.content), status=resp.status_code)
+    return resp
+
+
+async def call_via_binding(
+    server: ServerConfig,
+    tool: ToolRecord,
+    args: Dict[str, Any],
+    request_id: Optional[str] = None,
+    server_id: Optional[str] = None,
+    need_data: bool = True,
+    on_page: Optional[PageSink] = None,
+    page: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """등록된 서버/툴 바인딩 정보를 이용해 실제 HTTP 호출을 수행한다.
 
     - URL: 서버 baseUrl + pathTemplate 치환 결과
     - Headers/Query/Body: 서버 기본값 + 바인딩 매핑 + 인증 설정을 반영
+    - request_id: 지정되거나 현재 trace에 있으면 업스트림 요청 헤더로 전달
+    - server_id: 송신 속도 제한 버킷/로드밸런서 키(없으면 baseUrl). 429/Retry-After/X-RateLimit-*를 버킷에 반영하고,
+      멱등 메서드의 429는 허용 대기 시간 안이면 한 번 재시도
+    - server.endpoints가 있으면 지연 EWMA 기반으로 엔드포인트를 고르고, 멱등 요청의 연결 실패는 다른 엔드포인트로 넘긴다
+    - GET 툴에 hedge 정책이 있으면 느린 첫 요청에 대해 두 번째 요청을 보내 먼저 성공한 응답을 쓴다
+    - 카세트(server.cassette 또는 MCP_CASSETTE_MODE)가 record면 응답을 디스크에 녹화하고, replay면 녹화된 응답을 쓴다
     - 응답: content-type이 JSON이면 파싱, 아니면 텍스트로 보관
-    - responseMapping.pick이 있으면 jsonpath-ng로 필요한 부분만 추출
+    - responseMapping이 있으면 컴파일된 규칙(pick, 필드 투영, 배열 자르기, 문자열 자르기, 바이트 상한)을 한 번에 적용
+    - 본문이 MCP_OFFLOAD_MIN_BYTES 이상이면 파싱·응답 규칙·직렬화를 워커 풀에서 하고 결과 JSON 바이트를 data_json에 싣는다.
+      need_data=False(호출 측이 data_json만 쓰는 경우)면 프로세스 풀에서는 data를 돌려받지 않는다(None).
+    - need_data=False이고 응답 규칙이 없는 JSON 응답은 파싱하지 않고 원본 바이트(줄바꿈만 제거)를 data_json으로 넘긴다(data는 None).
+    - tool.pagination이 있으면 페이지를 순회해 항목을 모은다(data는 항목 리스트, 응답 규칙의 pick·투영·문자열 자르기는 페이지 항목마다 적용).
+      on_page가 있으면 페이지마다 항목 리스트를 넘기고, need_data=False면 모으지 않는다(data는 None).
+      page는 페이지 순회가 한 페이지를 요청할 때 쓰는 내부 인자(추가 쿼리, 응답 규칙 미적용)다.
     """
-    # Compose URL
+    if tool.pagination is not None and page is None:
+        shaper = tool.responseShaper
+
+        def fetch_page(page_query: Dict[str, Any]) -> Awaitable[Dict[str, Any]]:
+            return call_via_binding(server, tool, args, request_id, server_id, need_data=True, page=page_query)
+
+        return await paginator.run(
+            tool.pagination, fetch_page, shaper.records if shaper is not None else None, on_page,
+            collect=need_data or on_page is None,
+        )
+
+    trace = current_trace()
+    request_id = request_id or trace.request_id or None
+
+    # Compose URL (baseUrl 또는 endpoints 중 선택된 주소 + 경로)
     path = _interpolate_path(tool.pathTemplate, tool.paramMapping.path, args)
-    url = server.baseUrl.rstrip("/") + "/" + path.lstrip("/")
 
     # Compose headers/query/body
     headers = _build_headers(
@@ -111,6 +253,8 @@ async def call_via_binding(server: ServerConfig, tool: ToolBinding, args: Dict[s
         auth_key=server.auth.key,
         auth_value=server.auth.value,
     )
+    if request_id:
+        headers.setdefault(REQUEST_ID_HEADER, request_id)
     query = _build_query(
         query_mapping=tool.paramMapping.query,
         args=args,
@@ -118,52 +262,142 @@ async def call_via_binding(server: ServerConfig, tool: ToolBinding, args: Dict[s
         auth_key=server.auth.key,
         auth_value=server.auth.value,
     )
+    if page:
+        query.update(page)
     json_body, raw_body = _build_body(tool.paramMapping.body, tool.paramMapping.rawBody, args)
 
     method = tool.method
-    timeout = httpx.Timeout(30.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        resp = await client.request(
+    # 샘플링된 경우에만 httpcore trace 훅을 붙여 connect/TTFB를 측정한다.
+    extensions = {"trace": HttpxTraceHook(trace)} if trace.sampled else None
+    client = get_http_client()
+    key = server_id or server.baseUrl
+    bucket = rate_limiters.bucket(key, server.rateLimit)
+    balancer = balancers.for_server(key, server)
+    idempotent = is_idempotent(method.value)
+    hedge = tool.hedge if tool.hedge is not None and tool.hedge.enabled and method == HttpMethod.GET else None
+    hedge_state = hedgers.state(f"{key}.{tool.name}", hedge) if hedge is not None else None
+
+    async def send_to(endpoint: Optional[EndpointState]) -> httpx.Response:
+        base_url = endpoint.url if endpoint is not None else server.baseUrl
+        request = client.build_request(
             method.value,
-            url,
+            base_url.rstrip("/") + "/" + path.lstrip("/"),
             params=query or None,
             headers=headers or None,
             json=json_body if raw_body is None else None,
             content=raw_body,
+            extensions=extensions,
         )
-
-    content_type = resp.headers.get("content-type", "")
-    response_text: Optional[str] = None
-    response_json: Optional[Any] = None
-    try:
-        if "application/json" in content_type:
-            response_json = resp.json()
-        else:
-            response_text = resp.text
-    except Exception:
-        response_text = resp.text
-
-    # Optional pick using jsonpath-ng
-    picked: Any = response_json if response_json is not None else response_text
-    if tool.responseMapping and tool.responseMapping.pick and response_json is not None:
+        if endpoint is None:
+            return await _send(client, request)
+        endpoint.inflight += 1
+        sent = time.perf_counter()
         try:
-            from jsonpath_ng import parse as jp_parse  # type: ignore
-
-            expr = jp_parse(tool.responseMapping.pick)
-            matches = [m.value for m in expr.find(response_json)]
-            if len(matches) == 1:
-                picked = matches[0]
-            else:
-                picked = matches
-        except Exception:
-            # Fallback to full json if parsing fails
-            picked = response_json
-
-    return {
+            resp = await _send(client, request)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            endpoint.record_failure(type(e).__name__)
+            raise
+        finally:
+            endpoint.inflight -= 1
+        latency_ms = (time.perf_counter() - sent) * 1000.0
+        if resp.status_code >= 500:
+            endpoint.record_failure(f"HTTP {resp.status_code}", latency_ms)
+        else:
+            endpoint.record_success(latency_ms)
+        return resp
+
+    async def fetch_live() -> httpx.Response:
+        tried: Set[str] = set()
+        retried_429 = False
+        while True:
+            endpoint = balancer.pick(tried) if balancer is not None else None
+            wait_started = time.perf_counter()
+            if await bucket.acquire():
+                trace.add("ratelimit.wait", wait_started, time.perf_counter())
+
+            try:
+                if hedge_state is None:
+                    resp = await send_to(endpoint)
+                else:
+                    def attempt(index: int, primary: Optional[EndpointState] = endpoint) -> Awaitable[httpx.Response]:
+                        if index == 0 or primary is None or balancer is None:
+                            return send_to(primary)
+                        # 헤지 요청은 가능하면 다른 엔드포인트로 보낸다.
+                        now = time.perf_counter()
+                        trace.add("upstream.hedge", now, now)
+                        return send_to(balancer.pick(tried | {primary.url}) or primary)
+
+                    resp = await hedge_state.run(hedge, attempt, bucket.try_acquire, lambda r: r.status_code < 500)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if endpoint is None or balancer is None:
+                    raise
+                tried.add(endpoint.url)
+                # 연결 자체가 안 된 멱등 요청은 다른 엔드포인트로 넘긴다.
+                if idempotent and balancer.has_alternative(tried):
+                    balancer.failovers += 1
+                    continue
+                raise
+
+            bucket.observe(resp.status_code, resp.headers)
+            if resp.status_code == 429 and idempotent and not retried_429 and bucket.retry_delay() is not None:
+                retried_429 = True
+                continue
+            return resp
+
+    cassette, cassette_cfg = cassettes.for_server(key, server) or (None, None)
+    cassette_key = request_key(
+        method.value, path, query, json_body, raw_body,
+        ignore_query=server.auth.key if server.auth.type == AuthType.query else None,
+    ) if cassette is not None else b""
+    resp: Optional[httpx.Response] = None
+    if cassette is not None and cassette_cfg is not None and cassette_cfg.mode == "replay":
+        # 카세트 재생: 업스트림(속도 제한·로드밸런서 포함)을 거치지 않고 녹화된 응답을 쓴다.
+        replay_started = time.perf_counter()
+        request = client.build_request(
+            method.value, server.baseUrl.rstrip("/") + "/" + path.lstrip("/"), params=query or None,
+        )
+        resp = await cassettes.replay(cassette, cassette_cfg, cassette_key, request)
+        if resp is not None:
+            trace.add("cassette.replay", replay_started, time.perf_counter(), status=resp.status_code)
+    if resp is None:
+        live_started = time.perf_counter()
+        resp = await fetch_live()
+        if cassette is not None and cassette.mode == "record":
+            await cassette.record(cassette_key, resp, (time.perf_counter() - live_started) * 1000.0)
+
+    content = resp.content
+    encoding = resp.encoding or "utf-8"
+    is_json = "application/json" in resp.headers.get("content-type", "")
+    shaper = tool.responseShaper if page is None else None
+    encoded: Optional[bytes] = None
+    if JSON_PASSTHROUGH and is_json and shaper is None and not need_data:
+        # 원본 JSON 바이트를 그대로 data_json으로 쓴다(파싱·재직렬화 없음). data는 만들지 않는다.
+        with trace.span("passthrough", bytes=len(content)):
+            encoded = _passthrough_json(content, encoding)
+    if encoded is not None:
+        picked = None
+    elif offloader.should_offload(len(content)):
+        # 큰 본문은 파싱·응답 규칙·직렬화를 한 번에 워커 풀에서 처리해 이벤트 루프를 막지 않는다.
+        with trace.span("offload.postprocess", bytes=len(content)):
+            picked, encoded = await offloader.run(
+                len(content), _postprocess, content, encoding, is_json, shaper,
+                need_data or not offloader.copies_results,
+            )
+    else:
+        response_json, response_text = _decode_body(content, encoding, is_json)
+        picked = response_json if response_json is not None else response_text
+        if shaper is not None and response_json is not None:
+            # 규칙 적용과 직렬화를 한 번에(호출 측은 data_json을 그대로 쓴다)
+            with trace.span("shape"):
+                picked, encoded = shaper.shape(response_json)
+
+    result: Dict[str, Any] = {
         "status_code": resp.status_code,
         "headers": dict(resp.headers),
-        "url": str(resp.request.url) if resp.request else url,
+        "url": str(resp.request.url),
         "data": picked,
     }
-
-
+    if encoded is not None:
+        # data를 직렬화한 JSON 바이트(있으면 호출 측이 다시 직렬화하지 않고 그대로 쓴다)
+        result["data_json"] = encoded
+    return result
@@ -2,15 +2,18 @@ from __future__ import annotations
 
 import asyncio
 import datetime as dt
-from typing import AsyncGenerator, Dict, Any
+import os
+from typing import AsyncGenerator, Dict, Any, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sse_starlette.sse import EventSourceResponse
 from .registry import registry
 from .routes_dev import router as dev_router
 from .routes_mcp import router as mcp_router
+from .routes_mcp_http import router as mcp_http_router
 from .routes_api import router as api_router
 from .routes_mcp_meta import router as mcp_meta_router
 from fastapi import APIRouter
@@ -24,6 +27,24 @@ from .fastmcp_runtime import (
 )
 from .models import ServerConfig, ToolBinding, HttpMethod, ParamMapping
 from .fastmcp_runtime import register_tool_with_fastmcp
+from .admin import require_admin
+from .profiling import profile_event_loop
+from .http_adapter import close_http_client
+from .call_stats import call_stats
+from .sse import BoundedEventSourceResponse, sse_stats
+from .sessions import session_manager
+from .rate_limit import rate_limiters
+from .balancer import balancers
+from .hedging import hedgers
+from .scheduler import scheduler
+from .overload import LoadShedASGI, load_shedder, loop_monitor
+from .offload import offloader
+from .search import tool_index
+from .events import registry_events
+from .audit import audit_log
+from .cassette import cassettes
+from .composite import composite_runner
+from .pagination import paginator
 
 
 @asynccontextmanager
@@ -343,11 +364,29 @@ async def lifespan(app: FastAPI):
         # 실패해도 앱은 계속 부팅되어야 함
         pass
 
+    session_manager.start_sweeper()
+    balancers.start_prober()
+    loop_monitor.start()
+    app.state.ready = True
     yield
 
+    app.state.ready = False
+    await loop_monitor.stop()
+    await balancers.stop_prober()
+    await session_manager.stop_sweeper()
+    await close_http_client()
+    offloader.shutdown()
+    cassettes.close_all()
+    # 큐에 남은 감사 기록을 파일에 쓰고 종료(블로킹 join이므로 스레드에서)
+    await asyncio.to_thread(audit_log.stop)
+
 
 app = FastAPI(title="MCP Hub MVP", version="0.1.0", lifespan=lifespan)
+# 준비 상태: lifespan 시작이 끝나면 ready, 종료 신호를 받으면(serve.py) draining
+app.state.ready = False
+app.state.draining = False
 init_fastmcp_mounts(app)
+app.add_middleware(LoadShedASGI)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -362,8 +401,16 @@ async def healthz() -> Dict[str, Any]:
     return {"ok": True, "ts": dt.datetime.utcnow().isoformat() + "Z"}
 
 
+@app.get("/readyz")
+async def readyz() -> JSONResponse:
+    """워커 준비 상태. 시작 전이거나 종료(드레인) 중이면 503이라 로드밸런서가 새 요청을 보내지 않는다."""
+    ready = bool(app.state.ready) and not app.state.draining
+    body = {"ready": ready, "draining": bool(app.state.draining), "pid": os.getpid()}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
 @app.get("/sse/test")
-async def sse_test() -> EventSourceResponse:
+async def sse_test() -> BoundedEventSourceResponse:
     """SSE 동작 확인용 간단한 스트림 엔드포인트."""
     async def event_generator() -> AsyncGenerator[dict, None]:
         yield {"event": "tool_call.started", "data": "sse-test"}
@@ -372,7 +419,7 @@ async def sse_test() -> EventSourceResponse:
             yield {"event": "output.delta", "data": f"tick {i}"}
         yield {"event": "tool_call.completed", "data": "done"}
 
-    return EventSourceResponse(event_generator())
+    return BoundedEventSourceResponse(event_generator())
 
 
 @app.get("/_internal/registry")
@@ -380,8 +427,132 @@ async def registry_stats() -> dict:
     return registry.stats()
 
 
+@app.get("/_internal/search")
+async def search_stats() -> dict:
+    """툴 검색 역색인의 서버별 툴/색인어 수, 질의·증분 갱신 건수."""
+    return tool_index.stats()
+
+
+@app.get("/_internal/events")
+async def events_stats() -> dict:
+    """레지스트리 변경 스트림의 현재 버전, 구독자 수, 보관 델타 범위, 스냅샷 생성/전송·이어받기·재동기화 건수."""
+    return registry_events.stats()
+
+
+@app.get("/_internal/calls")
+async def calls_stats() -> dict:
+    """툴 호출 결과별 카운터(started/completed/failed/abandoned/inFlight)."""
+    return call_stats.stats()
+
+
+@app.get("/_internal/sse")
+async def sse_stream_stats() -> dict:
+    """열린 SSE 스트림 수, 미전송 바이트, 느린 소비자 축출 수."""
+    return sse_stats.stats()
+
+
+@app.get("/_internal/sessions")
+async def sse_session_stats(detail: bool = False) -> dict:
+    """FastMCP SSE 세션 수(전체/서버별), 나이·유휴 시간, 거절/유휴 정리 건수."""
+    return session_manager.stats(detail=detail)
+
+
+@app.get("/_internal/ratelimits")
+async def rate_limit_stats() -> dict:
+    """업스트림 서버별 토큰 버킷 상태(남은 허용량, 차단 남은 시간, 대기/거절/429 건수)."""
+    return rate_limiters.stats()
+
+
+@app.get("/_internal/balancers")
+async def balancer_stats() -> dict:
+    """endpoints가 설정된 서버별 엔드포인트 지연 EWMA, 진행 중 요청, 건강 상태, 페일오버 수."""
+    return balancers.stats()
+
+
+@app.get("/_internal/hedging")
+async def hedging_stats() -> dict:
+    """헤지 정책이 있는 툴별 요청/헤지 수, 헤지 승리 수, 예산 부족 건수, 지연 분위수와 현재 헤지 지연."""
+    return hedgers.stats()
+
+
+@app.get("/_internal/scheduler")
+async def scheduler_stats() -> dict:
+    """공정 스케줄러의 전체 실행/대기 수, 호출자별 가중치·실행·대기·대기시간, 대기 중인 (호출자, 서버) 흐름."""
+    return scheduler.stats()
+
+
+@app.get("/_internal/loop")
+async def loop_stats() -> dict:
+    """이벤트 루프 지연(현재/EWMA/최대/분위수, 히스토그램)과 과부하 거절 건수·한도."""
+    return {"lag": loop_monitor.stats(), "shedding": load_shedder.stats()}
+
+
+@app.get("/_internal/offload")
+async def offload_stats() -> dict:
+    """응답 후처리(파싱·pick·직렬화) 워커 풀 모드, 임계 크기, 오프로드/인라인 건수, 평균 처리 시간."""
+    return offloader.stats()
+
+
+@app.get("/_internal/cassettes")
+async def cassette_stats() -> dict:
+    """업스트림 녹화/재생 카세트별 모드, 항목 수, 재생 적중/누락, 녹화 건수·바이트."""
+    return cassettes.stats()
+
+
+@app.post("/_internal/cassettes/flush", dependencies=[Depends(require_admin)])
+async def cassette_flush() -> dict:
+    """녹화 중인 카세트의 인덱스(.idx)를 지금 디스크에 쓴다(앱을 내리지 않고 재생용으로 복사할 때)."""
+    await asyncio.to_thread(cassettes.flush)
+    return cassettes.stats()
+
+
+@app.get("/_internal/composite")
+async def composite_stats() -> dict:
+    """컴포지트 툴 실행/실패 수, 진행 중 실행 수, 실행한 단계·업스트림 호출 수, forEach 상한."""
+    return composite_runner.stats()
+
+
+@app.get("/_internal/pagination")
+async def pagination_stats() -> dict:
+    """페이지 순회 툴 호출 수, 가져온 페이지·항목 수, 상한으로 잘린 호출 수, 미리 요청했다 버린 페이지 수."""
+    return paginator.stats()
+
+
+@app.get("/_internal/audit")
+async def audit_stats() -> dict:
+    """감사 로그 큐 길이, 기록/버림(큐 가득 참) 건수, 배치·파일 회전·쓰기 오류 수."""
+    return audit_log.stats()
+
+
+@app.get("/_internal/audit/recent", dependencies=[Depends(require_admin)])
+async def audit_recent(
+    limit: int = 100,
+    server: Optional[str] = None,
+    tool: Optional[str] = None,
+    caller: Optional[str] = None,
+    outcome: Optional[str] = None,
+) -> dict:
+    """최근 툴 호출 감사 기록(민감 인자는 가림 처리됨)을 최신순으로 반환한다. 관리자 전용."""
+    limit = max(1, min(limit, 1000))
+    entries = audit_log.recent(limit, server_id=server, tool_name=tool, caller=caller, outcome=outcome)
+    return {"entries": entries, "count": len(entries)}
+
+
+@app.get("/_internal/profile", dependencies=[Depends(require_admin)])
+async def internal_profile(seconds: float = 10.0, interval_ms: float = 5.0, format: str = "collapsed"):
+    """이벤트 루프 스레드를 seconds 동안 샘플링해 collapsed-stack(flamegraph 입력) 또는 요약 JSON을 반환한다."""
+    try:
+        sampler = await profile_event_loop(seconds, interval=interval_ms / 1000.0)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "json":
+        return sampler.hotspots()
+    return PlainTextResponse(sampler.collapsed())
+
+
 app.include_router(dev_router)
 app.include_router(mcp_router)
+app.include_router(mcp_http_router)
 app.include_router(api_router)
 app.include_router(mcp_meta_router)
 
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Dict, Optional, Any, Mapping
+from typing import Dict, List, Literal, Optional, Any, Mapping
 
-from pydantic import BaseModel, Field
+import json
+import re
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class AuthType(str, Enum):
@@ -25,12 +28,63 @@ class AuthConfig(BaseModel):
     value: Optional[str] = None
 
 
+class RateLimitConfig(BaseModel):
+    """업스트림 송신 속도 제한(토큰 버킷).
+
+    - rate: 초당 허용 요청 수, burst: 한 번에 몰아 보낼 수 있는 최대 요청 수
+    - maxWaitMs: 토큰을 기다리는 최대 시간(넘으면 호출 실패). 없으면 MCP_RATE_LIMIT_MAX_WAIT_MS
+    """
+    rate: float = Field(gt=0)
+    burst: int = Field(default=1, ge=1)
+    maxWaitMs: Optional[int] = Field(default=None, ge=0)
+
+
+class Endpoint(BaseModel):
+    """같은 API를 제공하는 업스트림 복제본 하나. weight가 클수록 더 많이 선택된다."""
+    url: str
+    weight: float = Field(default=1.0, gt=0)
+
+
+class CassetteConfig(BaseModel):
+    """업스트림 녹화/재생(카세트) 설정.
+
+    - mode: record(실제로 호출하고 응답을 카세트에 추가), replay(카세트의 응답으로 대신함), off
+    - name: 카세트 파일 이름(MCP_CASSETTE_DIR 아래, 영숫자와 `.`/`_`/`-`만, `..` 불가). 없으면 서버 ID
+    - latency: replay 때 지연 재현 방식. none, recorded(녹화 당시 지연 × latencyScale), fixed(fixedLatencyMs)
+    - onMiss: replay에서 일치하는 기록이 없을 때 error(호출 실패) 또는 passthrough(실제 업스트림 호출)
+    """
+    mode: Literal["off", "record", "replay"] = "replay"
+    name: Optional[str] = Field(default=None, pattern=r"^[A-Za-z0-9_\-][A-Za-z0-9._\-]*$")
+    latency: Literal["none", "recorded", "fixed"] = "none"
+    latencyScale: float = Field(default=1.0, ge=0)
+    fixedLatencyMs: int = Field(default=0, ge=0)
+    onMiss: Literal["error", "passthrough"] = "error"
+
+    @model_validator(mode="after")
+    def _check_name(self) -> "CassetteConfig":
+        # 파일 이름으로 쓰므로 상위 디렉터리를 가리킬 수 있는 `..`는 허용하지 않는다.
+        if self.name is not None and ".." in self.name:
+            raise ValueError(f"invalid cassette name: {self.name!r}")
+        return self
+
+
 class ServerConfig(BaseModel):
-    """연결 대상 서버 설정."""
+    """연결 대상 서버 설정.
+
+    - endpoints: 지정하면 baseUrl 대신 이 목록 중에서 지연시간 기반으로 골라 호출한다
+    - lbPolicy: ewma(지연 EWMA × 진행 중 요청 수 / weight) 또는 least_latency(지연 EWMA / weight)
+    - healthPath: 헬스 프로버가 각 엔드포인트에 GET 할 경로
+    - cassette: 업스트림 녹화/재생 설정(없으면 전역 MCP_CASSETTE_MODE)
+    """
     name: str
     baseUrl: str
     auth: AuthConfig = Field(default_factory=AuthConfig)
     defaultHeaders: Dict[str, str] = Field(default_factory=dict)
+    rateLimit: Optional[RateLimitConfig] = None
+    endpoints: List[Endpoint] = Field(default_factory=list)
+    lbPolicy: Literal["ewma", "least_latency"] = "ewma"
+    healthPath: str = "/"
+    cassette: Optional[CassetteConfig] = None
     active: bool = True
 
 
@@ -57,8 +111,131 @@ class ParamMapping(BaseModel):
 
 
 class ResponseMapping(BaseModel):
-    """응답 후처리 규칙."""
+    """응답 후처리 규칙. 툴 등록 시 한 번 컴파일해(shaping.py) 파싱된 응답을 한 번 훑으며 적용한다.
+
+    - pick: JSONPath로 필요한 부분만 추출
+    - fields: 남길 필드 경로 목록(`id`, `rating.rate`). 배열이면 원소마다 적용, 없으면 전체
+    - offset / maxItems: 최상위 배열을 [offset:offset+maxItems]로 자름
+    - maxStringLength: 이보다 긴 문자열 값은 잘라 끝에 `…`를 붙임
+    - maxBytes: 최종 JSON 바이트 상한. 넘으면 최상위 배열 원소(객체면 키)를 뒤에서부터 뺀다
+    """
     pick: Optional[str] = None
+    fields: Optional[List[str]] = Field(default=None, max_length=256)
+    offset: int = Field(default=0, ge=0)
+    maxItems: Optional[int] = Field(default=None, ge=0)
+    maxStringLength: Optional[int] = Field(default=None, ge=1)
+    maxBytes: Optional[int] = Field(default=None, ge=2)
+
+    @model_validator(mode="after")
+    def _check_fields(self) -> "ResponseMapping":
+        for path in self.fields or []:
+            if not path or any(not part for part in path.split(".")):
+                raise ValueError(f"invalid field path: {path!r}")
+        return self
+
+
+class HedgePolicy(BaseModel):
+    """GET 툴의 헤지 요청 정책.
+
+    - 첫 요청이 최근 지연의 percentile 값(샘플이 부족하면 initialDelayMs)까지 응답하지 않으면 두 번째 요청을 보낸다
+    - 먼저 성공한 응답을 쓰고 나머지는 취소한다. budgetPct: 헤지로 추가되는 요청 비율 상한(%)
+    """
+    enabled: bool = True
+    percentile: float = Field(default=95.0, gt=0, lt=100)
+    initialDelayMs: int = Field(default=200, ge=0)
+    minDelayMs: int = Field(default=10, ge=0)
+    maxDelayMs: int = Field(default=2000, ge=0)
+    budgetPct: float = Field(default=10.0, ge=0, le=100)
+
+
+class PaginationSpec(BaseModel):
+    """목록형 툴의 자동 페이지 순회 규칙.
+
+    - style: page(페이지 번호) / offset(건너뛸 항목 수) / cursor(응답의 다음 커서)
+    - param: 페이지 번호·offset·커서를 싣는 업스트림 쿼리 이름, sizeParam: 페이지 크기 쿼리 이름(선택)
+    - pageSize: 한 페이지에 요청할 항목 수(상한), startPage: page 방식의 첫 페이지 번호
+    - itemsPath: 응답에서 항목 배열을 가리키는 JSONPath(없으면 응답 전체가 배열), cursorPath: 다음 커서 JSONPath(cursor 방식 필수)
+    - totalPath: 전체 항목 수 JSONPath(선택). 있으면 첫 페이지 후 남은 페이지 수를 알고 한꺼번에 요청한다
+    - stopWhen: short(항목 수가 pageSize보다 적은 페이지에서 멈춤) / empty(빈 페이지에서 멈춤)
+    - maxPages / maxItems: 한 번의 호출에서 가져올 페이지·항목 상한, concurrency: 동시에 요청할 페이지 수(page/offset 방식)
+    """
+    style: Literal["page", "offset", "cursor"] = "page"
+    param: str
+    sizeParam: Optional[str] = None
+    pageSize: int = Field(default=50, ge=1, le=1000)
+    startPage: int = Field(default=1, ge=0)
+    itemsPath: Optional[str] = None
+    cursorPath: Optional[str] = None
+    totalPath: Optional[str] = None
+    stopWhen: Literal["short", "empty"] = "short"
+    maxPages: int = Field(default=20, ge=1, le=1000)
+    maxItems: int = Field(default=1000, ge=1)
+    concurrency: int = Field(default=4, ge=1, le=32)
+
+    @model_validator(mode="after")
+    def _check_cursor(self) -> "PaginationSpec":
+        if self.style == "cursor" and not self.cursorPath:
+            raise ValueError("cursorPath is required for cursor pagination")
+        return self
+
+
+# 컴포지트 인자 템플릿의 단계 결과 참조: ${steps.<id>...}
+_STEP_REF = re.compile(r"\$\{\s*steps\.([A-Za-z0-9_\-]+)")
+
+
+class CompositeStep(BaseModel):
+    """컴포지트 툴의 한 단계: 이미 등록된 HTTP 툴 바인딩 하나를 호출한다.
+
+    - id: 단계 이름(다른 단계·output에서 `${steps.<id>}`로 참조), tool: 호출할 툴, server: 다른 서버의 툴이면 서버 ID
+    - args: 인자 템플릿. 값 전체가 `${input.x}` / `${steps.a.items[0].id}` / `${item}` 같은 참조면 그 값(타입 유지),
+      문자열 안에 섞여 있으면 문자열로 치환한다
+    - forEach: 배열을 가리키는 참조. 원소마다 한 번씩(동시에) 호출하고(`${item}`, `${index}`) 결과는 리스트가 된다
+    - dependsOn: 참조 없이도 먼저 끝나야 하는 단계(참조한 단계는 자동으로 선행 단계가 된다)
+    """
+    id: str = Field(pattern=r"^[A-Za-z0-9_\-]+$")
+    tool: str
+    server: Optional[str] = None
+    args: Dict[str, Any] = Field(default_factory=dict)
+    forEach: Optional[str] = None
+    dependsOn: List[str] = Field(default_factory=list)
+
+    def dependencies(self) -> List[str]:
+        refs = _STEP_REF.findall(json.dumps([self.args, self.forEach]))
+        return list(dict.fromkeys([*self.dependsOn, *refs]))
+
+
+class CompositeSpec(BaseModel):
+    """여러 툴 바인딩을 서버 안에서 DAG로 실행하는 컴포지트 툴 정의.
+
+    - 선행 단계가 끝난 단계부터 동시에 실행한다(최대 maxConcurrency개의 업스트림 호출)
+    - output: 최종 결과 템플릿(args와 같은 참조 문법). 없으면 {단계 id: 결과}
+    """
+    steps: List[CompositeStep] = Field(min_length=1, max_length=32)
+    output: Optional[Any] = None
+    maxConcurrency: int = Field(default=8, ge=1, le=64)
+
+    @model_validator(mode="after")
+    def _check_dag(self) -> "CompositeSpec":
+        ids = [step.id for step in self.steps]
+        if len(set(ids)) != len(ids):
+            raise ValueError("composite step ids must be unique")
+        deps = {step.id: step.dependencies() for step in self.steps}
+        for step_id, needs in deps.items():
+            unknown = [d for d in needs if d not in deps]
+            if unknown:
+                raise ValueError(f"step {step_id!r} references unknown steps: {unknown}")
+        # 위상 정렬로 순환 검사
+        remaining = dict(deps)
+        while remaining:
+            ready = [sid for sid, needs in remaining.items() if not any(d in remaining for d in needs)]
+            if not ready:
+                raise ValueError(f"composite steps form a cycle: {sorted(remaining)}")
+            for sid in ready:
+                del remaining[sid]
+        unknown_output = [d for d in _STEP_REF.findall(json.dumps(self.output)) if d not in deps]
+        if unknown_output:
+            raise ValueError(f"output references unknown steps: {unknown_output}")
+        return self
 
 
 class ToolBinding(BaseModel):
@@ -67,15 +244,27 @@ class ToolBinding(BaseModel):
     - pathTemplate: /products/{id} 형태의 경로 템플릿
     - inputSchema: JSON Schema로 인자 검증에 사용
     - responseMapping: 응답에서 필요한 부분만 추출할 수 있음
+    - hedge: GET 툴의 꼬리 지연을 줄이기 위한 헤지 요청 정책(선택)
+    - pagination: 목록형 GET 툴의 페이지를 자동으로(가능하면 동시에) 가져와 페이지마다 스트리밍하는 규칙(선택)
+    - composite: 지정하면 HTTP 호출 대신 다른 툴들을 DAG로 실행하는 컴포지트 툴(method/pathTemplate 불필요)
     - active: 사용 여부 플래그
     """
     name: str
     description: Optional[str] = None
-    method: HttpMethod
-    pathTemplate: str
+    method: Optional[HttpMethod] = None
+    pathTemplate: Optional[str] = None
     paramMapping: ParamMapping = Field(default_factory=ParamMapping)
     inputSchema: Mapping[str, Any]
     responseMapping: Optional[ResponseMapping] = None
+    hedge: Optional[HedgePolicy] = None
+    pagination: Optional[PaginationSpec] = None
+    composite: Optional[CompositeSpec] = None
     active: bool = True
 
+    @model_validator(mode="after")
+    def _check_kind(self) -> "ToolBinding":
+        if self.composite is None and (self.method is None or self.pathTemplate is None):
+            raise ValueError("method and pathTemplate are required unless composite is set")
+        return self
+
 
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+# 업스트림 응답 본문이 이 바이트 수 이상이면 파싱·pick·직렬화를 워커 풀에서 실행한다(0이면 항상 인라인).
+OFFLOAD_MIN_BYTES = int(os.getenv("MCP_OFFLOAD_MIN_BYTES", str(256 * 1024)))
+# process: 다른 코어에서 병렬 실행한다(본문과 결과를 프로세스 간에 복사). 코어가 여럿일 때 기본값.
+# thread: 복사는 없지만 json 파싱/직렬화(C 구현)는 GIL을 쥔 채 실행되므로 주로 pick(파이썬 코드)에서 효과가 있다.
+OFFLOAD_MODE = os.getenv("MCP_OFFLOAD_MODE", "process" if (os.cpu_count() or 1) > 1 else "thread")
+OFFLOAD_WORKERS = int(os.getenv("MCP_OFFLOAD_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+R = TypeVar("R")
+
+
+class Offloader:
+    """CPU 작업을 스레드/프로세스 풀로 넘기는 실행기. 풀은 처음 쓸 때 만든다.
+
+    프로세스 워커가 죽어(OOM 등) 풀이 깨지면 그 풀을 버리고 새로 만들어 한 번 다시 실행한다.
+    """
+
+    def __init__(self, min_bytes: int = OFFLOAD_MIN_BYTES, mode: str = OFFLOAD_MODE, workers: int = OFFLOAD_WORKERS) -> None:
+        self.min_bytes = min_bytes
+        self.mode = mode if mode in ("thread", "process") else "thread"
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self.offloaded = 0
+        self.inline = 0
+        self.offloaded_bytes = 0
+        self.running = 0
+        self.busy_s = 0.0
+        self.pool_restarts = 0
+
+    @property
+    def copies_results(self) -> bool:
+        """결과 객체를 프로세스 간에 복사해야 하는지(필요 없으면 직렬화 바이트만 돌려받는 편이 싸다)."""
+        return self.mode == "process"
+
+    def should_offload(self, size: int) -> bool:
+        if self.min_bytes > 0 and size >= self.min_bytes:
+            return True
+        self.inline += 1
+        return False
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                # 스레드가 떠 있는 프로세스에서 fork하지 않도록 spawn으로 워커를 띄운다.
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mcp-offload")
+        return self._executor
+
+    async def run(self, size: int, fn: Callable[..., R], *args: Any) -> R:
+        """fn(*args)를 풀에서 실행하고 결과를 돌려준다. size는 통계용 입력 바이트 수."""
+        loop = asyncio.get_running_loop()
+        self.offloaded += 1
+        self.offloaded_bytes += size
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                self._reset_broken(executor)
+            # 새 풀에서 한 번만 다시 시도한다(같은 입력이 또 워커를 죽이면 그대로 실패).
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                self._reset_broken(executor)
+                raise
+        finally:
+            self.running -= 1
+            self.busy_s += time.perf_counter() - started
+
+    def _reset_broken(self, executor: Executor) -> None:
+        # 동시에 실패한 다른 호출이 이미 새 풀을 만들었으면 그대로 쓴다.
+        if self._executor is not executor:
+            return
+        self._executor = None
+        self.pool_restarts += 1
+        logger.warning("offload process pool is broken (worker died); recreating it (restart #%d)", self.pool_restarts)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "minBytes": self.min_bytes,
+            "offloaded": self.offloaded,
+            "inline": self.inline,
+            "offloadedBytes": self.offloaded_bytes,
+            "running": self.running,
+            "poolRestarts": self.pool_restarts,
+            "avgOffloadMs": round(self.busy_s * 1000.0 / self.offloaded, 2) if self.offloaded else 0.0,
+        }
+
+
+offloader = Offloader()
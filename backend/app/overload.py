@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .call_stats import call_stats
+
+
+logger = logging.getLogger(__name__)
+
+# 이벤트 루프 지연 측정 주기
+LAG_INTERVAL_S = float(os.getenv("MCP_LOOP_LAG_INTERVAL_MS", "100")) / 1000.0
+# 지연 EWMA 가중치(클수록 최근 측정을 더 반영)
+LAG_EWMA_ALPHA = float(os.getenv("MCP_LOOP_LAG_EWMA_ALPHA", "0.3"))
+# 루프 지연(EWMA 또는 현재 밀린 시간)이 이 값을 넘으면 새 /mcp 요청을 503으로 거절한다(0이면 비활성).
+SHED_MAX_LAG_MS = float(os.getenv("MCP_SHED_MAX_LAG_MS", "200"))
+# 실행 중인 툴 호출 수가 이 값 이상이면 새 /mcp 요청을 거절한다(0이면 비활성).
+SHED_MAX_IN_FLIGHT = int(os.getenv("MCP_SHED_MAX_IN_FLIGHT", "512"))
+# 거절 대상 경로 접두사(쉼표 구분, 경로 세그먼트 단위로 비교). 헬스체크·관리 API·/_internal은 대상이 아니다.
+SHED_PATH_PREFIXES = tuple(
+    p.strip().rstrip("/") for p in os.getenv("MCP_SHED_PATH_PREFIXES", "/mcp,/mcp-http,/mcp-sdk").split(",")
+    if p.strip().rstrip("/")
+)
+SHED_RETRY_AFTER_S = int(os.getenv("MCP_SHED_RETRY_AFTER_S", "1"))
+
+# 지연 히스토그램 버킷 상한(ms). 마지막은 +Inf.
+_LAG_BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LoopLagMonitor:
+    """주기적으로 잠들었다 깨어나며 예정보다 늦게 깨어난 시간(=루프 지연)을 측정한다.
+
+    - 측정값은 EWMA, 최대값, 버킷 히스토그램으로 집계한다.
+    - 루프가 지금 막혀 있으면 모니터도 깨어나지 못하므로, current_lag_ms()는 예정 시각을 넘긴 만큼도 반영한다.
+    """
+
+    def __init__(self, interval: float = LAG_INTERVAL_S) -> None:
+        self.interval = interval
+        self.ewma_ms = 0.0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = 0
+        self.buckets: List[int] = [0] * (len(_LAG_BUCKETS_MS) + 1)
+        self._expected_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, lag_ms: float) -> None:
+        self.samples += 1
+        self.last_ms = lag_ms
+        self.ewma_ms += LAG_EWMA_ALPHA * (lag_ms - self.ewma_ms)
+        if lag_ms > self.max_ms:
+            self.max_ms = lag_ms
+        self.buckets[bisect.bisect_left(_LAG_BUCKETS_MS, lag_ms)] += 1
+
+    def current_lag_ms(self) -> float:
+        overdue = 0.0
+        if self._expected_at is not None:
+            overdue = max(0.0, (time.perf_counter() - self._expected_at) * 1000.0)
+        return max(self.ewma_ms, overdue)
+
+    async def run(self) -> None:
+        while True:
+            self._expected_at = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (time.perf_counter() - self._expected_at) * 1000.0))
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._expected_at = None
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """히스토그램에서 분위수가 속한 버킷의 상한(ms)을 돌려준다."""
+        if not self.samples:
+            return None
+        target = q * self.samples
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return _LAG_BUCKETS_MS[index] if index < len(_LAG_BUCKETS_MS) else round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def stats(self) -> Dict[str, Any]:
+        histogram = {f"le_{int(bound)}ms": count for bound, count in zip(_LAG_BUCKETS_MS, self.buckets)}
+        histogram["inf"] = self.buckets[-1]
+        return {
+            "intervalMs": round(self.interval * 1000.0, 1),
+            "samples": self.samples,
+            "currentMs": round(self.current_lag_ms(), 2),
+            "lastMs": round(self.last_ms, 2),
+            "ewmaMs": round(self.ewma_ms, 2),
+            "maxMs": round(self.max_ms, 2),
+            "p50Ms": self._quantile(0.5),
+            "p99Ms": self._quantile(0.99),
+            "histogram": histogram,
+        }
+
+
+loop_monitor = LoopLagMonitor()
+
+
+class LoadShedder:
+    """루프 지연·실행 중 호출 수를 보고 새 요청을 받을지 정한다."""
+
+    def __init__(
+        self,
+        monitor: LoopLagMonitor,
+        max_lag_ms: float = SHED_MAX_LAG_MS,
+        max_in_flight: int = SHED_MAX_IN_FLIGHT,
+    ) -> None:
+        self.monitor = monitor
+        self.max_lag_ms = max_lag_ms
+        self.max_in_flight = max_in_flight
+        self.admitted = 0
+        self.shed_lag = 0
+        self.shed_in_flight = 0
+        self._shedding_since: Optional[float] = None
+
+    def check(self) -> Optional[str]:
+        """거절해야 하면 이유("loop_lag"/"in_flight"), 아니면 None."""
+        reason: Optional[str] = None
+        if self.max_lag_ms > 0 and self.monitor.current_lag_ms() > self.max_lag_ms:
+            reason = "loop_lag"
+            self.shed_lag += 1
+        elif self.max_in_flight > 0 and call_stats.in_flight >= self.max_in_flight:
+            reason = "in_flight"
+            self.shed_in_flight += 1
+        else:
+            self.admitted += 1
+        if reason is not None and self._shedding_since is None:
+            self._shedding_since = time.monotonic()
+            logger.warning(
+                "overload.shedding.start reason=%s lag_ms=%.1f in_flight=%d",
+                reason, self.monitor.current_lag_ms(), call_stats.in_flight,
+            )
+        elif reason is None and self._shedding_since is not None:
+            logger.info("overload.shedding.stop after_s=%.1f", time.monotonic() - self._shedding_since)
+            self._shedding_since = None
+        return reason
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shedding": self._shedding_since is not None,
+            "admitted": self.admitted,
+            "shedLoopLag": self.shed_lag,
+            "shedInFlight": self.shed_in_flight,
+            "limits": {
+                "maxLagMs": self.max_lag_ms,
+                "maxInFlight": self.max_in_flight,
+                "pathPrefixes": list(SHED_PATH_PREFIXES),
+            },
+        }
+
+
+load_shedder = LoadShedder(loop_monitor)
+
+
+def is_shed_path(path: str, prefixes: Tuple[str, ...] = SHED_PATH_PREFIXES) -> bool:
+    """path가 접두사 자체이거나 그 하위 경로인지 본다(`/mcp`는 `/mcp/x`와 맞지만 `/mcp-servers`와는 맞지 않음)."""
+    for prefix in prefixes:
+        if path.startswith(prefix) and (len(path) == len(prefix) or path[len(prefix)] == "/"):
+            return True
+    return False
+
+
+class LoadShedASGI:
+    """SHED_PATH_PREFIXES 아래의 새 HTTP 요청을 과부하 시 즉시 503 + Retry-After로 거절하는 미들웨어.
+
+    이미 열린 스트림은 건드리지 않으며, 대상 경로가 아닌 요청(헬스체크, /api, /_internal)은 항상 통과한다.
+    """
+
+    def __init__(self, app: Any, shedder: Optional[LoadShedder] = None) -> None:
+        self.app = app
+        self.shedder = shedder or load_shedder
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> Any:
+        if scope["type"] == "http" and scope.get("method") != "OPTIONS" and is_shed_path(scope["path"]):
+            reason = self.shedder.check()
+            if reason is not None:
+                return await self._reject(send, reason)
+        return await self.app(scope, receive, send)
+
+    async def _reject(self, send: Any, reason: str) -> None:
+        body = json.dumps({"detail": "overloaded", "reason": reason}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(SHED_RETRY_AFTER_S).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
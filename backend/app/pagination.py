@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .models import PaginationSpec
+from .shaping import compile_path
+
+
+# 툴별 maxItems와 무관한 전역 상한(한 번의 호출로 가져올 최대 항목 수)
+PAGINATION_MAX_ITEMS = int(os.getenv("MCP_PAGINATION_MAX_ITEMS", "10000"))
+
+# 페이지 쿼리(업스트림 쿼리 이름 → 값)를 받아 한 페이지를 가져오는 함수(call_via_binding 결과 dict를 돌려줌)
+PageFetch = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+# 가져온 페이지의 항목 리스트를 받는 콜백(SSE에서는 페이지마다 output.delta 한 건). 소비자가 느리면 대기시킨다.
+PageSink = Callable[[List[Any]], Awaitable[None]]
+
+
+def _find(document: Any, path: str) -> Tuple[bool, Any]:
+    """JSONPath로 값을 찾는다. (찾았는지, 값) — 매치가 여러 개면 리스트."""
+    matches = [m.value for m in compile_path(path).find(document)]
+    if not matches:
+        return False, None
+    return True, matches[0] if len(matches) == 1 else matches
+
+
+def _items(document: Any, spec: PaginationSpec) -> List[Any]:
+    if spec.itemsPath is None:
+        found, value = True, document
+    else:
+        found, value = _find(document, spec.itemsPath)
+    if not found or value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class Paginator:
+    """목록형 툴의 페이지를 순서대로 모아 내보낸다.
+
+    - page/offset 방식: 다음 페이지들을 concurrency개까지 미리 요청해 두고(전체 수를 알면 마지막 페이지까지만),
+      도착 순서와 무관하게 페이지 순서대로 내보낸다. 멈춤 조건을 만난 뒤의 미리 요청한 페이지는 취소·폐기한다.
+    - cursor 방식: 응답에서 다음 커서를 읽자마자 다음 페이지를 요청하고 그동안 현재 페이지를 처리한다(파이프라인).
+    - 항목 수가 상한(maxItems, MCP_PAGINATION_MAX_ITEMS)을 넘으면 잘라 내고 truncated로 표시한다.
+    """
+
+    def __init__(self, max_items: int = PAGINATION_MAX_ITEMS) -> None:
+        self.max_items = max_items
+        self.calls = 0
+        self.pages = 0
+        self.items = 0
+        self.truncated = 0
+        self.discarded = 0
+        self.errors = 0
+
+    def _page_query(self, spec: PaginationSpec, index: int, cursor: Any = None) -> Dict[str, Any]:
+        query: Dict[str, Any] = {}
+        if spec.sizeParam:
+            query[spec.sizeParam] = spec.pageSize
+        if spec.style == "page":
+            query[spec.param] = spec.startPage + index
+        elif spec.style == "offset":
+            query[spec.param] = index * spec.pageSize
+        elif cursor is not None:
+            query[spec.param] = cursor
+        return query
+
+    def _is_last(self, spec: PaginationSpec, items: List[Any]) -> bool:
+        return not items if spec.stopWhen == "empty" else len(items) < spec.pageSize
+
+    async def run(
+        self,
+        spec: PaginationSpec,
+        fetch: PageFetch,
+        transform: Optional[Callable[[List[Any]], Any]] = None,
+        on_page: Optional[PageSink] = None,
+        collect: bool = True,
+    ) -> Dict[str, Any]:
+        """페이지를 가져와 on_page로 내보내고(collect면 모아서) call_via_binding과 같은 모양의 결과를 돌려준다.
+
+        - transform: 페이지 항목 리스트에 적용할 후처리(컴파일된 responseMapping의 records)
+        - 결과 data는 모은 항목 리스트(collect=False면 None), `pagination`에 {pages, items, truncated}
+        - 어떤 페이지가 400 이상이면 거기서 멈추고 그 페이지의 결과(상태 코드·본문)를 돌려준다
+        """
+        self.calls += 1
+        limit = min(spec.maxItems, self.max_items)
+        last_index = spec.maxPages - 1
+        tasks: Dict[int, asyncio.Future] = {}
+        collected: List[Any] = []
+        pages = count = 0
+        truncated = False
+        first: Optional[Dict[str, Any]] = None
+
+        def schedule(index: int, cursor: Any = None) -> None:
+            tasks[index] = asyncio.ensure_future(fetch(self._page_query(spec, index, cursor)))
+
+        schedule(0)
+        index = 0
+        try:
+            while index in tasks:
+                result = await tasks.pop(index)
+                status_code = result.get("status_code", 200)
+                if status_code >= 400:
+                    self.errors += 1
+                    result["pagination"] = {"pages": pages, "items": count, "truncated": True}
+                    return result
+                if first is None:
+                    first = result
+                data = result.get("data")
+                items = _items(data, spec)
+                is_last = self._is_last(spec, items)
+
+                # 현재 페이지를 처리하기 전에 다음 페이지 요청부터 보낸다.
+                if spec.style == "cursor":
+                    found, cursor = _find(data, spec.cursorPath or "")
+                    if not found or cursor in (None, ""):
+                        is_last = True
+                    elif not is_last and index < last_index:
+                        schedule(index + 1, cursor)
+                elif not is_last:
+                    if index == 0 and spec.totalPath:
+                        found, total = _find(data, spec.totalPath)
+                        if found and isinstance(total, (int, float)) and not isinstance(total, bool):
+                            last_index = min(last_index, max(0, math.ceil(total / spec.pageSize) - 1))
+                            is_last = index >= last_index
+                    next_index = max(tasks, default=index) + 1
+                    while not is_last and len(tasks) < spec.concurrency and next_index <= last_index:
+                        schedule(next_index)
+                        next_index += 1
+
+                if transform is not None:
+                    shaped = transform(items)
+                    items = shaped if isinstance(shaped, list) else [shaped]
+                room = limit - count
+                if len(items) > room:
+                    items = items[:room]
+                    truncated = True
+                pages += 1
+                count += len(items)
+                if on_page is not None:
+                    await on_page(items)
+                if collect:
+                    collected.extend(items)
+                if truncated or is_last:
+                    break
+                if count >= limit:
+                    # 상한을 딱 채웠으면 다음 페이지를 가져오지 않는다(더 있을 수 있으므로 truncated).
+                    truncated = True
+                    break
+                if index >= last_index:
+                    # 상한(maxPages)에 닿았는데 마지막 페이지가 아니었음
+                    truncated = True
+                    break
+                index += 1
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            self.discarded += len(tasks)
+            if tasks:
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+            self.pages += pages
+            self.items += count
+            if truncated:
+                self.truncated += 1
+
+        result = dict(first or {})
+        result["status_code"] = (first or {}).get("status_code", 200)
+        result["data"] = collected if collect else None
+        result.pop("data_json", None)
+        result["pagination"] = {"pages": pages, "items": count, "truncated": truncated}
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "pages": self.pages,
+            "items": self.items,
+            "truncated": self.truncated,
+            "discardedPages": self.discarded,
+            "errors": self.errors,
+            "maxItems": self.max_items,
+        }
+
+
+paginator = Paginator()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# call_tool 단위 프로파일을 요청하는 헤더(관리자 토큰이 함께 있어야 동작)
+PROFILE_HEADER = "X-MCP-Profile"
+
+DEFAULT_INTERVAL_S = 0.005
+MAX_PROFILE_SECONDS = 60.0
+_MAX_DEPTH = 128
+
+Stack = Tuple[str, ...]
+
+# 동시에 하나의 전역(/_internal/profile) 프로파일만 허용
+_global_profile_lock = asyncio.Lock()
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # site-packages 이후 / 패키지 루트 이후 경로만 남겨 라벨을 짧게 유지
+    site_idx = filename.rfind("site-packages" + os.sep)
+    if site_idx >= 0:
+        filename = filename[site_idx + len("site-packages" + os.sep):]
+    else:
+        pkg_idx = filename.rfind(os.sep + "backend" + os.sep)
+        if pkg_idx >= 0:
+            filename = filename[pkg_idx + 1:]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """다른 스레드(보통 이벤트 루프 스레드)의 스택을 주기적으로 샘플링한다.
+
+    - 별도 데몬 스레드에서 `sys._current_frames()`를 읽으므로 대상 코드에 계측이 필요 없다.
+    - focus_frame을 지정하면 그 프레임(또는 add_focus로 추가한 프레임)이 스택에 있을 때의
+      샘플만 집계한다(특정 코루틴/제너레이터가 실제로 CPU를 쓰는 구간만 보기 위함).
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL_S, focus_frame: Optional[FrameType] = None) -> None:
+        self.thread_id = thread_id
+        self.interval = max(0.001, interval)
+        self.focus_frames: List[FrameType] = [focus_frame] if focus_frame is not None else []
+        self.stacks: Counter[Stack] = Counter()
+        self.total_samples = 0
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self.duration_s = 0.0
+
+    def start(self) -> "StackSampler":
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="mcp-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.duration_s = time.perf_counter() - self._started_at
+        return self
+
+    def add_focus(self, frame: Optional[FrameType]) -> None:
+        if frame is not None:
+            self.focus_frames.append(frame)
+
+    def _label(self, frame: FrameType) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(frame)
+        return label
+
+    def _run(self) -> None:
+        focus = self.focus_frames
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.total_samples += 1
+            labels: List[str] = []
+            matched = not focus
+            depth = 0
+            while frame is not None and depth < _MAX_DEPTH:
+                if not matched and any(frame is f for f in focus):
+                    matched = True
+                labels.append(self._label(frame))
+                frame = frame.f_back
+                depth += 1
+            if matched:
+                labels.reverse()
+                self.stacks[tuple(labels)] += 1
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope 호환 collapsed-stack 텍스트(`a;b;c 12`)."""
+        lines = [";".join(stack) + f" {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def hotspots(self, top: int = 15) -> Dict[str, Any]:
+        """self(리프) / total(포함) 샘플 기준 상위 프레임 요약."""
+        self_counts: Counter[str] = Counter()
+        total_counts: Counter[str] = Counter()
+        samples = 0
+        for stack, count in self.stacks.items():
+            samples += count
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                total_counts[label] += count
+        interval_ms = self.interval * 1000.0
+
+        def rows(counter: Counter[str]) -> List[Dict[str, Any]]:
+            return [
+                {
+                    "frame": label,
+                    "samples": n,
+                    "pct": round(n * 100.0 / samples, 1) if samples else 0.0,
+                    "approx_ms": round(n * interval_ms, 1),
+                }
+                for label, n in counter.most_common(top)
+            ]
+
+        return {
+            "samples": samples,
+            "total_samples": self.total_samples,
+            "interval_ms": interval_ms,
+            "duration_ms": round(self.duration_s * 1000.0, 1),
+            "self": rows(self_counts),
+            "total": rows(total_counts),
+        }
+
+
+def start_request_profile(focus_frame: FrameType, interval: float = DEFAULT_INTERVAL_S) -> StackSampler:
+    """현재(이벤트 루프) 스레드에서 focus_frame이 실행 중인 구간만 샘플링한다."""
+    return StackSampler(threading.get_ident(), interval=interval, focus_frame=focus_frame).start()
+
+
+async def profile_event_loop(seconds: float, interval: float = DEFAULT_INTERVAL_S) -> StackSampler:
+    """이벤트 루프 스레드 전체를 seconds 동안 샘플링한다(동시 1개 제한)."""
+    if _global_profile_lock.locked():
+        raise RuntimeError("profile already running")
+    async with _global_profile_lock:
+        sampler = StackSampler(threading.get_ident(), interval=interval).start()
+        try:
+            await asyncio.sleep(max(0.01, min(seconds, MAX_PROFILE_SECONDS)))
+        finally:
+            sampler.stop()
+        return sampler
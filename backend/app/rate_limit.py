@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import os
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from .models import RateLimitConfig
+
+
+# rateLimit.maxWaitMs가 없을 때 토큰을 기다리는 최대 시간
+DEFAULT_MAX_WAIT_MS = int(os.getenv("MCP_RATE_LIMIT_MAX_WAIT_MS", "2000"))
+# Retry-After/X-RateLimit-Reset로 받은 대기 시간의 상한(잘못된 헤더로 서버가 오래 막히지 않도록)
+MAX_PENALTY_S = float(os.getenv("MCP_RATE_LIMIT_MAX_PENALTY_S", "300"))
+
+
+class RateLimited(Exception):
+    """허용 대기 시간 안에 업스트림 호출 토큰을 얻지 못함."""
+
+    def __init__(self, key: str, retry_after: float) -> None:
+        super().__init__(f"rate limited: {key} (retry after {retry_after:.2f}s)")
+        self.key = key
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: str, now_wall: float) -> Optional[float]:
+    """Retry-After(초 또는 HTTP-date)를 남은 초로 변환한다."""
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - now_wall)
+
+
+def _parse_reset(value: str, now_wall: float) -> Optional[float]:
+    """X-RateLimit-Reset(남은 초 또는 epoch 초)를 남은 초로 변환한다."""
+    try:
+        reset = float(value.strip())
+    except ValueError:
+        return None
+    if reset > 1e9:  # epoch 초
+        reset -= now_wall
+    return max(0.0, reset)
+
+
+class TokenBucket:
+    """업스트림 서버 하나의 토큰 버킷.
+
+    - 예약 방식: 토큰을 먼저 빼고(음수 허용) 부족분만큼 기다리므로 대기자는 도착 순서대로 깨어난다.
+    - rate가 None이면 속도 제한 없이 업스트림이 알려준 차단 구간(Retry-After 등)만 지킨다.
+    """
+
+    __slots__ = (
+        "key", "rate", "burst", "max_wait", "tokens", "updated", "blocked_until",
+        "waiting", "acquired", "delayed", "rejected", "throttled", "wait_total", "upstream_remaining",
+    )
+
+    def __init__(self, key: str, config: Optional[RateLimitConfig]) -> None:
+        self.key = key
+        self.rate: Optional[float] = None
+        self.burst = 1.0
+        self.max_wait = DEFAULT_MAX_WAIT_MS / 1000.0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.upstream_remaining: Optional[int] = None
+        self.configure(config)
+        self.tokens = self.burst
+
+    def configure(self, config: Optional[RateLimitConfig]) -> None:
+        rate = config.rate if config is not None and config.rate > 0 else None
+        burst = float(max(1, config.burst)) if config is not None else 1.0
+        max_wait = (config.maxWaitMs if config is not None and config.maxWaitMs is not None else DEFAULT_MAX_WAIT_MS) / 1000.0
+        if (rate, burst, max_wait) != (self.rate, self.burst, self.max_wait):
+            self._refill(time.monotonic())
+            self.rate, self.burst, self.max_wait = rate, burst, max_wait
+            self.tokens = min(self.tokens, self.burst)
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _reserve(self, now: float) -> float:
+        """토큰 하나를 예약하고 기다려야 할 시간을 돌려준다."""
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.rate is not None:
+            self.tokens -= 1.0
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+        return wait
+
+    async def acquire(self) -> float:
+        """토큰을 얻을 때까지 (max_wait 이내로) 기다린다. 기다린 초를 반환."""
+        now = time.monotonic()
+        wait = self._reserve(now)
+        if wait <= 0:
+            self.acquired += 1
+            return 0.0
+        if wait > self.max_wait:
+            if self.rate is not None:
+                self.tokens += 1.0  # 예약 취소
+            self.rejected += 1
+            raise RateLimited(self.key, wait)
+        self.waiting += 1
+        self.delayed += 1
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            if self.rate is not None:
+                self.tokens += 1.0
+            raise
+        finally:
+            self.waiting -= 1
+        self.acquired += 1
+        self.wait_total += wait
+        return wait
+
+    def try_acquire(self) -> bool:
+        """기다리지 않고 토큰을 얻을 수 있을 때만 얻는다(헤지 등 선택적 추가 요청용)."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return False
+        if self.rate is not None:
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+        self.acquired += 1
+        return True
+
+    def retry_delay(self) -> Optional[float]:
+        """업스트림이 차단을 알린 뒤 max_wait 안에 다시 시도할 수 있으면 남은 초, 아니면 None."""
+        remaining = self.blocked_until - time.monotonic()
+        if remaining > self.max_wait:
+            return None
+        return max(0.0, remaining)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """업스트림 응답의 429/503 + Retry-After, X-RateLimit-* 헤더를 버킷에 반영한다."""
+        now = time.monotonic()
+        now_wall = time.time()
+        penalty: Optional[float] = None
+
+        retry_after = headers.get("retry-after")
+        if status_code in (429, 503) and retry_after:
+            penalty = _parse_retry_after(retry_after, now_wall)
+        if status_code == 429:
+            self.throttled += 1
+
+        remaining_raw = headers.get("x-ratelimit-remaining")
+        if remaining_raw is not None:
+            try:
+                remaining = int(float(remaining_raw))
+            except ValueError:
+                remaining = None
+            if remaining is not None:
+                self.upstream_remaining = remaining
+                self._refill(now)
+                if self.rate is not None:
+                    # 업스트림이 남았다고 한 것보다 많이 보내지 않는다.
+                    self.tokens = min(self.tokens, float(remaining))
+                if remaining <= 0 and penalty is None:
+                    reset_raw = headers.get("x-ratelimit-reset")
+                    if reset_raw is not None:
+                        penalty = _parse_reset(reset_raw, now_wall)
+
+        if status_code == 429 and penalty is None:
+            # 힌트 없는 429: 한 토큰 주기(없으면 1초) 동안 쉰다.
+            penalty = 1.0 / self.rate if self.rate else 1.0
+        if penalty is not None:
+            self.blocked_until = max(self.blocked_until, now + min(penalty, MAX_PENALTY_S))
+            if self.rate is not None:
+                self._refill(now)
+                self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        tokens = self.tokens
+        if self.rate is not None:
+            tokens = min(self.burst, tokens + (now - self.updated) * self.rate)
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "maxWaitMs": round(self.max_wait * 1000.0),
+            "allowance": round(tokens, 3) if self.rate is not None else None,
+            "blockedForS": round(max(0.0, self.blocked_until - now), 3),
+            "upstreamRemaining": self.upstream_remaining,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+            "throttled429": self.throttled,
+            "avgWaitMs": round(self.wait_total * 1000.0 / self.delayed, 1) if self.delayed else 0.0,
+        }
+
+
+class RateLimiterRegistry:
+    """서버 키별 TokenBucket 보관소. 설정이 바뀌면 기존 버킷을 재구성한다."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, key: str, config: Optional[RateLimitConfig]) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(key, config)
+        else:
+            bucket.configure(config)
+        return bucket
+
+    def forget(self, key: str) -> None:
+        self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {key: bucket.stats() for key, bucket in sorted(self._buckets.items())}
+
+
+rate_limiters = RateLimiterRegistry()
+
+
+def is_idempotent(method: str) -> bool:
+    return method in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
@@ -1,49 +1,94 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import logging
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional
 
+from .bindings import BindingInterner, ToolRecord
 from .models import ServerConfig, ToolBinding
 
 
+logger = logging.getLogger(__name__)
+
+# 변경 리스너: (event, server_id, tool_name, record). event는 server.upsert/server.delete/tool.upsert/tool.delete
+RegistryListener = Callable[[str, str, Optional[str], Optional[ToolRecord]], None]
+
+
 class InMemoryRegistry:
     """서버/툴 바인딩 정보를 메모리에 저장하는 간단한 레지스트리.
 
     - 프로세스 메모리에만 존재하므로 앱 재시작 시 초기화됨
     - CRUD 및 간단 통계(stat) 제공
+    - 툴은 불변 ToolRecord로 보관한다(스키마·매핑 공유). pydantic 모델은 API 응답 시 to_model()로 만든다.
     """
-    def __init__(self) -> None:
+    def __init__(self, interner: Optional[BindingInterner] = None) -> None:
         self._servers: Dict[str, ServerConfig] = {}
-        self._tools_by_server: Dict[str, Dict[str, ToolBinding]] = {}
+        self._tools_by_server: Dict[str, Dict[str, ToolRecord]] = {}
+        self._interner = interner or BindingInterner()
+        self._listeners: List[RegistryListener] = []
+
+    # Change listeners
+    def add_listener(self, listener: RegistryListener) -> None:
+        """변경 직후 동기적으로 호출될 리스너를 등록한다(검색 인덱스 등 파생 상태의 증분 갱신용)."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: RegistryListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event: str, server_id: str, tool_name: Optional[str] = None,
+                record: Optional[ToolRecord] = None) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event, server_id, tool_name, record)
+            except Exception:
+                logger.exception("registry listener failed event=%s server=%s tool=%s", event, server_id, tool_name)
 
     # Server operations
     def upsert_server(self, server_id: str, cfg: ServerConfig) -> None:
         self._servers[server_id] = cfg
         self._tools_by_server.setdefault(server_id, {})
+        self._notify("server.upsert", server_id)
 
     def delete_server(self, server_id: str) -> None:
         self._servers.pop(server_id, None)
-        self._tools_by_server.pop(server_id, None)
+        for record in self._tools_by_server.pop(server_id, {}).values():
+            self._interner.release(record)
+        self._notify("server.delete", server_id)
 
     def list_servers(self) -> Dict[str, ServerConfig]:
         return dict(self._servers)
 
     # Tool operations
-    def upsert_tool(self, server_id: str, tool_name: str, binding: ToolBinding) -> None:
-        self._tools_by_server.setdefault(server_id, {})[tool_name] = binding
+    def upsert_tool(self, server_id: str, tool_name: str, binding: ToolBinding | ToolRecord) -> None:
+        record = self._interner.compact(binding)
+        tools = self._tools_by_server.setdefault(server_id, {})
+        previous = tools.get(tool_name)
+        tools[tool_name] = record
+        if previous is not None:
+            self._interner.release(previous)
+        self._notify("tool.upsert", server_id, tool_name, record)
 
     def delete_tool(self, server_id: str, tool_name: str) -> None:
         if server_id in self._tools_by_server:
-            self._tools_by_server[server_id].pop(tool_name, None)
+            record = self._tools_by_server[server_id].pop(tool_name, None)
+            if record is not None:
+                self._interner.release(record)
+                self._notify("tool.delete", server_id, tool_name, record)
+
+    def list_tools(self, server_id: str) -> Mapping[str, ToolRecord]:
+        """서버의 툴 레코드를 복사 없이 읽기 전용 뷰로 반환한다."""
+        return MappingProxyType(self._tools_by_server.get(server_id, {}))
 
-    def list_tools(self, server_id: str) -> Dict[str, ToolBinding]:
-        return dict(self._tools_by_server.get(server_id, {}))
+    def get_tool(self, server_id: str, tool_name: str) -> Optional[ToolRecord]:
+        return self._tools_by_server.get(server_id, {}).get(tool_name)
 
     # Introspection
     def stats(self) -> Dict[str, int]:
-        """등록된 서버/툴의 개수를 요약해 반환한다."""
+        """등록된 서버/툴의 개수와 공유 중인 스키마·매핑 수를 요약해 반환한다."""
         num_servers = len(self._servers)
         num_tools = sum(len(tools) for tools in self._tools_by_server.values())
-        return {"servers": num_servers, "tools": num_tools}
+        return {"servers": num_servers, "tools": num_tools, **self._interner.stats()}
 
 
 registry = InMemoryRegistry()
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
 from .models import ServerConfig, ToolBinding
 from .registry import registry
 from .fastmcp_runtime import register_tool_with_fastmcp, deregister_tool_with_fastmcp
 from .fastmcp_runtime import ensure_server_mounted
+from .rate_limit import rate_limiters
+from .balancer import balancers
+from .events import registry_events
+from .sse import BoundedEventSourceResponse
 
 
 router = APIRouter(prefix="/api", tags=["api"])
@@ -42,6 +46,16 @@ async def global_stats() -> Dict[str, int]:
     }
 
 
+@router.get("/events")
+async def registry_event_stream(request: Request, since: Optional[str] = None) -> BoundedEventSourceResponse:
+    """레지스트리 변경 SSE 스트림. 처음에 `snapshot`을 보내고 이후 server/tool upsert·delete 델타만 보낸다.
+
+    `since`(또는 재연결 시 브라우저가 보내는 Last-Event-ID)가 보관 범위 안이면 스냅샷 없이 그 이후 델타부터 이어 보낸다.
+    """
+    resume_from = registry_events.parse_since(since or request.headers.get("last-event-id"))
+    return BoundedEventSourceResponse(registry_events.stream(resume_from))
+
+
 @router.get("/servers/{server_id}")
 async def get_server(server_id: str) -> ServerConfig:
     """특정 서버 설정을 조회한다. 없으면 404."""
@@ -64,6 +78,8 @@ async def upsert_server(server_id: str, cfg: ServerConfig) -> Dict[str, str]:
 async def delete_server(server_id: str) -> Dict[str, str]:
     """서버 설정을 삭제한다."""
     registry.delete_server(server_id)
+    rate_limiters.forget(server_id)
+    balancers.forget(server_id)
     return {"ok": "true"}
 
 
@@ -71,16 +87,16 @@ async def delete_server(server_id: str) -> Dict[str, str]:
 @router.get("/tools/{server_id}")
 async def list_tools(server_id: str) -> Dict[str, ToolBinding]:
     """특정 서버에 등록된 툴 목록을 반환한다."""
-    return registry.list_tools(server_id)
+    return {name: record.to_model() for name, record in registry.list_tools(server_id).items()}
 
 
 @router.get("/tools/{server_id}/{tool_name}")
 async def get_tool(server_id: str, tool_name: str) -> ToolBinding:
     """툴 상세를 조회한다. 없으면 404."""
-    tools = registry.list_tools(server_id)
-    if tool_name not in tools:
+    record = registry.get_tool(server_id, tool_name)
+    if record is None:
         raise HTTPException(status_code=404, detail="tool not found")
-    return tools[tool_name]
+    return record.to_model()
 
 
 @router.post("/tools/{server_id}/{tool_name}")
@@ -91,7 +91,8 @@ async def test_httpbin(tool: str, args: dict) -> dict:
     """등록된 httpbin 툴을 직접 호출하여 결과 반환(개발용)."""
     server = registry.list_servers()["httpbin"]
     binding = registry.list_tools("httpbin")[tool]
-    result = await call_via_binding(server, binding, args)
+    result = await call_via_binding(server, binding, args, server_id="httpbin")
+    result.pop("data_json", None)
     return result
 
 
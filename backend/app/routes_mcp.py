@@ -2,19 +2,185 @@ from __future__ import annotations
 
 import asyncio
 import json
-from typing import Any, AsyncGenerator
+import os
+import sys
+import time
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException, Request
 from sse_starlette.sse import EventSourceResponse
 
+from .bindings import ToolRecord
+from .models import ServerConfig
 from .registry import registry
 from .schemas import CallRequest
 from pydantic import BaseModel
 from .http_adapter import call_via_binding
 from .fastmcp_runtime import fastmcp_server, tool_key
+from .tracing import REQUEST_ID_HEADER, current_trace, new_request_id, start_trace
+from .admin import is_admin_request
+from .profiling import PROFILE_HEADER, start_request_profile
+from .call_stats import call_stats
+from .sse import BoundedEventSourceResponse, encode_json_event
+from .scheduler import ANONYMOUS_CALLER, caller_from_request, scheduler
+from .search import search_params, search_result
+from .audit import audit_log
+from .composite import ProgressCallback, composite_runner
 
 
 router = APIRouter(prefix="/mcp", tags=["mcp"])
+
+# 전송을 기다리는 진행 이벤트(페이지별 output.delta, 단계 이벤트) 프레임 수 상한. 차면 생산자(페이지 순회·단계)가 대기한다.
+PROGRESS_QUEUE_MAX = int(os.getenv("MCP_PROGRESS_QUEUE_MAX", "16"))
+# 큐가 찼을 때 대기 대신 버리는 진행 이벤트(결과 데이터를 싣지 않는 중간 알림)
+_DROPPABLE_PROGRESS = frozenset({"step.started"})
+
+
+class ClientDisconnected(Exception):
+    """SSE 클라이언트가 호출 도중 연결을 끊음."""
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # 바디는 이미 소비되었으므로 이후 receive는 http.disconnect가 올 때까지 대기한다.
+    while True:
+        message = await request.receive()
+        if message.get("type") == "http.disconnect":
+            return
+
+
+async def run_until_disconnect(request: Request, coro: Any) -> Any:
+    """coro를 실행하다가 클라이언트가 먼저 끊기면 coro를 취소하고 ClientDisconnected를 던진다.
+
+    - 취소된 업스트림 호출은 완료(취소 처리)될 때까지 기다려 커넥션이 즉시 반환되도록 한다.
+    - 바깥에서 취소되어도(sse-starlette 종료 등) 두 태스크를 모두 정리한다.
+    """
+    task = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for pending in (task, watcher):
+            if not pending.done():
+                pending.cancel()
+        await asyncio.gather(task, watcher, return_exceptions=True)
+    if task.cancelled():
+        raise ClientDisconnected()
+    return task.result()
+
+
+def validate_tool_args(tool: ToolRecord, args: Dict[str, Any]) -> None:
+    """JSON Schema로 인자 유효성 검사(가능한 경우). 실패 시 400."""
+    try:
+        from jsonschema import validate  # type: ignore
+        if tool.inputSchema:
+            validate(instance=args, schema=tool.inputSchema)
+    except Exception as ve:
+        raise HTTPException(status_code=400, detail=f"schema_validation_error: {ve}")
+
+
+async def dispatch_tool(
+    server_id: str,
+    tool_name: str,
+    server: ServerConfig,
+    tool: ToolRecord,
+    args: Dict[str, Any],
+    request_id: Optional[str] = None,
+    caller: str = ANONYMOUS_CALLER,
+    need_data: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[Any, int, Optional[bytes]]:
+    """툴을 실행하고 (data, status_code, data_json)을 반환한다. FastMCP 우선, 실패 시 HTTP 어댑터.
+
+    data_json은 data의 JSON 바이트(워커 풀에서 직렬화한 큰 응답, 또는 need_data=False일 때 pick 없는 JSON 원본; 없으면 None)다.
+    need_data=False면 data_json이 있을 때 data는 None일 수 있다.
+
+    실행 전 호출자·서버별 공정 스케줄러에서 슬롯을 받는다(대기 시간은 `sched.wait` 스팬).
+    호출 한 건마다 감사 로그에 (호출자, 툴, 인자, 업스트림 상태)를 비동기로 남긴다.
+    컴포지트 툴은 단계 DAG를 실행하며, progress가 있으면 단계별 진행 이벤트를 넘긴다.
+    페이지 순회 툴은 progress가 있으면 페이지마다 `output.delta`(항목 리스트)를 넘기고, need_data=False면 항목을 모으지 않는다.
+    """
+    queued_at = time.perf_counter()
+    with audit_log.call(caller, server_id, tool_name, args, tool.paramMapping.headers, request_id) as audit:
+        async with scheduler.slot(caller, server_id) as waited:
+            if waited:
+                current_trace().add("sched.wait", queued_at, time.perf_counter(), caller=caller)
+            data, status_code, data_json = await _run_tool(
+                server_id, tool_name, server, tool, args, request_id, need_data, progress
+            )
+        audit.status = status_code
+        return data, status_code, data_json
+
+
+async def _run_tool(
+    server_id: str,
+    tool_name: str,
+    server: ServerConfig,
+    tool: ToolRecord,
+    args: Dict[str, Any],
+    request_id: Optional[str],
+    need_data: bool,
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[Any, int, Optional[bytes]]:
+    if tool.composite is not None:
+        # 컴포지트 툴은 FastMCP를 거치지 않고 직접 실행해 단계별 진행 이벤트를 전달한다.
+        return await composite_runner.run(server_id, tool, args, request_id, progress), 200, None
+    if tool.pagination is not None and progress is not None:
+        # 페이지마다 바로 스트리밍하므로 FastMCP(전체를 모은 결과 하나)를 거치지 않는다.
+        result = await call_via_binding(
+            server, tool, args, request_id=request_id, server_id=server_id, need_data=need_data,
+            on_page=lambda items: progress("output.delta", items),
+        )
+        return result.get("data"), result.get("status_code", 200), result.get("data_json")
+    # FastMCP 런타임에 등록된 경우 이를 우선 사용
+    try:
+        tr = await fastmcp_server._call_tool(tool_key(server_id, tool_name), args)
+        r = tr.to_mcp_result()
+        if isinstance(r, tuple):
+            # (content, structured)
+            return r[1], 200, None
+        # list[ContentBlock] → 텍스트로 직렬화하여 폴백
+        def _cb_to_str(cb: Any) -> str:
+            try:
+                # Pydantic model
+                return cb.model_dump_json()
+            except Exception:
+                return str(cb)
+        return {"content": [ _cb_to_str(cb) for cb in r ]}, 200, None
+    except Exception:
+        # FastMCP 실패 시 HTTP 어댑터로 직접 호출
+        result = await call_via_binding(
+            server, tool, args, request_id=request_id, server_id=server_id, need_data=need_data
+        )
+        return result.get("data"), result.get("status_code", 200), result.get("data_json")
+
+
+async def _with_progress(
+    request: Request, coro: Any, events: "asyncio.Queue[bytes]",
+) -> AsyncGenerator[Any, None]:
+    """coro를 run_until_disconnect로 실행하면서 events에 쌓이는 진행 이벤트 프레임을 먼저 내보낸다.
+
+    마지막 항목으로 coro의 결과를 낸다(예외는 그대로 전파).
+    """
+    task = asyncio.ensure_future(run_until_disconnect(request, coro))
+    try:
+        while True:
+            while not events.empty():
+                yield events.get_nowait()
+            if task.done():
+                break
+            getter = asyncio.ensure_future(events.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        yield task.result()
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
 @router.get("/{server_id}")
 async def mcp_base_get(server_id: str) -> dict:
     # Cursor가 연결 체크 용도로 GET을 호출하는 경우가 있어 200을 돌려 호환성 보장
@@ -38,6 +204,7 @@ async def mcp_base_post(server_id: str, request: Request):
     """Cursor SSE 호환을 위한 진입점.
     - initialize: {"method":"initialize"} → 메타 응답 JSON 반환
     - tools.list: {"method":"tools.list"} → 도구 목록 JSON 반환
+    - tools.search: {"method":"tools.search","query":"...","limit":20,"offset":0} → 검색 결과 JSON 반환
     - tools.call: {"name":"toolName","args":{}} → SSE 스트림 반환 (기존 call_tool 위임)
     - 그 외: 단순 ok
     """
@@ -66,18 +233,34 @@ async def mcp_base_post(server_id: str, request: Request):
             })
         return {"tools": items}
 
+    if method == "tools.search":
+        params = body.get("params") or body
+        if not isinstance(params, dict):
+            raise HTTPException(status_code=400, detail="params must be an object")
+        try:
+            limit, offset, include_schema = search_params(params)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return search_result(server_id, str(params.get("query") or ""), limit, offset, include_schema)
+
     # tools.call 형태 폴백: name/args 조합을 허용
     tool_name = body.get("name")
     if tool_name:
         args = body.get("args") or {}
-        return await call_tool(server_id, tool_name, CallRequest(args=args))
+        return await call_tool(server_id, tool_name, CallRequest(args=args), request)
 
     return {"ok": True}
 
 
 @router.post("/{server_id}/{tool_name}")
-async def call_tool(server_id: str, tool_name: str, req: CallRequest) -> EventSourceResponse:
-    """지정 서버의 지정 툴을 호출하여 SSE로 결과를 스트리밍한다."""
+async def call_tool(server_id: str, tool_name: str, req: CallRequest, request: Request) -> EventSourceResponse:
+    """지정 서버의 지정 툴을 호출하여 SSE로 결과를 스트리밍한다.
+
+    - request_id: `X-Request-ID` 헤더가 있으면 재사용, 없으면 생성하여 모든 SSE 이벤트의 id로 싣는다.
+    - `X-MCP-Profile: 1` + 관리자 토큰: 호출 구간을 샘플링해 마지막 `profile.summary` 이벤트로 전송
+    - 컴포지트 툴은 단계마다 `step.started` / `step.completed` 이벤트를 보낸 뒤 최종 결과를 `output.delta`로 보낸다.
+    - 페이지 순회 툴은 페이지마다 `output.delta`(그 페이지의 항목 리스트)를 보낸다(업스트림 오류면 마지막에 오류 본문).
+    """
     servers = registry.list_servers()
     if server_id not in servers:
         raise HTTPException(status_code=404, detail="server not found")
@@ -93,48 +276,102 @@ async def call_tool(server_id: str, tool_name: str, req: CallRequest) -> EventSo
     if not tool.active:
         raise HTTPException(status_code=403, detail="tool inactive")
 
+    request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+    caller = caller_from_request(request)
+    profile_requested = bool(request.headers.get(PROFILE_HEADER)) and is_admin_request(request)
+
     async def event_stream() -> AsyncGenerator[dict, None]:
-        yield {"event": "tool_call.started", "data": json.dumps({"server": server_id, "tool": tool_name})}
+        trace = start_trace(request_id, server=server_id, tool=tool_name)
+        yield {
+            "event": "tool_call.started",
+            "id": request_id,
+            "data": json.dumps({"server": server_id, "tool": tool_name, "request_id": request_id}),
+        }
+        status_code = 200
+        # 이 제너레이터 프레임이 실행 중인 샘플만 집계(다른 요청의 CPU 사용은 제외)
+        sampler = start_request_profile(sys._getframe()) if profile_requested else None
+        call_stats.started += 1
         try:
-            # JSON Schema로 인자 유효성 검사(가능한 경우)
-            try:
-                from jsonschema import validate  # type: ignore
-                if tool.inputSchema:
-                    validate(instance=req.args, schema=tool.inputSchema)
-            except Exception as ve:
-                raise HTTPException(status_code=400, detail=f"schema_validation_error: {ve}")
-
-            data_payload = None
-            status_code = 200
-            # FastMCP 런타임에 등록된 경우 이를 우선 사용
+            with trace.span("validation"):
+                validate_tool_args(tool, req.args)
+
+            progress_events: Optional[asyncio.Queue[bytes]] = None
+            progress: Optional[ProgressCallback] = None
+            paginated = tool.pagination is not None
+            if tool.composite is not None or paginated:
+                progress_events = asyncio.Queue(maxsize=PROGRESS_QUEUE_MAX)
+
+                async def progress(event: str, payload: Any) -> None:
+                    # 느린 SSE 소비자면 큐가 차므로 여기서 기다린다(SSE 바이트 예산과 함께 메모리를 묶어 둠).
+                    # 알림일 뿐인 step.started는 기다리지 않고 버려 forEach 단계가 소비자 때문에 늦게 시작하지 않게 한다.
+                    if progress_events.full():
+                        if event in _DROPPABLE_PROGRESS:
+                            call_stats.progress_dropped += 1
+                            return
+                        call_stats.progress_waits += 1
+                    await progress_events.put(encode_json_event(event, json.dumps(payload).encode("utf-8"), request_id))
+
+            # SSE로는 직렬화된 바이트만 보내므로 큰 응답의 data 객체는 돌려받지 않는다.
+            dispatch = dispatch_tool(
+                server_id, tool_name, server, tool, req.args, request_id, caller, need_data=False, progress=progress
+            )
+            if sampler is not None:
+                # 디스패치는 별도 태스크에서 실행되므로 그 코루틴 프레임도 집계 대상에 추가
+                sampler.add_focus(dispatch.cr_frame)
+            call_stats.in_flight += 1
             try:
-                tr = await fastmcp_server._call_tool(tool_key(server_id, tool_name), req.args)
-                r = tr.to_mcp_result()
-                if isinstance(r, tuple):
-                    # (content, structured)
-                    data_payload = r[1]
-                else:
-                    # list[ContentBlock] → 텍스트로 직렬화하여 폴백
-                    def _cb_to_str(cb: Any) -> str:
-                        try:
-                            # Pydantic model
-                            return cb.model_dump_json()
-                        except Exception:
-                            return str(cb)
-                    data_payload = {"content": [ _cb_to_str(cb) for cb in r ]}
-            except Exception:
-                # FastMCP 실패 시 HTTP 어댑터로 직접 호출
-                result = await call_via_binding(server, tool, req.args)
-                data_payload = result.get("data")
-                status_code = result.get("status_code", 200)
-
-            # Stream one chunk
-            yield {"event": "output.delta", "data": json.dumps(data_payload)}
-            yield {"event": "tool_call.completed", "data": json.dumps({"status": status_code})}
+                with trace.span("dispatch"):
+                    if progress_events is None:
+                        data_payload, status_code, data_json = await run_until_disconnect(request, dispatch)
+                    else:
+                        async for item in _with_progress(request, dispatch, progress_events):
+                            if isinstance(item, bytes):
+                                yield item
+                            else:
+                                data_payload, status_code, data_json = item
+            finally:
+                call_stats.in_flight -= 1
+
+            # Stream one chunk (페이지 순회 툴은 이미 페이지별로 보냈으므로 오류 본문만)
+            if not paginated or status_code >= 400:
+                with trace.span("serialization"):
+                    if data_json is not None:
+                        delta: Any = encode_json_event("output.delta", data_json, request_id)
+                    else:
+                        delta = {"event": "output.delta", "id": request_id, "data": json.dumps(data_payload)}
+                yield delta
+            yield {
+                "event": "tool_call.completed",
+                "id": request_id,
+                "data": json.dumps({"status": status_code, "request_id": request_id}),
+            }
+            call_stats.completed += 1
+            trace.finish(status=status_code)
+        except ClientDisconnected:
+            # 아무도 읽지 않을 결과이므로 이벤트를 더 보내지 않고 종료
+            call_stats.abandoned += 1
+            trace.finish(abandoned=True)
+            return
+        except (asyncio.CancelledError, GeneratorExit):
+            # 전송 계층이 스트림을 먼저 끝낸 경우(연결 종료, 느린 소비자 축출)
+            call_stats.abandoned += 1
+            trace.finish(abandoned=True)
+            raise
         except Exception as e:
-            yield {"event": "tool_call.error", "data": json.dumps({"error": str(e)})}
+            call_stats.failed += 1
+            yield {
+                "event": "tool_call.error",
+                "id": request_id,
+                "data": json.dumps({"error": str(e), "request_id": request_id}),
+            }
+            trace.finish(error=str(e))
+        finally:
+            if sampler is not None:
+                sampler.stop()
+        if sampler is not None:
+            yield {"event": "profile.summary", "id": request_id, "data": json.dumps(sampler.hotspots())}
 
-    return EventSourceResponse(event_stream())
+    return BoundedEventSourceResponse(event_stream(), headers={REQUEST_ID_HEADER: request_id})
 
 
 # Standard MCP-style tools.call with server scoping in the path
@@ -144,8 +381,8 @@ class ToolCall(BaseModel):
 
 
 @router.post("/{server_id}/tools/call")
-async def tools_call(server_id: str, body: ToolCall) -> EventSourceResponse:
+async def tools_call(server_id: str, body: ToolCall, request: Request) -> EventSourceResponse:
     """MCP 표준 스타일의 tools.call 엔드포인트(서버 스코프)."""
     call_args = body.args or {}
-    return await call_tool(server_id, body.name, CallRequest(args=call_args))
+    return await call_tool(server_id, body.name, CallRequest(args=call_args), request)
 
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+from .call_stats import call_stats
+from .registry import registry
+from .routes_mcp import ClientDisconnected, dispatch_tool, run_until_disconnect, validate_tool_args
+from .scheduler import caller_from_request
+from .search import search_params, search_result
+from .sse import BoundedEventSourceResponse
+from .tracing import REQUEST_ID_HEADER, new_request_id, start_trace
+
+
+router = APIRouter(prefix="/mcp-http", tags=["mcp-http"])
+
+# 응답이 이 시간 안에 모두 준비되지 않으면(클라이언트가 SSE를 허용할 때) 스트림으로 전환한다. 음수면 전환하지 않음.
+STREAM_AFTER_MS = float(os.getenv("MCP_HTTP_STREAM_AFTER_MS", "1000"))
+# 배치 하나에 허용하는 최대 메시지 수
+MAX_BATCH = int(os.getenv("MCP_HTTP_MAX_BATCH", "100"))
+
+SESSION_HEADER = "Mcp-Session-Id"
+SUPPORTED_PROTOCOL_VERSIONS = ("2025-03-26", "2024-11-05")
+
+# JSON-RPC 2.0 오류 코드
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class JsonRpcError(Exception):
+    """JSON-RPC 오류 응답으로 변환되는 예외."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _error(msg_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}}
+
+
+def _initialize_result(server_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    requested = params.get("protocolVersion")
+    version = requested if requested in SUPPORTED_PROTOCOL_VERSIONS else SUPPORTED_PROTOCOL_VERSIONS[0]
+    return {
+        "protocolVersion": version,
+        "serverInfo": {"name": f"mcp_hub:{server_id}", "version": "0.1.0"},
+        "capabilities": {"tools": {"listChanged": False}},
+    }
+
+
+def _tools_list_result(server_id: str) -> Dict[str, Any]:
+    tools = registry.list_tools(server_id)
+    return {
+        "tools": [
+            {"name": name, "description": binding.description or "", "inputSchema": binding.inputSchema}
+            for name, binding in tools.items()
+        ]
+    }
+
+
+def _tool_result(data: Any, is_error: bool, data_json: Optional[bytes] = None) -> Dict[str, Any]:
+    if isinstance(data, str):
+        text = data
+    else:
+        text = data_json.decode("utf-8") if data_json is not None else json.dumps(data)
+    result: Dict[str, Any] = {
+        "content": [{"type": "text", "text": text}],
+        "isError": is_error,
+    }
+    if isinstance(data, dict):
+        result["structuredContent"] = data
+    return result
+
+
+async def _tools_call(
+    server_id: str, params: Dict[str, Any], request_id: str, msg_id: Any, caller: str
+) -> Dict[str, Any]:
+    """tools/call 실행. 툴 실행 오류는 JSON-RPC 오류가 아니라 isError 결과로 돌려준다."""
+    tool_name = params.get("name")
+    args = params.get("arguments") or {}
+    if not isinstance(tool_name, str) or not isinstance(args, dict):
+        raise JsonRpcError(INVALID_PARAMS, "params.name(string) and params.arguments(object) required")
+    server = registry.list_servers().get(server_id)
+    tool = registry.get_tool(server_id, tool_name)
+    if server is None or tool is None:
+        raise JsonRpcError(INVALID_PARAMS, f"unknown tool: {tool_name}")
+    if not server.active or not tool.active:
+        raise JsonRpcError(INVALID_PARAMS, f"tool inactive: {tool_name}")
+
+    trace = start_trace(request_id, server=server_id, tool=tool_name, rpc_id=msg_id, transport="http")
+    call_stats.started += 1
+    call_stats.in_flight += 1
+    try:
+        with trace.span("validation"):
+            validate_tool_args(tool, args)
+        with trace.span("dispatch"):
+            data, status_code, data_json = await dispatch_tool(server_id, tool_name, server, tool, args, request_id, caller)
+        with trace.span("serialization"):
+            result = _tool_result(data, status_code >= 400, data_json)
+    except HTTPException as e:
+        call_stats.failed += 1
+        trace.finish(error=str(e.detail))
+        return _tool_result(str(e.detail), True)
+    except asyncio.CancelledError:
+        call_stats.abandoned += 1
+        trace.finish(abandoned=True)
+        raise
+    except Exception as e:
+        call_stats.failed += 1
+        trace.finish(error=str(e))
+        return _tool_result(str(e), True)
+    finally:
+        call_stats.in_flight -= 1
+    call_stats.completed += 1
+    trace.finish(status=status_code)
+    return result
+
+
+async def _handle_call(server_id: str, msg: Dict[str, Any], request_id: str, caller: str) -> Dict[str, Any]:
+    msg_id = msg.get("id")
+    try:
+        result = await _tools_call(server_id, msg.get("params") or {}, request_id, msg_id, caller)
+    except JsonRpcError as e:
+        return _error(msg_id, e.code, e.message)
+    return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+
+def _handle_simple(server_id: str, msg: Dict[str, Any]) -> Dict[str, Any]:
+    """tools/call 이외의 요청(즉시 응답 가능)을 처리한다."""
+    msg_id = msg.get("id")
+    method = msg["method"]
+    params = msg.get("params") or {}
+    if method == "initialize":
+        return {"jsonrpc": "2.0", "id": msg_id, "result": _initialize_result(server_id, params)}
+    if method == "ping":
+        return {"jsonrpc": "2.0", "id": msg_id, "result": {}}
+    if method == "tools/list":
+        return {"jsonrpc": "2.0", "id": msg_id, "result": _tools_list_result(server_id)}
+    if method == "tools/search":
+        if not isinstance(params, dict):
+            return _error(msg_id, INVALID_PARAMS, "params must be an object")
+        try:
+            limit, offset, include_schema = search_params(params)
+        except ValueError as e:
+            return _error(msg_id, INVALID_PARAMS, str(e))
+        result = search_result(server_id, str(params.get("query") or ""), limit, offset, include_schema)
+        return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+    return _error(msg_id, METHOD_NOT_FOUND, f"method not found: {method}")
+
+
+def _encode(message: Dict[str, Any]) -> Dict[str, str]:
+    return {"event": "message", "data": json.dumps(message)}
+
+
+@router.post("/{server_id}")
+async def mcp_http_post(server_id: str, request: Request) -> Response:
+    """MCP streamable-HTTP 전송(서버 스코프).
+
+    - 단일 JSON-RPC 메시지 또는 배치 배열을 받는다. 배치 안의 tools/call은 동시에 실행된다.
+    - 모든 응답이 `MCP_HTTP_STREAM_AFTER_MS` 안에 준비되면 JSON 한 번으로 돌려준다(배치는 입력 순서).
+    - 그보다 오래 걸리고 `Accept`에 text/event-stream이 있으면 SSE로 전환해 완료되는 순서대로 보낸다.
+    - 알림(id 없음)만 있으면 202. initialize 응답에는 `Mcp-Session-Id`를 싣는다(상태는 보관하지 않음).
+    """
+    if server_id not in registry.list_servers():
+        raise HTTPException(status_code=404, detail="server not found")
+
+    try:
+        payload = json.loads(await request.body())
+    except Exception:
+        return JSONResponse(_error(None, PARSE_ERROR, "parse error"), status_code=400)
+
+    is_batch = isinstance(payload, list)
+    messages: List[Any] = payload if is_batch else [payload]
+    if is_batch and not messages:
+        return JSONResponse(_error(None, INVALID_REQUEST, "empty batch"), status_code=400)
+    if len(messages) > MAX_BATCH:
+        return JSONResponse(_error(None, INVALID_REQUEST, f"batch too large (max {MAX_BATCH})"), status_code=413)
+
+    request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+    headers = {REQUEST_ID_HEADER: request_id}
+    session_id = request.headers.get(SESSION_HEADER)
+    caller = caller_from_request(request)
+
+    # 입력 순서대로 응답 슬롯을 채운다. 즉시 응답 가능한 것은 바로, tools/call은 태스크로 실행.
+    slots: List[Optional[Dict[str, Any]]] = []
+    tasks: Dict[int, asyncio.Task] = {}
+    for position, msg in enumerate(messages):
+        if not isinstance(msg, dict) or msg.get("jsonrpc") != "2.0" or not isinstance(msg.get("method"), str):
+            msg_id = msg.get("id") if isinstance(msg, dict) else None
+            slots.append(_error(msg_id, INVALID_REQUEST, "invalid request"))
+            continue
+        if "id" not in msg:
+            # 알림(notifications/initialized 등)은 응답하지 않는다.
+            continue
+        if msg["method"] == "tools/call":
+            # 배치 원소마다 다른 request_id를 써서 트레이스·감사 로그에서 호출을 구분한다.
+            call_request_id = f"{request_id}:{position}" if is_batch else request_id
+            tasks[len(slots)] = asyncio.ensure_future(_handle_call(server_id, msg, call_request_id, caller))
+            slots.append(None)
+            continue
+        if msg["method"] == "initialize":
+            session_id = uuid.uuid4().hex
+        slots.append(_handle_simple(server_id, msg))
+
+    if session_id:
+        headers[SESSION_HEADER] = session_id
+    if not slots:
+        return Response(status_code=202, headers=headers)
+
+    pending: set = set()
+    if tasks:
+        wants_stream = "text/event-stream" in request.headers.get("accept", "")
+        timeout = STREAM_AFTER_MS / 1000.0 if wants_stream and STREAM_AFTER_MS >= 0 else None
+        try:
+            _, pending = await run_until_disconnect(request, asyncio.wait(tasks.values(), timeout=timeout))
+        except BaseException as e:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            if isinstance(e, ClientDisconnected):
+                return Response(status_code=204)
+            raise
+
+    if not pending:
+        for index, task in tasks.items():
+            slots[index] = task.result()
+        return JSONResponse(slots if is_batch else slots[0], headers=headers)
+
+    async def event_stream() -> AsyncGenerator[Dict[str, str], None]:
+        # 대기 시간 초과 뒤 제너레이터가 돌기 전에 끝난 호출도 있으므로, 이미 보낸 태스크를 빼고 나머지를 기다린다.
+        emitted: set = set()
+        try:
+            for index, message in enumerate(slots):
+                task = tasks.get(index)
+                if message is not None:
+                    yield _encode(message)
+                elif task is not None and task.done():
+                    emitted.add(task)
+                    yield _encode(task.result())
+            remaining = [task for task in tasks.values() if task not in emitted]
+            for next_done in asyncio.as_completed(remaining):
+                yield _encode(await next_done)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    return BoundedEventSourceResponse(event_stream(), headers=headers)
+
+
+@router.get("/{server_id}")
+async def mcp_http_get(server_id: str) -> Response:
+    # 서버 주도 메시지용 GET 스트림은 제공하지 않는다(사양상 405로 표시).
+    return Response(status_code=405, headers={"Allow": "POST, DELETE"})
+
+
+@router.delete("/{server_id}")
+async def mcp_http_delete(server_id: str) -> Response:
+    # 세션 상태를 보관하지 않으므로 종료 요청은 항상 성공으로 처리한다.
+    return Response(status_code=204)
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from typing import Dict, Any, List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
 
 from .registry import registry
+from .search import search_params, search_result
 
 
 router = APIRouter(prefix="/mcp", tags=["mcp-meta"])
@@ -41,6 +42,40 @@ async def tools_list(server_id: str) -> Dict[str, Any]:
     return {"tools": items}
 
 
+@router.get("/{server_id}/tools/search")
+async def tools_search(server_id: str, q: str = "", limit: int = 20, offset: int = 0, schema: bool = True) -> Dict[str, Any]:
+    """이름·설명·스키마 속성 이름 역색인으로 툴을 찾아 점수순으로 반환한다(limit/offset 페이지).
+
+    - 모든 검색어가 (접두사로라도) 맞는 툴만 반환. q가 비면 이름순 전체 목록.
+    - schema=false면 inputSchema를 빼고 이름/설명/점수만 반환(에이전트 컨텍스트 절약).
+    """
+    if server_id not in registry.list_servers():
+        raise HTTPException(status_code=404, detail="server not found")
+    return search_result(server_id, q, limit, offset, schema)
+
+
+@router.post("/{server_id}/tools/search")
+async def tools_search_post(server_id: str, request: Request) -> Dict[str, Any]:
+    # 본문 {"query": "...", "limit": 20, "offset": 0, "schema": true} 변형
+    try:
+        body = await request.json()
+    except Exception:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+    try:
+        limit, offset, include_schema = search_params(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await tools_search(
+        server_id,
+        str(body.get("query") or body.get("q") or ""),
+        limit,
+        offset,
+        include_schema,
+    )
+
+
 # Server-scoped initialize for clients that set base URL per server
 @router.post("/{server_id}/initialize")
 async def initialize_scoped(server_id: str) -> Dict[str, Any]:
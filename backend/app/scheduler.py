@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# 동시에 실행할 툴 호출 수(전체). 0이면 스케줄러를 거치지 않는다.
+MAX_CONCURRENCY = int(os.getenv("MCP_SCHED_MAX_CONCURRENCY", "64"))
+# 호출자 하나가 동시에 실행할 수 있는 최대 호출 수(0이면 무제한)
+CALLER_MAX_INFLIGHT = int(os.getenv("MCP_SCHED_CALLER_MAX_INFLIGHT", "16"))
+# 호출자 식별 헤더. 없으면 Mcp-Session-Id → 클라이언트 IP 순으로 사용한다.
+CALLER_HEADER = os.getenv("MCP_SCHED_CALLER_HEADER", "X-MCP-Caller")
+# 대기열에서 이 시간을 넘기면 호출을 실패시킨다.
+MAX_QUEUE_WAIT_S = float(os.getenv("MCP_SCHED_MAX_QUEUE_WAIT_S", "30"))
+ANONYMOUS_CALLER = "anonymous"
+# 통계용으로 기억하는 호출자 수 상한(넘으면 유휴 호출자부터 잊는다)
+_MAX_TRACKED_CALLERS = 10_000
+
+# 이미 슬롯을 잡은 호출 안에서 다시 slot()을 부르면(FastMCP 경유 등) 중복 대기하지 않는다.
+_holding_slot: ContextVar[bool] = ContextVar("mcp_hub_sched_slot", default=False)
+
+
+def _parse_weights(raw: str) -> Dict[str, float]:
+    """`callerA=4,callerB=0.5` 형태의 가중치 설정을 읽는다."""
+    weights: Dict[str, float] = {}
+    for item in raw.split(","):
+        name, sep, value = item.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            weight = float(value)
+        except ValueError:
+            continue
+        if weight > 0:
+            weights[name.strip()] = weight
+    return weights
+
+
+def caller_from_request(request: Any) -> str:
+    """요청에서 호출자 식별자를 뽑는다(헤더 → 세션 → 클라이언트 IP)."""
+    if request is None:
+        return ANONYMOUS_CALLER
+    headers = request.headers
+    caller = headers.get(CALLER_HEADER) or headers.get("Mcp-Session-Id")
+    if caller:
+        return caller
+    client = getattr(request, "client", None)
+    return client.host if client is not None and client.host else ANONYMOUS_CALLER
+
+
+class QueueFull(Exception):
+    """스케줄러 대기 시간(MCP_SCHED_MAX_QUEUE_WAIT_S)을 넘김."""
+
+
+class _Waiter:
+    __slots__ = ("flow", "start_tag", "finish_tag", "future", "enqueued_at")
+
+    def __init__(self, flow: "_Flow", start_tag: float, finish_tag: float, future: asyncio.Future) -> None:
+        self.flow = flow
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class _Flow:
+    """(caller, server_id) 하나의 대기열."""
+
+    __slots__ = ("caller", "server_id", "queue", "last_finish")
+
+    def __init__(self, caller: str, server_id: str) -> None:
+        self.caller = caller
+        self.server_id = server_id
+        self.queue: Deque[_Waiter] = deque()
+        self.last_finish = 0.0
+
+
+class _CallerStats:
+    __slots__ = ("inflight", "queued", "admitted", "timed_out", "wait_total", "wait_max")
+
+    def __init__(self) -> None:
+        self.inflight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class FairScheduler:
+    """호출자·서버별 가중 공정 큐(WFQ) 스케줄러.
+
+    - 흐름(flow)은 (caller, server_id). 호출자 가중치는 그 호출자의 활성 흐름들이 나눠 가진다.
+    - 각 대기 호출에 가상 종료 시각(start + 1/weight)을 붙이고, 빈 슬롯이 생기면 호출자 동시 실행
+      상한에 걸리지 않은 흐름 중 종료 시각이 가장 이른 것을 먼저 실행한다.
+    - 한가할 때(슬롯 여유 + 대기 없음)는 대기열을 거치지 않는다.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        caller_max_inflight: int = CALLER_MAX_INFLIGHT,
+        weights: Optional[Dict[str, float]] = None,
+        max_queue_wait: float = MAX_QUEUE_WAIT_S,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.caller_max_inflight = caller_max_inflight
+        self.weights = weights if weights is not None else _parse_weights(os.getenv("MCP_SCHED_WEIGHTS", ""))
+        self.max_queue_wait = max_queue_wait
+        self.inflight = 0
+        self.queued = 0
+        self.virtual_time = 0.0
+        self._flows: Dict[Tuple[str, str], _Flow] = {}
+        self._caller_flows: Dict[str, int] = {}
+        self._callers: Dict[str, _CallerStats] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    def _caller(self, caller: str) -> _CallerStats:
+        stats = self._callers.get(caller)
+        if stats is None:
+            stats = self._callers[caller] = _CallerStats()
+        return stats
+
+    def _caller_has_room(self, caller: str) -> bool:
+        return self.caller_max_inflight <= 0 or self._caller(caller).inflight < self.caller_max_inflight
+
+    def _admit(self, caller: str, waited: float) -> None:
+        stats = self._caller(caller)
+        stats.inflight += 1
+        stats.admitted += 1
+        stats.wait_total += waited
+        if waited > stats.wait_max:
+            stats.wait_max = waited
+        self.inflight += 1
+
+    def _enqueue(self, caller: str, server_id: str) -> _Waiter:
+        key = (caller, server_id)
+        flow = self._flows.get(key)
+        if flow is None:
+            flow = self._flows[key] = _Flow(caller, server_id)
+            self._caller_flows[caller] = self._caller_flows.get(caller, 0) + 1
+        weight = self.weights.get(caller, 1.0) / self._caller_flows[caller]
+        start = max(self.virtual_time, flow.last_finish)
+        finish = start + 1.0 / weight
+        flow.last_finish = finish
+        waiter = _Waiter(flow, start, finish, asyncio.get_running_loop().create_future())
+        flow.queue.append(waiter)
+        self.queued += 1
+        self._caller(caller).queued += 1
+        return waiter
+
+    def _drop_flow_if_idle(self, flow: _Flow) -> None:
+        if flow.queue:
+            return
+        key = (flow.caller, flow.server_id)
+        if self._flows.get(key) is flow:
+            del self._flows[key]
+            remaining = self._caller_flows.get(flow.caller, 1) - 1
+            if remaining > 0:
+                self._caller_flows[flow.caller] = remaining
+            else:
+                self._caller_flows.pop(flow.caller, None)
+
+    def _dispatch(self) -> None:
+        """빈 슬롯만큼 종료 시각이 가장 이른 실행 가능 흐름의 선두를 깨운다."""
+        while self.inflight < self.max_concurrency and self.queued:
+            best: Optional[_Waiter] = None
+            for flow in self._flows.values():
+                if flow.queue and self._caller_has_room(flow.caller):
+                    head = flow.queue[0]
+                    if best is None or head.finish_tag < best.finish_tag:
+                        best = head
+            if best is None:
+                return
+            flow = best.flow
+            flow.queue.popleft()
+            self.queued -= 1
+            self._caller(flow.caller).queued -= 1
+            self.virtual_time = max(self.virtual_time, best.start_tag)
+            self._admit(flow.caller, time.perf_counter() - best.enqueued_at)
+            best.future.set_result(None)
+            self._drop_flow_if_idle(flow)
+
+    def _release(self, caller: str) -> None:
+        self.inflight -= 1
+        stats = self._caller(caller)
+        stats.inflight -= 1
+        if len(self._callers) > _MAX_TRACKED_CALLERS and not stats.inflight and not stats.queued:
+            del self._callers[caller]
+        self._dispatch()
+
+    def _cancel(self, waiter: _Waiter) -> None:
+        flow = waiter.flow
+        try:
+            flow.queue.remove(waiter)
+        except ValueError:
+            return
+        self.queued -= 1
+        self._caller(flow.caller).queued -= 1
+        self._drop_flow_if_idle(flow)
+
+    @asynccontextmanager
+    async def slot(self, caller: str, server_id: str) -> AsyncIterator[float]:
+        """실행 슬롯을 얻을 때까지 기다린다. 기다린 초를 돌려준다."""
+        if not self.enabled or _holding_slot.get():
+            yield 0.0
+            return
+        if not self.queued and self.inflight < self.max_concurrency and self._caller_has_room(caller):
+            self._admit(caller, 0.0)
+            waited = 0.0
+        else:
+            waiter = self._enqueue(caller, server_id)
+            self._dispatch()
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_queue_wait)
+            except asyncio.TimeoutError:
+                if waiter.future.done():
+                    # 시간 초과와 같은 루프 반복에서 슬롯이 배정됨: 받은 슬롯을 돌려준다.
+                    self._release(caller)
+                else:
+                    self._cancel(waiter)
+                self._caller(caller).timed_out += 1
+                raise QueueFull(f"scheduler queue wait exceeded {self.max_queue_wait:.1f}s (caller={caller})")
+            except asyncio.CancelledError:
+                if waiter.future.done():
+                    # 슬롯을 받은 직후 취소됨: 슬롯을 돌려준다.
+                    self._release(caller)
+                else:
+                    self._cancel(waiter)
+                raise
+            waited = time.perf_counter() - waiter.enqueued_at
+        token = _holding_slot.set(True)
+        try:
+            yield waited
+        finally:
+            _holding_slot.reset(token)
+            self._release(caller)
+
+    def stats(self) -> Dict[str, Any]:
+        callers: Dict[str, Any] = {}
+        for name, stats in sorted(self._callers.items()):
+            callers[name] = {
+                "weight": self.weights.get(name, 1.0),
+                "inFlight": stats.inflight,
+                "queued": stats.queued,
+                "admitted": stats.admitted,
+                "timedOut": stats.timed_out,
+                "avgQueueWaitMs": round(stats.wait_total * 1000.0 / stats.admitted, 2) if stats.admitted else 0.0,
+                "maxQueueWaitMs": round(stats.wait_max * 1000.0, 2),
+            }
+        flows: List[Dict[str, Any]] = [
+            {"caller": flow.caller, "server": flow.server_id, "queued": len(flow.queue)}
+            for flow in self._flows.values()
+            if flow.queue
+        ]
+        return {
+            "enabled": self.enabled,
+            "maxConcurrency": self.max_concurrency,
+            "callerMaxInFlight": self.caller_max_inflight,
+            "inFlight": self.inflight,
+            "queued": self.queued,
+            "callers": callers,
+            "flows": flows,
+        }
+
+
+scheduler = FairScheduler()
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import bisect
+import math
+import os
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .bindings import ToolRecord
+from .registry import InMemoryRegistry, registry
+
+
+# 필드별 가중치: 이름 > 스키마 속성 이름 > 설명
+NAME_WEIGHT = 3.0
+PROPERTY_WEIGHT = 1.5
+DESCRIPTION_WEIGHT = 1.0
+# 질의어가 색인어의 접두사로만 맞을 때의 감쇠(정확히 맞으면 1.0)
+PREFIX_FACTOR = 0.5
+# 접두사 확장 시 질의어 하나당 살펴볼 최대 색인어 수
+_MAX_PREFIX_TERMS = 64
+MAX_LIMIT = int(os.getenv("MCP_TOOL_SEARCH_MAX_LIMIT", "100"))
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+|[^\W\d_a-zA-Z]+", re.UNICODE)
+
+
+def tokenize(text: Optional[str], compounds: bool = True) -> List[str]:
+    """단어를 snake_case / camelCase / 숫자 경계로 쪼개 소문자 토큰으로 만든다(한글 등은 단어 단위).
+
+    compounds=True(색인 시)면 쪼개기 전 단어 전체도 토큰으로 넣는다. 질의는 쪼갠 토큰만 쓴다.
+    """
+    if not text:
+        return []
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(text):
+        parts = [p for p in _CAMEL_RE.findall(word.replace("_", " ")) if p.strip()]
+        lowered = word.lower().replace("_", "")
+        tokens.extend(p.lower() for p in parts)
+        if compounds and len(parts) > 1:
+            # 붙여 쓴 원형도 색인(getProductById → getproductbyid)
+            tokens.append(lowered)
+    return tokens
+
+
+def _schema_properties(schema: Any, depth: int = 0) -> Iterable[str]:
+    if depth > 8 or not isinstance(schema, Mapping):
+        return
+    properties = schema.get("properties")
+    if isinstance(properties, Mapping):
+        for name, sub in properties.items():
+            yield str(name)
+            yield from _schema_properties(sub, depth + 1)
+    items = schema.get("items")
+    if isinstance(items, Mapping):
+        yield from _schema_properties(items, depth + 1)
+
+
+def _document_terms(record: ToolRecord) -> Dict[str, float]:
+    """툴 하나의 {색인어: 필드 가중치 합}."""
+    terms: Dict[str, float] = {}
+    for weight, tokens in (
+        (NAME_WEIGHT, tokenize(record.name)),
+        (DESCRIPTION_WEIGHT, tokenize(record.description)),
+        (PROPERTY_WEIGHT, [t for prop in _schema_properties(record.inputSchema) for t in tokenize(prop)]),
+    ):
+        for token in tokens:
+            terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+
+class _ServerIndex:
+    """서버 하나의 역색인. 색인어 목록은 접두사 검색을 위해 정렬 상태로 유지한다."""
+
+    __slots__ = ("docs", "postings", "sorted_terms")
+
+    def __init__(self) -> None:
+        self.docs: Dict[str, Dict[str, float]] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.sorted_terms: List[str] = []
+
+    def add(self, tool_name: str, terms: Dict[str, float]) -> None:
+        self.remove(tool_name)
+        self.docs[tool_name] = terms
+        for term, weight in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                bisect.insort(self.sorted_terms, term)
+            posting[tool_name] = weight
+
+    def remove(self, tool_name: str) -> None:
+        terms = self.docs.pop(tool_name, None)
+        if not terms:
+            return
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(tool_name, None)
+            if not posting:
+                del self.postings[term]
+                index = bisect.bisect_left(self.sorted_terms, term)
+                if index < len(self.sorted_terms) and self.sorted_terms[index] == term:
+                    del self.sorted_terms[index]
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """질의어 하나에 맞는 (색인어, 배율). 정확히 맞는 것 + 접두사로 맞는 것."""
+        matches: List[Tuple[str, float]] = []
+        if token in self.postings:
+            matches.append((token, 1.0))
+        start = bisect.bisect_right(self.sorted_terms, token)
+        for term in self.sorted_terms[start:start + _MAX_PREFIX_TERMS]:
+            if not term.startswith(token):
+                break
+            matches.append((term, PREFIX_FACTOR))
+        return matches
+
+    def search(self, query: str) -> List[Tuple[str, float]]:
+        """(툴 이름, 점수)를 점수 내림차순으로. 모든 질의어가 (접두사로라도) 맞는 툴만 돌려준다."""
+        tokens = list(dict.fromkeys(tokenize(query, compounds=False)))
+        if not tokens:
+            return [(name, 0.0) for name in sorted(self.docs)]
+        total = len(self.docs)
+        scores: Dict[str, float] = {}
+        matched: Optional[Set[str]] = None
+        for token in tokens:
+            token_scores: Dict[str, float] = {}
+            for term, factor in self._expand(token):
+                posting = self.postings[term]
+                idf = math.log(1.0 + total / len(posting))
+                for tool_name, weight in posting.items():
+                    score = factor * weight * idf
+                    if score > token_scores.get(tool_name, 0.0):
+                        token_scores[tool_name] = score
+            hits = set(token_scores)
+            matched = hits if matched is None else matched & hits
+            if not matched:
+                return []
+            for tool_name, score in token_scores.items():
+                scores[tool_name] = scores.get(tool_name, 0.0) + score
+        lowered = query.strip().lower()
+        ranked = []
+        for tool_name in matched or ():
+            score = scores[tool_name]
+            if tool_name.lower() == lowered:
+                score *= 2.0  # 이름 그대로 검색한 경우 맨 위로
+            ranked.append((tool_name, score))
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+
+class ToolSearchIndex:
+    """서버별 툴 역색인. 레지스트리 리스너로 upsert/delete 때마다 해당 툴만 다시 색인한다."""
+
+    def __init__(self) -> None:
+        self._servers: Dict[str, _ServerIndex] = {}
+        self.queries = 0
+        self.updates = 0
+
+    def attach(self, source: InMemoryRegistry) -> None:
+        """이미 등록된 툴을 한 번 색인하고 이후 변경을 구독한다."""
+        for server_id in source.list_servers():
+            for tool_name, record in source.list_tools(server_id).items():
+                self._index(server_id, tool_name, record)
+        source.add_listener(self.on_registry_event)
+
+    def _index(self, server_id: str, tool_name: str, record: ToolRecord) -> None:
+        index = self._servers.get(server_id)
+        if index is None:
+            index = self._servers[server_id] = _ServerIndex()
+        index.add(tool_name, _document_terms(record))
+        self.updates += 1
+
+    def on_registry_event(self, event: str, server_id: str, tool_name: Optional[str], record: Optional[ToolRecord]) -> None:
+        if event == "tool.upsert" and tool_name is not None and record is not None:
+            self._index(server_id, tool_name, record)
+        elif event == "tool.delete" and tool_name is not None:
+            index = self._servers.get(server_id)
+            if index is not None:
+                index.remove(tool_name)
+                self.updates += 1
+        elif event == "server.delete":
+            self._servers.pop(server_id, None)
+
+    def search(self, server_id: str, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Tuple[str, float]], int]:
+        """(해당 페이지의 (툴 이름, 점수) 목록, 전체 일치 수)."""
+        self.queries += 1
+        index = self._servers.get(server_id)
+        if index is None:
+            return [], 0
+        ranked = index.search(query)
+        limit = max(0, min(limit, MAX_LIMIT))
+        offset = max(0, offset)
+        return ranked[offset:offset + limit], len(ranked)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "updates": self.updates,
+            "servers": {
+                server_id: {"tools": len(index.docs), "terms": len(index.postings)}
+                for server_id, index in sorted(self._servers.items())
+            },
+        }
+
+
+tool_index = ToolSearchIndex()
+tool_index.attach(registry)
+
+
+_SCHEMA_FLAGS = {"true": True, "1": True, "false": False, "0": False}
+
+
+def search_params(params: Mapping[str, Any]) -> Tuple[int, int, bool]:
+    """본문/JSON-RPC params의 limit·offset(정수, 음수는 0으로)과 schema(불리언)를 읽는다. 형식이 틀리면 ValueError.
+
+    schema는 true/false 외에 문자열 "true"/"false"/"1"/"0"도 받는다.
+    """
+    values = []
+    for key, default in (("limit", 20), ("offset", 0)):
+        raw = params.get(key, default)
+        if isinstance(raw, bool) or not isinstance(raw, (int, float, str)):
+            raise ValueError(f"{key} must be an integer")
+        try:
+            value = int(raw)
+        except (ValueError, OverflowError):
+            # OverflowError: json.loads가 받아들이는 Infinity/-Infinity
+            raise ValueError(f"{key} must be an integer") from None
+        values.append(max(0, value))
+    raw_schema = params.get("schema", True)
+    if isinstance(raw_schema, bool):
+        include_schema = raw_schema
+    elif isinstance(raw_schema, str) and raw_schema.strip().lower() in _SCHEMA_FLAGS:
+        include_schema = _SCHEMA_FLAGS[raw_schema.strip().lower()]
+    else:
+        raise ValueError("schema must be a boolean")
+    return values[0], values[1], include_schema
+
+
+def search_result(server_id: str, query: str, limit: int = 20, offset: int = 0,
+                  include_schema: bool = True) -> Dict[str, Any]:
+    """tools/search 응답 본문(모든 전송 경로 공용)."""
+    offset = max(0, offset)
+    page, total = tool_index.search(server_id, query, limit, offset)
+    tools = registry.list_tools(server_id)
+    items: List[Dict[str, Any]] = []
+    for name, score in page:
+        record = tools.get(name)
+        if record is None:
+            continue
+        item: Dict[str, Any] = {"name": name, "description": record.description or "", "score": round(score, 4)}
+        if include_schema:
+            item["inputSchema"] = record.inputSchema
+        items.append(item)
+    next_offset = offset + len(page)
+    return {
+        "tools": items,
+        "total": total,
+        "offset": offset,
+        "nextOffset": next_offset if next_offset < total else None,
+    }
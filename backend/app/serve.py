@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+
+logger = logging.getLogger("mcp.serve")
+
+# 실행 기본값(명령행 인자가 우선)
+SERVE_HOST = os.getenv("MCP_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("MCP_PORT", "8000"))
+# 워커 프로세스 수. "auto"면 컨테이너에 할당된 CPU 수(cgroup 쿼터·affinity 반영).
+SERVE_WORKERS = os.getenv("MCP_WORKERS", "1")
+# 워커마다 SO_REUSEPORT 소켓을 따로 열어 커널이 연결을 분배하게 한다(리눅스, 워커 2개 이상일 때).
+SERVE_REUSE_PORT = os.getenv("MCP_REUSE_PORT", "1") not in ("0", "false", "False")
+# SIGTERM 후 진행 중 요청(열린 SSE 스트림 포함)을 기다리는 최대 시간
+SERVE_GRACEFUL_TIMEOUT_S = float(os.getenv("MCP_GRACEFUL_TIMEOUT_S", "30"))
+SERVE_BACKLOG = int(os.getenv("MCP_BACKLOG", "2048"))
+SERVE_KEEP_ALIVE_S = int(os.getenv("MCP_KEEP_ALIVE_S", "5"))
+SERVE_LOG_LEVEL = os.getenv("MCP_LOG_LEVEL", "info")
+# 모든 워커가 준비되면 이 파일을 만들고 종료 시 지운다(컨테이너 readiness 프로브용, 빈 값이면 사용 안 함).
+SERVE_READY_FILE = os.getenv("MCP_READY_FILE", "")
+
+APP_PATH = "backend.app.main:app"
+# 워커가 반복해서 바로 죽을 때 재시작 사이 최소 간격
+_RESTART_BACKOFF_S = 1.0
+
+
+def available_cpus() -> int:
+    """이 프로세스가 쓸 수 있는 CPU 수. affinity와 cgroup(v2 cpu.max, v1 cfs quota) 제한을 반영한다."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    quota: Optional[float] = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="ascii") as f:
+            limit, period = f.read().split()[:2]
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", encoding="ascii") as f:
+                limit_us = int(f.read().strip())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", encoding="ascii") as f:
+                period_us = int(f.read().strip())
+            if limit_us > 0 and period_us > 0:
+                quota = limit_us / period_us
+        except (OSError, ValueError):
+            pass
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+
+def resolve_workers(value: str) -> int:
+    if value.strip().lower() == "auto":
+        return available_cpus()
+    return max(1, int(value))
+
+
+def pick_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") is not None and sys.platform != "win32" else "asyncio"
+
+
+def pick_http() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+
+
+def bind_socket(host: str, port: int, reuse_port: bool, backlog: int = SERVE_BACKLOG) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class _WorkerServer(uvicorn.Server):
+    """시작 완료 시 준비 상태를 알리고, 종료 신호를 받으면 /readyz가 503을 돌려주게 하는 uvicorn 서버."""
+
+    def __init__(self, config: uvicorn.Config, index: int, ready: Any = None) -> None:
+        super().__init__(config)
+        self.index = index
+        self.ready = ready
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.started:
+            return
+        logger.info("serve.worker.ready index=%d pid=%d", self.index, os.getpid())
+        if self.ready is not None:
+            self.ready.put((self.index, os.getpid()))
+
+    def handle_exit(self, sig: int, frame: Any) -> None:
+        from .main import app
+
+        if not app.state.draining:
+            app.state.draining = True
+            logger.info("serve.worker.draining index=%d pid=%d signal=%s", self.index, os.getpid(), sig)
+        super().handle_exit(sig, frame)
+
+
+def _config(options: Dict[str, Any]) -> uvicorn.Config:
+    from .main import app
+
+    return uvicorn.Config(
+        app,
+        loop=options["loop"],
+        http=options["http"],
+        log_level=options["log_level"],
+        backlog=options["backlog"],
+        timeout_keep_alive=options["keep_alive"],
+        timeout_graceful_shutdown=options["graceful_timeout"],
+        proxy_headers=True,
+        forwarded_allow_ips=options["forwarded_allow_ips"],
+    )
+
+
+def _run_worker(index: int, options: Dict[str, Any], sock: Optional[socket.socket], ready: Any) -> None:
+    """워커 프로세스 진입점(spawn). SO_REUSEPORT 모드면 자기 소켓을 직접 연다."""
+    logging.basicConfig(level=options["log_level"].upper(), format="%(levelname)s:     %(name)s %(message)s")
+    if sock is None:
+        sock = bind_socket(options["host"], options["port"], reuse_port=True, backlog=options["backlog"])
+    server = _WorkerServer(_config(options), index, ready)
+    server.run(sockets=[sock])
+
+
+class Supervisor:
+    """워커 프로세스들을 띄우고 지켜본다. 죽은 워커는 다시 띄우고, SIGTERM/SIGINT는 워커에 전달해 정상 종료를 기다린다."""
+
+    def __init__(self, workers: int, options: Dict[str, Any], reuse_port: bool) -> None:
+        self.workers = workers
+        self.options = options
+        self.reuse_port = reuse_port
+        self._ctx = multiprocessing.get_context("spawn")
+        self._ready = self._ctx.Queue()
+        self._shared_socket: Optional[socket.socket] = None
+        self._processes: List[Optional[multiprocessing.process.BaseProcess]] = [None] * workers
+        self._started_at: List[float] = [0.0] * workers
+        self._ready_pids: Dict[int, int] = {}
+        self._stopping = False
+
+    def _spawn(self, index: int) -> None:
+        process = self._ctx.Process(
+            target=_run_worker,
+            args=(index, self.options, self._shared_socket, self._ready),
+            name=f"mcp-worker-{index}",
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        logger.info("serve.worker.spawned index=%d pid=%d", index, process.pid)
+
+    def _on_signal(self, sig: int, frame: Any) -> None:
+        if not self._stopping:
+            logger.info("serve.shutdown signal=%s workers=%d", sig, self.workers)
+        self._stopping = True
+
+    def _collect_ready(self, timeout: float) -> None:
+        try:
+            index, pid = self._ready.get(timeout=timeout)
+        except Exception:
+            return
+        self._ready_pids[index] = pid
+        if len(self._ready_pids) == self.workers:
+            logger.info("serve.ready workers=%d pids=%s", self.workers, sorted(self._ready_pids.values()))
+            if SERVE_READY_FILE:
+                with open(SERVE_READY_FILE, "w", encoding="ascii") as f:
+                    f.write(" ".join(str(p) for p in sorted(self._ready_pids.values())) + "\n")
+
+    def run(self) -> int:
+        if not self.reuse_port:
+            # 부모가 한 번 열고 자식에게 넘긴다(SO_REUSEPORT를 못 쓰는 환경).
+            self._shared_socket = bind_socket(self.options["host"], self.options["port"], reuse_port=False,
+                                              backlog=self.options["backlog"])
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for index in range(self.workers):
+            self._spawn(index)
+        try:
+            while not self._stopping:
+                self._collect_ready(timeout=0.5)
+                for index, process in enumerate(self._processes):
+                    if self._stopping or process is None or process.is_alive():
+                        continue
+                    logger.warning("serve.worker.died index=%d pid=%s exitcode=%s", index, process.pid, process.exitcode)
+                    self._ready_pids.pop(index, None)
+                    if time.monotonic() - self._started_at[index] < _RESTART_BACKOFF_S:
+                        time.sleep(_RESTART_BACKOFF_S)
+                    self._spawn(index)
+        finally:
+            self._shutdown()
+        return 0
+
+    def _shutdown(self) -> None:
+        if SERVE_READY_FILE:
+            try:
+                os.remove(SERVE_READY_FILE)
+            except OSError:
+                pass
+        alive = [p for p in self._processes if p is not None and p.is_alive()]
+        for process in alive:
+            process.terminate()  # SIGTERM → uvicorn이 새 연결을 막고 진행 중 요청을 기다린다
+        deadline = time.monotonic() + self.options["graceful_timeout"] + 5.0
+        for process in alive:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("serve.worker.kill pid=%d (graceful timeout)", process.pid)
+                process.kill()
+                process.join()
+        if self._shared_socket is not None:
+            self._shared_socket.close()
+        logger.info("serve.stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MCP Hub 서버 실행기 (uvloop/httptools, 다중 워커, SO_REUSEPORT)")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", default=SERVE_WORKERS, help='워커 수 또는 "auto"(할당된 CPU 수)')
+    parser.add_argument("--no-reuse-port", action="store_true", help="SO_REUSEPORT 대신 부모가 연 소켓을 공유")
+    parser.add_argument("--graceful-timeout", type=float, default=SERVE_GRACEFUL_TIMEOUT_S)
+    parser.add_argument("--backlog", type=int, default=SERVE_BACKLOG)
+    parser.add_argument("--keep-alive", type=int, default=SERVE_KEEP_ALIVE_S)
+    parser.add_argument("--log-level", default=SERVE_LOG_LEVEL)
+    parser.add_argument("--forwarded-allow-ips", default=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"))
+    ns = parser.parse_args(argv)
+
+    logging.basicConfig(level=ns.log_level.upper(), format="%(levelname)s:     %(name)s %(message)s")
+    workers = resolve_workers(ns.workers)
+    options: Dict[str, Any] = {
+        "host": ns.host,
+        "port": ns.port,
+        "loop": pick_loop(),
+        "http": pick_http(),
+        "log_level": ns.log_level,
+        "backlog": ns.backlog,
+        "keep_alive": ns.keep_alive,
+        "graceful_timeout": ns.graceful_timeout,
+        "forwarded_allow_ips": ns.forwarded_allow_ips,
+    }
+    reuse_port = SERVE_REUSE_PORT and not ns.no_reuse_port and hasattr(socket, "SO_REUSEPORT")
+    logger.info(
+        "serve.start host=%s port=%d workers=%d cpus=%d loop=%s http=%s reuse_port=%s",
+        ns.host, ns.port, workers, available_cpus(), options["loop"], options["http"], reuse_port and workers > 1,
+    )
+
+    if workers == 1:
+        # 단일 프로세스: 감독 프로세스 없이 바로 실행(신호는 uvicorn이 직접 처리)
+        sock = bind_socket(ns.host, ns.port, reuse_port=False, backlog=ns.backlog)
+        _WorkerServer(_config(options), 0).run(sockets=[sock])
+        return 0
+
+    logger.warning(
+        "serve.multi_worker: 레지스트리는 워커 프로세스마다 따로 메모리에 있다. "
+        "/api로 등록한 서버·툴은 요청을 받은 워커에만 반영된다(기본 시드 툴은 모든 워커에 있음)."
+    )
+    # 워커마다 응답 후처리 프로세스 풀을 크게 띄우지 않도록 코어를 나눠 준다.
+    os.environ.setdefault("MCP_OFFLOAD_WORKERS", str(max(1, available_cpus() // workers)))
+    return Supervisor(workers, options, reuse_port).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from .sse import receive_or_disconnect
+
+
+logger = logging.getLogger(__name__)
+
+# 전체 / 서버별 동시 SSE 세션 상한(0이면 무제한). 초과 시 /sse 연결을 503으로 거절한다.
+MAX_SESSIONS = int(os.getenv("MCP_SSE_MAX_SESSIONS", "1000"))
+MAX_SESSIONS_PER_SERVER = int(os.getenv("MCP_SSE_MAX_SESSIONS_PER_SERVER", "200"))
+# 이 시간 동안 /messages 요청이나 서버 메시지가 없으면 세션을 정리한다(0이면 비활성).
+SESSION_IDLE_TTL_S = float(os.getenv("MCP_SSE_SESSION_IDLE_S", "900"))
+SESSION_SWEEP_INTERVAL_S = float(os.getenv("MCP_SSE_SESSION_SWEEP_S", "30"))
+
+# /mcp-sdk(글로벌 FastMCP 앱) 세션이 속하는 스코프 이름
+GLOBAL_SCOPE = "_global"
+
+_SESSION_KEY = b"session_id="
+
+
+def _session_id_from(data: bytes) -> Optional[str]:
+    """쿼리스트링/endpoint 이벤트 바이트에서 session_id 값을 찾는다(정규화된 32-hex 가정)."""
+    pos = data.find(_SESSION_KEY)
+    if pos < 0:
+        return None
+    start = pos + len(_SESSION_KEY)
+    end = start
+    while end < len(data) and data[end] not in b"&\r\n":
+        end += 1
+    return data[start:end].decode("latin-1") or None
+
+
+class SessionInfo:
+    """SSE 세션 하나. session_id는 endpoint 이벤트가 나간 뒤에 채워진다."""
+
+    __slots__ = ("scope", "session_id", "created_at", "last_activity", "evicted")
+
+    def __init__(self, scope: str) -> None:
+        now = time.monotonic()
+        self.scope = scope
+        self.session_id: Optional[str] = None
+        self.created_at = now
+        self.last_activity = now
+        self.evicted = asyncio.Event()
+
+
+class SessionManager:
+    """FastMCP SSE 앱들의 세션 수 상한과 유휴 세션 정리를 담당한다."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, max_per_server: int = MAX_SESSIONS_PER_SERVER,
+                 idle_ttl: float = SESSION_IDLE_TTL_S) -> None:
+        self.max_sessions = max_sessions
+        self.max_per_server = max_per_server
+        self.idle_ttl = idle_ttl
+        self._open: Dict[str, Set[SessionInfo]] = {}
+        self._by_id: Dict[str, SessionInfo] = {}
+        self.total = 0
+        self.opened_total = 0
+        self.rejected = 0
+        self.evicted_idle = 0
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def try_open(self, scope: str) -> Optional[SessionInfo]:
+        """상한 안이면 세션 슬롯을 잡아 반환하고, 넘으면 None."""
+        open_in_scope = len(self._open.get(scope, ()))
+        if (self.max_sessions > 0 and self.total >= self.max_sessions) or (
+            self.max_per_server > 0 and scope != GLOBAL_SCOPE and open_in_scope >= self.max_per_server
+        ):
+            self.rejected += 1
+            return None
+        info = SessionInfo(scope)
+        self._open.setdefault(scope, set()).add(info)
+        self.total += 1
+        self.opened_total += 1
+        return info
+
+    def bind(self, info: SessionInfo, session_id: str) -> None:
+        info.session_id = session_id
+        self._by_id[session_id] = info
+
+    def close(self, info: SessionInfo) -> None:
+        sessions = self._open.get(info.scope)
+        if sessions is None or info not in sessions:
+            return
+        sessions.discard(info)
+        if not sessions:
+            del self._open[info.scope]
+        self.total -= 1
+        if info.session_id is not None:
+            self._by_id.pop(info.session_id, None)
+
+    def touch(self, session_id: str) -> None:
+        info = self._by_id.get(session_id)
+        if info is not None:
+            info.last_activity = time.monotonic()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """idle_ttl을 넘긴 세션에 정리 신호를 보낸다. 실제 해제는 연결 종료 시 close에서 한다."""
+        if self.idle_ttl <= 0:
+            return 0
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        for sessions in self._open.values():
+            for info in sessions:
+                if not info.evicted.is_set() and now - info.last_activity > self.idle_ttl:
+                    info.evicted.set()
+                    evicted += 1
+        if evicted:
+            self.evicted_idle += evicted
+            logger.info("sse.session.idle_evicted count=%d ttl=%.0fs", evicted, self.idle_ttl)
+        return evicted
+
+    async def run_sweeper(self, interval: float = SESSION_SWEEP_INTERVAL_S) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+    def start_sweeper(self) -> None:
+        if self._sweeper is None and self.idle_ttl > 0:
+            self._sweeper = asyncio.ensure_future(self.run_sweeper())
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    def stats(self, detail: bool = False) -> Dict[str, Any]:
+        now = time.monotonic()
+        servers: Dict[str, Any] = {}
+        for scope, sessions in self._open.items():
+            ages = [now - info.created_at for info in sessions]
+            idles = [now - info.last_activity for info in sessions]
+            entry: Dict[str, Any] = {
+                "open": len(sessions),
+                "oldestAgeS": round(max(ages), 1) if ages else 0.0,
+                "meanAgeS": round(sum(ages) / len(ages), 1) if ages else 0.0,
+                "maxIdleS": round(max(idles), 1) if idles else 0.0,
+            }
+            if detail:
+                entry["sessions"] = [
+                    {
+                        "sessionId": info.session_id,
+                        "ageS": round(now - info.created_at, 1),
+                        "idleS": round(now - info.last_activity, 1),
+                    }
+                    for info in sessions
+                ]
+            servers[scope] = entry
+        return {
+            "open": self.total,
+            "openedTotal": self.opened_total,
+            "rejected": self.rejected,
+            "evictedIdle": self.evicted_idle,
+            "limits": {
+                "maxSessions": self.max_sessions,
+                "maxSessionsPerServer": self.max_per_server,
+                "idleTtlS": self.idle_ttl,
+            },
+            "servers": servers,
+        }
+
+
+session_manager = SessionManager()
+
+
+class SessionLimitASGI:
+    """FastMCP SSE 서브앱의 세션 수 상한, 활동 추적, 유휴 정리를 적용하는 ASGI 래퍼.
+
+    - GET sse_path: 상한 초과면 503. 통과하면 endpoint 이벤트에서 session_id를 읽어 세션에 연결하고,
+      정리 신호가 오면 receive가 `http.disconnect`를 돌려주게 하여 스트림을 닫는다.
+    - POST message_path: 쿼리의 session_id로 마지막 활동 시각을 갱신한다.
+    - on_close(session_id): 세션 종료 시 호출(전송 계층의 세션 테이블 정리 등).
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        scope_key: str,
+        sse_path: str = "/sse",
+        message_path: str = "/messages",
+        manager: Optional[SessionManager] = None,
+        on_close: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.app = app
+        self.scope_key = scope_key
+        self.sse_path = sse_path
+        self.message_path = message_path.rstrip("/")
+        self._message_prefix = self.message_path + "/"
+        self.manager = manager or session_manager
+        self.on_close = on_close
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> Any:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path: str = scope["path"]
+        root_path: str = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        if scope.get("method") == "POST" and (path == self.message_path or path.startswith(self._message_prefix)):
+            session_id = _session_id_from(scope.get("query_string", b""))
+            if session_id:
+                self.manager.touch(session_id)
+            return await self.app(scope, receive, send)
+
+        if scope.get("method") != "GET" or path != self.sse_path:
+            return await self.app(scope, receive, send)
+
+        info = self.manager.try_open(self.scope_key)
+        if info is None:
+            return await self._reject(send)
+
+        started = completed = False
+
+        async def tracked_send(message: Dict[str, Any]) -> None:
+            nonlocal started, completed
+            if completed or (started and message["type"] == "http.response.start"):
+                # 서버 측 정리 후 FastMCP 핸들러가 보내는 빈 Response 등은 버린다.
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            elif message["type"] == "http.response.body":
+                completed = not message.get("more_body", False)
+                body = message.get("body", b"")
+                # 하트비트(주석 라인)는 활동으로 보지 않는다.
+                if body and not body.startswith(b":"):
+                    info.last_activity = time.monotonic()
+                    if info.session_id is None:
+                        session_id = _session_id_from(body)
+                        if session_id:
+                            self.manager.bind(info, session_id)
+            await send(message)
+
+        async def tracked_receive() -> Dict[str, Any]:
+            return await receive_or_disconnect(receive, info.evicted)
+
+        try:
+            await self.app(scope, tracked_receive, tracked_send)
+            if started and not completed:
+                # 정리 신호로 스트림이 끊긴 경우 청크 응답을 정상 종료한다(실제 연결 종료면 무시됨).
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            self.manager.close(info)
+            if info.session_id is not None and self.on_close is not None:
+                try:
+                    self.on_close(info.session_id)
+                except Exception:
+                    logger.debug("sse.session.on_close failed session=%s", info.session_id, exc_info=True)
+
+    async def _reject(self, send: Any) -> None:
+        body = json.dumps({"detail": "too many sse sessions"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", b"5"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
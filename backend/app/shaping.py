@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import ResponseMapping
+
+
+# 잘린 문자열 끝에 붙이는 표시
+TRUNCATION_MARK = "…"
+
+# 필드 투영 트리: 키 → 하위 트리(None이면 값 전체)
+Projection = Dict[str, Optional["Projection"]]
+
+
+@lru_cache(maxsize=1024)
+def compile_path(expr: str) -> Any:
+    from jsonpath_ng import parse as jp_parse  # type: ignore
+
+    return jp_parse(expr)
+
+
+def apply_pick(response_json: Any, pick: str) -> Any:
+    """JSONPath(jsonpath-ng)로 응답에서 필요한 부분만 추출한다.
+
+    - 표현식은 처음 한 번만 파싱해 캐시한다
+    - 매치가 1개면 그 값, 아니면 매치 리스트를 반환
+    - 표현식 파싱/평가에 실패하면 원본 JSON을 그대로 반환
+    """
+    try:
+        matches = [m.value for m in compile_path(pick).find(response_json)]
+    except Exception:
+        # Fallback to full json if parsing fails
+        return response_json
+    if len(matches) == 1:
+        return matches[0]
+    return matches
+
+
+def _compile_fields(fields: List[str]) -> Projection:
+    """`["id", "rating.rate", "rating.count"]` → `{"id": None, "rating": {"rate": None, "count": None}}`."""
+    tree: Projection = {}
+    for path in fields:
+        node = tree
+        parts = path.split(".")
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            if part in node and node[part] is None:
+                break  # 상위 경로를 통째로 남기는 규칙이 이미 있음
+            if last:
+                node[part] = None
+            else:
+                node = node.setdefault(part, {})  # type: ignore[assignment]
+    return tree
+
+
+class ResponseShaper:
+    """ResponseMapping을 컴파일한 응답 후처리기. 내용이 같은 규칙은 인스턴스 하나를 공유한다(compile_response).
+
+    pick → offset/maxItems 자르기 → 필드 투영·문자열 자르기(한 번의 순회) → maxBytes 안에서 직렬화 순서로 적용하고,
+    직렬화한 바이트를 함께 돌려주므로 호출 측이 다시 json.dumps하지 않는다.
+    """
+
+    __slots__ = ("mapping_json", "pick", "projection", "offset", "max_items", "max_string", "max_bytes")
+
+    def __init__(self, mapping: ResponseMapping) -> None:
+        self.mapping_json = mapping.model_dump_json()
+        self.pick = mapping.pick or None
+        self.projection = _compile_fields(mapping.fields) if mapping.fields else None
+        self.offset = mapping.offset
+        self.max_items = mapping.maxItems
+        self.max_string = mapping.maxStringLength
+        self.max_bytes = mapping.maxBytes
+        if self.pick:
+            try:
+                compile_path(self.pick)  # 등록 시점에 파싱 비용을 치른다
+            except Exception:
+                pass  # 잘못된 표현식은 호출 시 원본 JSON으로 폴백(apply_pick)
+
+    def __reduce__(self) -> Any:
+        # 프로세스 풀로 넘길 때는 규칙 JSON만 보내고 워커에서 (캐시된) 컴파일 결과를 쓴다.
+        return (_shaper_from_json, (self.mapping_json,))
+
+    def _walk(self, value: Any, projection: Optional[Projection]) -> Any:
+        if isinstance(value, dict):
+            if projection is None:
+                if self.max_string is None:
+                    return value
+                return {key: self._walk(item, None) for key, item in value.items()}
+            if self.max_string is None:
+                # 잎 필드는 다시 들어가지 않고 그대로 복사한다.
+                return {
+                    key: value[key] if sub is None else self._walk(value[key], sub)
+                    for key, sub in projection.items() if key in value
+                }
+            return {key: self._walk(value[key], sub) for key, sub in projection.items() if key in value}
+        if isinstance(value, list):
+            if projection is None and self.max_string is None:
+                return value
+            return [self._walk(item, projection) for item in value]
+        if isinstance(value, str) and self.max_string is not None and len(value) > self.max_string:
+            return value[: self.max_string] + TRUNCATION_MARK
+        return value
+
+    def records(self, document: Any) -> Any:
+        """pick·필드 투영·문자열 자르기만 적용한다(페이지 순회에서 페이지 항목마다 쓰며, 개수/바이트 상한은 순회 쪽이 맡음)."""
+        value = apply_pick(document, self.pick) if self.pick else document
+        if self.projection is None and self.max_string is None:
+            return value
+        return self._walk(value, self.projection)
+
+    def shape(self, document: Any) -> Tuple[Any, bytes]:
+        """파싱된 응답에 규칙을 모두 적용해 (data, JSON 바이트)를 돌려준다.
+
+        바이트 상한이 있으면 원소를 하나씩 변환·직렬화하며 채우다가 상한에서 멈추므로 남은 원소는 건드리지 않는다.
+        """
+        value = apply_pick(document, self.pick) if self.pick else document
+        if isinstance(value, list) and (self.offset or self.max_items is not None):
+            end = None if self.max_items is None else self.offset + self.max_items
+            value = value[self.offset:end]
+        transform = self.projection is not None or self.max_string is not None
+        if self.max_bytes is None:
+            if transform:
+                value = self._walk(value, self.projection)
+            return value, json.dumps(value).encode("utf-8")
+        if isinstance(value, list):
+            return self._fit_list(value, transform)
+        if isinstance(value, dict):
+            return self._fit_dict(value, transform)
+        if transform:
+            value = self._walk(value, self.projection)
+        return self._fit_scalar(value)
+
+    def _fit_list(self, value: List[Any], transform: bool) -> Tuple[List[Any], bytes]:
+        # 배열 원소(레코드)는 쪼개지 않고 앞에서부터 max_bytes 안에 드는 만큼만 남긴다.
+        budget = self.max_bytes or 0
+        kept: List[Any] = []
+        parts: List[bytes] = []
+        size = 2
+        for item in value:
+            if transform:
+                item = self._walk(item, self.projection)
+            encoded = json.dumps(item).encode("utf-8")
+            grow = len(encoded) + (2 if parts else 0)
+            if size + grow > budget:
+                break
+            kept.append(item)
+            parts.append(encoded)
+            size += grow
+        return kept, b"[" + b", ".join(parts) + b"]"
+
+    def _fit_dict(self, value: Dict[str, Any], transform: bool) -> Tuple[Dict[str, Any], bytes]:
+        # 객체는 키 순서대로 max_bytes 안에 드는 키만 남긴다. 값 변환도 키마다 하며 상한에서 멈춘다.
+        budget = self.max_bytes or 0
+        kept: Dict[str, Any] = {}
+        parts: List[bytes] = []
+        size = 2
+        if self.projection is not None:
+            entries: Any = ((key, value[key], sub) for key, sub in self.projection.items() if key in value)
+        else:
+            entries = ((key, item, None) for key, item in value.items())
+        for key, item, sub in entries:
+            if transform:
+                item = self._walk(item, sub)
+            encoded = json.dumps({key: item}).encode("utf-8")[1:-1]
+            grow = len(encoded) + (2 if parts else 0)
+            if size + grow > budget:
+                break
+            kept[key] = item
+            parts.append(encoded)
+            size += grow
+        return kept, b"{" + b", ".join(parts) + b"}"
+
+    def _fit_scalar(self, value: Any) -> Tuple[Any, bytes]:
+        # 문자열은 직렬화 결과가 max_bytes 안에 들도록 잘라 끝에 `…`를 붙인다(숫자 등은 자를 수 없어 그대로).
+        budget = self.max_bytes or 0
+        encoded = json.dumps(value).encode("utf-8")
+        if len(encoded) <= budget or not isinstance(value, str):
+            return value, encoded
+        # 직렬화 길이는 남기는 글자 수에 단조 증가하므로 들어가는 최대 길이를 이분 탐색한다(문자당 1바이트 이상).
+        best: Tuple[Any, bytes] = ("", b'""')
+        low, high = 0, min(len(value), budget)
+        while low <= high:
+            keep = (low + high) // 2
+            cut = value[:keep] + TRUNCATION_MARK
+            encoded = json.dumps(cut).encode("utf-8")
+            if len(encoded) <= budget:
+                best = (cut, encoded)
+                low = keep + 1
+            else:
+                high = keep - 1
+        return best
+
+
+@lru_cache(maxsize=1024)
+def _shaper_from_json(mapping_json: str) -> ResponseShaper:
+    return ResponseShaper(ResponseMapping.model_validate_json(mapping_json))
+
+
+def compile_response(mapping: ResponseMapping) -> ResponseShaper:
+    """ResponseMapping을 컴파일한다(같은 내용이면 캐시된 인스턴스)."""
+    return _shaper_from_json(mapping.model_dump_json())
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent, ensure_bytes
+
+
+logger = logging.getLogger(__name__)
+
+# 하트비트(주석 라인) 주기. sse-starlette 기본값(15초)을 대체한다.
+SSE_HEARTBEAT_S = float(os.getenv("MCP_SSE_HEARTBEAT_S", "15"))
+# send 한 번이 이 시간 안에 끝나지 않으면 느린 소비자로 보고 연결을 정리한다. 0이면 비활성.
+SSE_WRITE_TIMEOUT_S = float(os.getenv("MCP_SSE_WRITE_TIMEOUT_S", "30"))
+# 연결당 미전송(큐 + 전송 중) 바이트 상한. 넘으면 생산자(제너레이터)를 대기시킨다.
+SSE_MAX_BUFFER_BYTES = int(os.getenv("MCP_SSE_MAX_BUFFER_BYTES", str(4 * 1024 * 1024)))
+# 큰 이벤트는 이 크기로 나눠 보내 전송 버퍼 점유를 제한하고 조각마다 타임아웃을 적용한다.
+_WRITE_SLICE_BYTES = 64 * 1024
+
+
+class SSEStats:
+    """열린 SSE 스트림 수와 미전송 바이트 등 전송 계층 지표."""
+
+    def __init__(self) -> None:
+        self.open_streams = 0
+        self.opened_total = 0
+        self.buffered_bytes = 0
+        self.peak_buffered_bytes = 0
+        self.bytes_sent = 0
+        self.evicted = 0
+
+    def add_buffered(self, n: int) -> None:
+        self.buffered_bytes += n
+        if self.buffered_bytes > self.peak_buffered_bytes:
+            self.peak_buffered_bytes = self.buffered_bytes
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "openStreams": self.open_streams,
+            "openedTotal": self.opened_total,
+            "bufferedBytes": self.buffered_bytes,
+            "peakBufferedBytes": self.peak_buffered_bytes,
+            "bytesSent": self.bytes_sent,
+            "evictedSlowConsumers": self.evicted,
+        }
+
+
+sse_stats = SSEStats()
+
+
+async def receive_or_disconnect(receive: Any, stop: asyncio.Event) -> Dict[str, Any]:
+    """receive를 기다리되 stop이 먼저 설정되면 `http.disconnect`를 돌려준다(서버 측 연결 정리용)."""
+    if stop.is_set():
+        return {"type": "http.disconnect"}
+    recv = asyncio.ensure_future(receive())
+    halt = asyncio.ensure_future(stop.wait())
+    try:
+        await asyncio.wait({recv, halt}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for pending in (recv, halt):
+            if not pending.done():
+                pending.cancel()
+    if recv.done() and not recv.cancelled():
+        return recv.result()
+    return {"type": "http.disconnect"}
+
+
+class _StreamGuard:
+    """SSE 연결 하나의 send/receive를 감싸 쓰기 타임아웃과 바이트 집계를 적용한다.
+
+    - 쓰기 타임아웃 시 예외 대신 이후 send를 버리고, receive가 `http.disconnect`를
+      돌려주게 하여 EventSourceResponse가 스스로 정상 종료하도록 만든다.
+    - slice_bytes보다 큰 본문은 조각으로 나눠 보내고(조각마다 타임아웃), 자체 잠금으로
+      조각 사이에 다른 send(하트비트)가 끼어들지 않게 한다.
+    """
+
+    def __init__(
+        self, send: Any, receive: Any, write_timeout: float, account_sends: bool = True, slice_bytes: int = 0,
+    ) -> None:
+        self._send = send
+        self._receive = receive
+        self.write_timeout = write_timeout
+        # False면 호출자가 이미 큐 단계에서 바이트를 집계하므로 send에서는 세지 않는다.
+        self.account_sends = account_sends
+        self.slice_bytes = slice_bytes
+        self.buffered = 0
+        self.evicted = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    def add_buffered(self, n: int) -> None:
+        self.buffered += n
+        sse_stats.add_buffered(n)
+
+    def release(self) -> None:
+        sse_stats.buffered_bytes -= self.buffered
+        self.buffered = 0
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if self.evicted.is_set():
+            return
+        if message["type"] != "http.response.body":
+            return await self._send(message)
+        body = message.get("body", b"")
+        async with self._lock:
+            if not self.slice_bytes or len(body) <= self.slice_bytes:
+                return await self._send_body(message)
+            view = memoryview(body)
+            last = len(body) - 1
+            for offset in range(0, len(body), self.slice_bytes):
+                if self.evicted.is_set():
+                    return
+                end = offset + self.slice_bytes
+                await self._send_body({
+                    "type": "http.response.body",
+                    "body": bytes(view[offset:end]),
+                    "more_body": True if end <= last else message.get("more_body", False),
+                })
+
+    async def _send_body(self, message: Dict[str, Any]) -> None:
+        size = len(message.get("body", b""))
+        pending = size if self.account_sends else 0
+        self.add_buffered(pending)
+        try:
+            if self.write_timeout > 0:
+                await asyncio.wait_for(self._send(message), self.write_timeout)
+            else:
+                await self._send(message)
+            sse_stats.bytes_sent += size
+        except asyncio.TimeoutError:
+            sse_stats.evicted += 1
+            self.evicted.set()
+            logger.warning("sse.slow_consumer.evicted write_timeout=%.1fs pending_bytes=%d", self.write_timeout, self.buffered)
+        finally:
+            self.add_buffered(-pending)
+
+    async def receive(self) -> Dict[str, Any]:
+        return await receive_or_disconnect(self._receive, self.evicted)
+
+
+def encode_json_event(event: str, data_json: bytes, event_id: Optional[str] = None, sep: str = "\r\n") -> bytes:
+    """미리 직렬화된 JSON 바이트로 SSE 이벤트 프레임을 만든다(큰 페이로드를 str로 되돌려 분할하지 않음).
+
+    json.dumps 출력에는 줄바꿈이 없으므로 data 한 줄로 충분하다. 줄바꿈이 있으면 일반 인코딩으로 처리.
+    """
+    if b"\n" in data_json or b"\r" in data_json:
+        return ServerSentEvent(data=data_json.decode("utf-8"), event=event, id=event_id, sep=sep).encode()
+    head = ""
+    if event_id is not None:
+        head += f"id: {event_id}{sep}"
+    return b"".join((f"{head}event: {event}{sep}data: ".encode("utf-8"), data_json, (sep + sep).encode("utf-8")))
+
+
+class _BoundedPrefetch:
+    """body_iterator를 별도 태스크에서 미리 읽되, 큐와 전송 중인 바이트가 예산을 넘지 않게 하는 비동기 이터레이터.
+
+    - 마지막으로 내준 이벤트는 다음 항목을 요청받을 때(=전송이 끝났을 때) 예산에서 뺀다.
+    - 예산을 넘어도 큐가 비어 있으면 이벤트 하나는 허용한다.
+    """
+
+    def __init__(self, source: Any, sep: str, guard: _StreamGuard, max_bytes: int) -> None:
+        self._source = source
+        self._sep = sep
+        self._guard = guard
+        self._max_bytes = max_bytes
+        self._queue: Deque[bytes] = deque()
+        self._cond = asyncio.Condition()
+        self._finished = False
+        self._in_flight = 0
+        self._producer: Optional[asyncio.Task] = None
+
+    def __aiter__(self) -> "_BoundedPrefetch":
+        return self
+
+    async def _produce(self) -> None:
+        guard = self._guard
+        try:
+            async for data in self._source:
+                chunk = ensure_bytes(data, self._sep)
+                async with self._cond:
+                    await self._cond.wait_for(
+                        lambda: not self._queue or guard.buffered + len(chunk) <= self._max_bytes
+                    )
+                    self._queue.append(chunk)
+                    guard.add_buffered(len(chunk))
+                    self._cond.notify_all()
+        finally:
+            async with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    async def __anext__(self) -> bytes:
+        if self._producer is None:
+            self._producer = asyncio.ensure_future(self._produce())
+        async with self._cond:
+            if self._in_flight:
+                self._guard.add_buffered(-self._in_flight)
+                self._in_flight = 0
+                self._cond.notify_all()
+            if self._guard.evicted.is_set():
+                # 느린 소비자: 더 생산하지 않고 disconnect 경로로 정리되도록 둔다.
+                raise StopAsyncIteration
+            await self._cond.wait_for(lambda: bool(self._queue) or self._finished)
+            if self._queue:
+                chunk = self._queue.popleft()
+                self._in_flight = len(chunk)
+                return chunk
+        await self._producer  # 제너레이터 예외 전파
+        raise StopAsyncIteration
+
+    async def aclose(self) -> None:
+        producer = self._producer
+        if producer is not None and not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        # yield에서 멈춘 제너레이터를 즉시 닫아 자원(결과 페이로드 등)을 놓게 한다.
+        if hasattr(self._source, "aclose"):
+            await self._source.aclose()
+        self._queue.clear()
+
+
+class BoundedEventSourceResponse(EventSourceResponse):
+    """연결당 바이트 예산, 하트비트, 쓰기 타임아웃을 갖는 EventSourceResponse.
+
+    - 제너레이터는 별도 태스크에서 미리 읽어 큐에 쌓되, 큐+전송 중 바이트가
+      max_buffer_bytes를 넘으면 전송될 때까지 대기한다(최소 1개 이벤트는 허용).
+    - 큰 이벤트는 조각으로 나눠 보내며 조각 사이에 하트비트가 끼어들지 않도록 잠근다.
+    - sse-starlette 내부(stream_response, 송신 잠금 등)는 건드리지 않고 공개 속성인 body_iterator와
+      ASGI send/receive만 감싼다.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        *,
+        max_buffer_bytes: Optional[int] = None,
+        write_timeout: Optional[float] = None,
+        ping: Optional[float] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(content, ping=SSE_HEARTBEAT_S if ping is None else ping, **kwargs)
+        self.max_buffer_bytes = SSE_MAX_BUFFER_BYTES if max_buffer_bytes is None else max_buffer_bytes
+        self.write_timeout = SSE_WRITE_TIMEOUT_S if write_timeout is None else write_timeout
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        guard = _StreamGuard(send, receive, self.write_timeout, account_sends=False, slice_bytes=_WRITE_SLICE_BYTES)
+        prefetch = _BoundedPrefetch(self.body_iterator, self.sep, guard, self.max_buffer_bytes)
+        self.body_iterator = prefetch
+        sse_stats.open_streams += 1
+        sse_stats.opened_total += 1
+        try:
+            await super().__call__(scope, guard.receive, guard.send)
+        finally:
+            sse_stats.open_streams -= 1
+            await prefetch.aclose()
+            guard.release()
+
+
+class SSEGuardASGI:
+    """외부 SSE 앱(FastMCP 서브앱)에 쓰기 타임아웃과 스트림 지표를 적용하는 ASGI 래퍼.
+
+    - GET 요청이고 응답 content-type이 text/event-stream일 때만 스트림으로 집계한다.
+    """
+
+    def __init__(self, app: Any, write_timeout: Optional[float] = None) -> None:
+        self.app = app
+        self.write_timeout = SSE_WRITE_TIMEOUT_S if write_timeout is None else write_timeout
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> Any:
+        if scope["type"] != "http" or scope.get("method") != "GET":
+            return await self.app(scope, receive, send)
+
+        guard = _StreamGuard(send, receive, self.write_timeout)
+        is_stream = False
+
+        async def guarded_send(message: Dict[str, Any]) -> None:
+            nonlocal is_stream
+            if message["type"] == "http.response.start":
+                for key, value in message.get("headers", []):
+                    if key.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        is_stream = True
+                        sse_stats.open_streams += 1
+                        sse_stats.opened_total += 1
+                        break
+            if is_stream:
+                return await guard.send(message)
+            return await send(message)
+
+        try:
+            return await self.app(scope, guard.receive, guarded_send)
+        finally:
+            if is_stream:
+                sse_stats.open_streams -= 1
+            guard.release()
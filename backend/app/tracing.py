@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# request_id를 주고받을 헤더 이름 (수신/업스트림 전달 모두 동일 헤더 사용)
+REQUEST_ID_HEADER = os.getenv("MCP_REQUEST_ID_HEADER", "X-Request-ID")
+
+# 0.0(기본)이면 스팬을 전혀 기록하지 않는다. 1.0이면 모든 요청을 기록.
+try:
+    TRACE_SAMPLE_RATE = max(0.0, min(1.0, float(os.getenv("MCP_TRACE_SAMPLE_RATE", "0") or 0)))
+except ValueError:
+    TRACE_SAMPLE_RATE = 0.0
+
+_MAX_INCOMING_ID_LEN = 128
+
+trace_logger = logging.getLogger("mcp_hub.trace")
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class Trace:
+    """단일 툴 호출의 request_id와 (샘플링된 경우) 스팬 목록을 보관한다.
+
+    - sampled가 False면 span()/add()는 아무것도 기록하지 않는다.
+    - 스팬 시각은 trace 시작 기준 상대값(ms)으로 기록한다.
+    """
+
+    __slots__ = ("request_id", "sampled", "attrs", "spans", "_t0")
+
+    def __init__(self, request_id: str, sampled: bool, **attrs: Any) -> None:
+        self.request_id = request_id
+        self.sampled = sampled
+        self.attrs: Dict[str, Any] = attrs
+        self.spans: List[Dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+
+    def add(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """perf_counter 기준 start/end로 스팬 하나를 기록한다."""
+        if not self.sampled:
+            return
+        span: Dict[str, Any] = {
+            "name": name,
+            "start_ms": round((start - self._t0) * 1000.0, 3),
+            "dur_ms": round((end - start) * 1000.0, 3),
+        }
+        if attrs:
+            span.update(attrs)
+        self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        if not self.sampled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter(), **attrs)
+
+    def finish(self, **attrs: Any) -> None:
+        """샘플링된 trace를 JSON 한 줄로 내보낸다(큐 기반 비동기 로그 핸들러)."""
+        if not self.sampled:
+            return
+        record: Dict[str, Any] = {
+            "event": "tool.call.trace",
+            "request_id": self.request_id,
+            "ts": time.time(),
+            "total_ms": round((time.perf_counter() - self._t0) * 1000.0, 3),
+        }
+        record.update(self.attrs)
+        record.update(attrs)
+        record["spans"] = self.spans
+        _ensure_listener()
+        trace_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+# 샘플링되지 않은 호출이 공유하는 no-op trace (request_id 없음)
+NOOP_TRACE = Trace("", sampled=False)
+
+_current_trace: ContextVar[Trace] = ContextVar("mcp_hub_trace", default=NOOP_TRACE)
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """헤더로 받은 request_id가 유효하면 재사용하고, 아니면 새로 생성한다."""
+    if incoming:
+        candidate = incoming.strip()
+        if 0 < len(candidate) <= _MAX_INCOMING_ID_LEN and candidate.isprintable():
+            return candidate
+    return uuid.uuid4().hex
+
+
+def start_trace(request_id: str, **attrs: Any) -> Trace:
+    """요청 단위 trace를 만들고 현재 컨텍스트에 바인딩한다."""
+    sampled = TRACE_SAMPLE_RATE > 0.0 and (TRACE_SAMPLE_RATE >= 1.0 or random.random() < TRACE_SAMPLE_RATE)
+    trace = Trace(request_id, sampled, **attrs)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Trace:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    return _current_trace.get().request_id or None
+
+
+class HttpxTraceHook:
+    """httpx(httpcore)의 `trace` extension 콜백으로 connect/TTFB 스팬을 기록한다."""
+
+    __slots__ = ("trace", "_started")
+
+    def __init__(self, trace: Trace) -> None:
+        self.trace = trace
+        self._started: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        now = time.perf_counter()
+        if event_name.endswith(".started"):
+            self._started[event_name[: -len(".started")]] = now
+            return
+        if not event_name.endswith(".complete"):
+            return
+        key = event_name[: -len(".complete")]
+        if key == "connection.connect_tcp":
+            self.trace.add("upstream.connect", self._started.get(key, now), now)
+        elif key == "connection.start_tls":
+            self.trace.add("upstream.tls", self._started.get(key, now), now)
+        elif key.endswith(".receive_response_headers"):
+            # 요청 헤더 송신 시작부터 응답 헤더 수신 완료까지를 TTFB로 본다.
+            proto = key.split(".", 1)[0]
+            start = self._started.get(f"{proto}.send_request_headers", self._started.get(key, now))
+            self.trace.add("upstream.ttfb", start, now)
+
+
+def _ensure_listener() -> None:
+    """최초 export 시 QueueHandler/QueueListener를 구성한다(이벤트 루프 비차단)."""
+    global _listener
+    if _listener is not None:
+        return
+    log_file = os.getenv("MCP_TRACE_LOG_FILE")
+    target: logging.Handler = logging.FileHandler(log_file) if log_file else logging.StreamHandler(sys.stderr)
+    target.setFormatter(logging.Formatter("%(message)s"))
+    q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    trace_logger.addHandler(logging.handlers.QueueHandler(q))
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+    _listener = logging.handlers.QueueListener(q, target)
+    _listener.start()
+    atexit.register(_listener.stop)
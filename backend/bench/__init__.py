@@ -0,0 +1 @@
+"""오프라인 벤치마크/부하 테스트 도구 모음 (네트워크 불필요)."""
@@ -0,0 +1,548 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+
+from .mock_upstream import MockOptions, MockUpstream
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCENARIOS = ("tool", "tools_call", "tools_list", "sdk", "http", "http_batch")
+# http_batch 시나리오의 배치당 tools/call 수
+HTTP_BATCH_SIZE = 10
+
+# 벤치마크 전용 서버/툴 (main.py 시드와 같은 형태, baseUrl만 목 업스트림으로 교체)
+BENCH_SERVERS: Dict[str, Dict[str, Any]] = {
+    "bench_store": {"name": "Bench Store", "defaultHeaders": {"Accept": "application/json"}},
+    "bench_fruits": {"name": "Bench Fruits", "defaultHeaders": {"Accept": "application/json"}},
+}
+BENCH_TOOLS: Dict[str, List[Dict[str, Any]]] = {
+    "bench_store": [
+        {
+            "name": "get_all_products",
+            "method": "GET",
+            "pathTemplate": "/products",
+            "inputSchema": {"type": "object", "properties": {}},
+        },
+        {
+            "name": "get_product_by_id",
+            "method": "GET",
+            "pathTemplate": "/products/{id}",
+            "paramMapping": {"path": {"id": "id"}},
+            "inputSchema": {"type": "object", "properties": {"id": {"type": "integer"}}, "required": ["id"]},
+        },
+    ],
+    "bench_fruits": [
+        {
+            "name": "update_fruit",
+            "method": "PUT",
+            "pathTemplate": "/fruits/{id}",
+            "paramMapping": {"path": {"id": "id"}, "body": {"name": "name", "color": "color", "calories": "calories"}},
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer", "minimum": 1},
+                    "name": {"type": "string"},
+                    "color": {"type": "string"},
+                    "calories": {"type": "integer", "minimum": 0},
+                },
+                "required": ["id"],
+            },
+        },
+    ],
+}
+
+
+@dataclass
+class ScenarioResult:
+    """시나리오 하나의 측정값(ms 단위 지연 목록 포함)."""
+    name: str
+    concurrency: int
+    requests: int = 0
+    errors: int = 0
+    elapsed_s: float = 0.0
+    latencies_ms: List[float] = field(default_factory=list)
+    ttfe_ms: List[float] = field(default_factory=list)
+    memory_kb: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "rps": round(self.requests / self.elapsed_s, 2) if self.elapsed_s else 0.0,
+            "latency_ms": _percentiles(self.latencies_ms),
+            # SSE가 아닌 시나리오는 첫 이벤트가 없으므로 0이 아니라 null로 남긴다.
+            "ttfe_ms": _percentiles(self.ttfe_ms) if self.ttfe_ms else None,
+            "memory_kb": self.memory_kb,
+        }
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(p: float) -> float:
+        # nearest-rank 방식
+        idx = max(0, min(len(ordered) - 1, int(round(p / 100.0 * len(ordered))) - 1))
+        return round(ordered[idx], 3)
+
+    return {
+        "p50": pick(50),
+        "p95": pick(95),
+        "p99": pick(99),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _read_proc_memory(pid: Optional[int]) -> Dict[str, int]:
+    """/proc/{pid}/status에서 RSS/최대 RSS(kB)를 읽는다(리눅스 외에는 빈 dict)."""
+    if pid is None:
+        return {}
+    out: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    out["rss_kb" if key == "VmRSS" else "peak_rss_kb"] = int(value.split()[0])
+    except OSError:
+        return {}
+    return out
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+class HubProcess:
+    """허브를 별도 uvicorn 프로세스로 띄운다(메모리를 하네스와 분리해서 측정하기 위함)."""
+
+    def __init__(self, port: int, extra_env: Optional[Dict[str, str]] = None) -> None:
+        self.port = port
+        self.extra_env = extra_env or {}
+        self.proc: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 30.0) -> "HubProcess":
+        env = dict(os.environ)
+        env.update(self.extra_env)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+        self.proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "backend.app.main:app",
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--log-level", "warning", "--no-access-log",
+            ],
+            cwd=REPO_ROOT,
+            env=env,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"hub exited early with code {self.proc.returncode}")
+            try:
+                if httpx.get(self.base_url + "/healthz", timeout=1.0).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("hub did not become healthy in time")
+
+    def stop(self) -> None:
+        if self.proc is None:
+            return
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+async def register_bench_servers(client: httpx.AsyncClient, hub_url: str, upstream_url: str) -> None:
+    """목 업스트림을 가리키는 벤치 서버/툴을 /api로 등록한다(FastMCP 등록 포함)."""
+    for server_id, cfg in BENCH_SERVERS.items():
+        r = await client.post(f"{hub_url}/api/servers/{server_id}", json={**cfg, "baseUrl": upstream_url})
+        r.raise_for_status()
+        for tool in BENCH_TOOLS[server_id]:
+            r = await client.post(f"{hub_url}/api/tools/{server_id}/{tool['name']}", json=tool)
+            r.raise_for_status()
+
+
+async def _sse_events(resp: httpx.Response) -> AsyncIterator[Tuple[str, str]]:
+    """SSE 응답을 (event, data) 쌍으로 파싱한다."""
+    event, data = "message", []
+    async for line in resp.aiter_lines():
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "event":
+            event = value
+        elif name == "data":
+            data.append(value)
+
+
+async def _call_sse_tool(client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> Tuple[bool, Optional[float]]:
+    """SSE 툴 호출 하나를 끝까지 읽는다. (성공 여부, 첫 이벤트까지 ms)를 반환."""
+    t0 = time.perf_counter()
+    ttfe: Optional[float] = None
+    ok = False
+    async with client.stream("POST", url, json=payload, headers={"Accept": "text/event-stream"}) as resp:
+        if resp.status_code >= 400:
+            await resp.aread()
+            return False, None
+        async for event, data in _sse_events(resp):
+            if ttfe is None:
+                ttfe = (time.perf_counter() - t0) * 1000.0
+            if event == "tool_call.completed":
+                try:
+                    ok = int(json.loads(data).get("status", 200)) < 400
+                except Exception:
+                    ok = True
+                break
+            if event == "tool_call.error":
+                break
+    return ok, ttfe
+
+
+async def _call_http_rpc(client: httpx.AsyncClient, url: str, payload: Any) -> Tuple[bool, Optional[float]]:
+    """/mcp-http JSON-RPC 요청(단일 또는 배치) 하나. 모든 응답이 성공이어야 ok."""
+    r = await client.post(url, json=payload, headers={"Accept": "application/json"})
+    if r.status_code >= 400:
+        return False, None
+    body = r.json()
+    messages = body if isinstance(body, list) else [body]
+    ok = all("error" not in m and not (m.get("result") or {}).get("isError", False) for m in messages)
+    return ok, None
+
+
+async def _run_workers(
+    name: str,
+    concurrency: int,
+    duration_s: float,
+    max_requests: Optional[int],
+    one_call: Callable[[int], Awaitable[Tuple[bool, Optional[float]]]],
+) -> ScenarioResult:
+    """concurrency개의 워커가 duration 동안(혹은 max_requests까지) one_call을 반복한다."""
+    result = ScenarioResult(name=name, concurrency=concurrency)
+    deadline = time.perf_counter() + duration_s
+    counter = 0
+
+    async def worker() -> None:
+        nonlocal counter
+        while time.perf_counter() < deadline:
+            if max_requests is not None and counter >= max_requests:
+                return
+            counter += 1
+            seq = counter
+            t0 = time.perf_counter()
+            try:
+                ok, ttfe = await one_call(seq)
+            except Exception:
+                ok, ttfe = False, None
+            result.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
+            if ttfe is not None:
+                result.ttfe_ms.append(ttfe)
+            result.requests += 1
+            if not ok:
+                result.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed_s = time.perf_counter() - started
+    return result
+
+
+async def _scenario_sdk(
+    hub_url: str, concurrency: int, duration_s: float, max_requests: Optional[int], timeout: float
+) -> ScenarioResult:
+    """/mcp-sdk SSE 세션을 워커마다 하나씩 열고 /messages로 tools/call을 반복한다."""
+    result = ScenarioResult(name="sdk", concurrency=concurrency)
+    deadline = time.perf_counter() + duration_s
+    counter = 0
+    limits = httpx.Limits(max_connections=concurrency * 2 + 4, max_keepalive_connections=concurrency * 2 + 4)
+
+    async def worker(wid: int) -> None:
+        nonlocal counter
+        async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+            async with client.stream("GET", f"{hub_url}/mcp-sdk/sse") as resp:
+                events = _sse_events(resp)
+                endpoint = ""
+                async for event, data in events:
+                    if event == "endpoint":
+                        endpoint = data
+                        break
+                if not endpoint:
+                    raise RuntimeError(f"sdk worker {wid}: no endpoint event (status {resp.status_code})")
+                messages_url = urljoin(hub_url + "/", endpoint)
+
+                async def rpc(msg_id: int, method: str, params: Dict[str, Any]) -> bool:
+                    r = await client.post(messages_url, json={"jsonrpc": "2.0", "id": msg_id, "method": method, "params": params})
+                    if r.status_code >= 400:
+                        return False
+                    async for event, data in events:
+                        if event != "message":
+                            continue
+                        msg = json.loads(data)
+                        if msg.get("id") == msg_id:
+                            return "error" not in msg and not (msg.get("result") or {}).get("isError", False)
+                    return False
+
+                initialized = await rpc(0, "initialize", {
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": {},
+                    "clientInfo": {"name": "mcp-hub-loadtest", "version": "0.1.0"},
+                })
+                if not initialized:
+                    raise RuntimeError(f"sdk worker {wid}: initialize failed")
+                await client.post(messages_url, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+                msg_id = 0
+                while time.perf_counter() < deadline:
+                    if max_requests is not None and counter >= max_requests:
+                        return
+                    counter += 1
+                    msg_id += 1
+                    t0 = time.perf_counter()
+                    # 응답이 세션 SSE로 오므로 요청별 첫 이벤트 시간은 따로 없다(왕복 지연만 기록, ttfe는 null).
+                    try:
+                        ok = await rpc(msg_id, "tools/call", {
+                            "name": "bench_store.get_product_by_id",
+                            "arguments": {"args": {"id": (msg_id + wid) % 20 + 1}},
+                        })
+                    except Exception:
+                        ok = False
+                    result.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
+                    result.requests += 1
+                    if not ok:
+                        result.errors += 1
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(worker(i) for i in range(concurrency)), return_exceptions=True)
+    result.elapsed_s = time.perf_counter() - started
+    # 세션 연결·initialize에서 죽은 워커는 오류로 센다. 모두 죽었으면 측정값이 없으므로 실행 자체를 실패시킨다.
+    failures = [o for o in outcomes if isinstance(o, BaseException)]
+    for exc in failures:
+        print(f"sdk worker failed: {exc!r}", file=sys.stderr)
+    result.errors += len(failures)
+    if failures and len(failures) == len(outcomes):
+        raise RuntimeError(f"sdk scenario: all {len(failures)} workers failed (first: {failures[0]!r})")
+    return result
+
+
+async def run_scenarios(
+    hub_url: str,
+    scenarios: List[str],
+    concurrency: int,
+    duration_s: float,
+    max_requests: Optional[int],
+    timeout: float,
+    hub_pid: Optional[int],
+) -> Dict[str, Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=concurrency + 4, max_keepalive_connections=concurrency + 4)
+    out: Dict[str, Dict[str, Any]] = {}
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        calls: Dict[str, Callable[[int], Awaitable[Tuple[bool, Optional[float]]]]] = {
+            "tool": lambda seq: _call_sse_tool(
+                client, f"{hub_url}/mcp/bench_store/get_product_by_id", {"args": {"id": seq % 20 + 1}}
+            ),
+            "tools_call": lambda seq: _call_sse_tool(
+                client,
+                f"{hub_url}/mcp/bench_fruits/tools/call",
+                {"name": "update_fruit", "args": {"id": seq % 20 + 1, "name": "Mikan", "color": "Orange", "calories": 35}},
+            ),
+            "tools_list": lambda seq: _get_ok(client, f"{hub_url}/mcp/bench_store/tools/list"),
+            "http": lambda seq: _call_http_rpc(
+                client,
+                f"{hub_url}/mcp-http/bench_store",
+                {"jsonrpc": "2.0", "id": seq, "method": "tools/call",
+                 "params": {"name": "get_product_by_id", "arguments": {"id": seq % 20 + 1}}},
+            ),
+            # 요청 하나에 HTTP_BATCH_SIZE개 호출(요청 수/RPS는 배치 단위로 집계)
+            "http_batch": lambda seq: _call_http_rpc(
+                client,
+                f"{hub_url}/mcp-http/bench_store",
+                [
+                    {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                     "params": {"name": "get_product_by_id", "arguments": {"id": (seq + i) % 20 + 1}}}
+                    for i in range(HTTP_BATCH_SIZE)
+                ],
+            ),
+        }
+        for name in scenarios:
+            before = _read_proc_memory(hub_pid)
+            if name == "sdk":
+                res = await _scenario_sdk(hub_url, concurrency, duration_s, max_requests, timeout)
+            else:
+                res = await _run_workers(name, concurrency, duration_s, max_requests, calls[name])
+            after = _read_proc_memory(hub_pid)
+            if before or after:
+                res.memory_kb = {
+                    "rss_before_kb": before.get("rss_kb", 0),
+                    "rss_after_kb": after.get("rss_kb", 0),
+                    "peak_rss_kb": after.get("peak_rss_kb", 0),
+                }
+            out[name] = res.summary()
+            print(_format_line(name, out[name]), flush=True)
+    return out
+
+
+async def _get_ok(client: httpx.AsyncClient, url: str) -> Tuple[bool, Optional[float]]:
+    r = await client.get(url)
+    return r.status_code < 400, None
+
+
+def _format_line(name: str, s: Dict[str, Any]) -> str:
+    lat = s.get("latency_ms") or {}
+    ttfe = s.get("ttfe_ms")
+    ttfe_text = f"{ttfe['p50']:.1f}ms" if ttfe else "-"
+    return (
+        f"{name:<11} rps={s['rps']:>9.1f} n={s['requests']:<6} err={s['errors']:<4} "
+        f"p50={lat.get('p50', 0):.1f} p95={lat.get('p95', 0):.1f} p99={lat.get('p99', 0):.1f}ms "
+        f"ttfe.p50={ttfe_text} rss={s.get('memory_kb', {}).get('rss_after_kb', '-')}kB"
+    )
+
+
+def cmd_run(ns: argparse.Namespace) -> int:
+    opts = MockOptions(
+        latency_ms=ns.latency_ms,
+        jitter_ms=ns.jitter_ms,
+        items=ns.items,
+        description_bytes=ns.description_bytes,
+        error_rate=ns.error_rate,
+        seed=ns.seed,
+    )
+    upstream = MockUpstream(opts).start()
+    hub: Optional[HubProcess] = None
+    try:
+        if ns.hub_url:
+            hub_url, hub_pid = ns.hub_url.rstrip("/"), None
+        else:
+            hub = HubProcess(_free_port()).start()
+            hub_url, hub_pid = hub.base_url, hub.proc.pid if hub.proc else None
+
+        async def _main() -> Dict[str, Dict[str, Any]]:
+            async with httpx.AsyncClient(timeout=ns.timeout) as client:
+                await register_bench_servers(client, hub_url, upstream.base_url)
+            return await run_scenarios(
+                hub_url, ns.scenarios, ns.concurrency, ns.duration, ns.requests, ns.timeout, hub_pid
+            )
+
+        results = asyncio.run(_main())
+    finally:
+        if hub is not None:
+            hub.stop()
+        upstream.stop()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "hub_url": ns.hub_url or "spawned",
+            "concurrency": ns.concurrency,
+            "duration_s": ns.duration,
+            "mock": opts.__dict__,
+        },
+        "scenarios": results,
+    }
+    out_path = Path(ns.out or REPO_ROOT / "bench_results" / f"loadtest-{report['meta']['commit'] or 'local'}.json")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"saved: {out_path}")
+    return 0
+
+
+def cmd_compare(ns: argparse.Namespace) -> int:
+    """두 결과 파일의 rps/p50/p95/p99/ttfe를 시나리오별로 비교 출력한다."""
+    base = json.loads(Path(ns.baseline).read_text(encoding="utf-8"))
+    cand = json.loads(Path(ns.candidate).read_text(encoding="utf-8"))
+    print(f"baseline={base['meta'].get('commit')} candidate={cand['meta'].get('commit')}")
+    for name, b in base.get("scenarios", {}).items():
+        c = cand.get("scenarios", {}).get(name)
+        if not c:
+            continue
+        rows = [("rps", b.get("rps", 0), c.get("rps", 0))]
+        for key in ("p50", "p95", "p99"):
+            rows.append((f"lat.{key}", b.get("latency_ms", {}).get(key, 0), c.get("latency_ms", {}).get(key, 0)))
+        if b.get("ttfe_ms") and c.get("ttfe_ms"):
+            rows.append(("ttfe.p50", b["ttfe_ms"].get("p50", 0), c["ttfe_ms"].get("p50", 0)))
+        rows.append(("peak_rss_kb", b.get("memory_kb", {}).get("peak_rss_kb", 0), c.get("memory_kb", {}).get("peak_rss_kb", 0)))
+        print(f"[{name}]")
+        for label, bv, cv in rows:
+            delta = ((cv - bv) / bv * 100.0) if bv else 0.0
+            print(f"  {label:<12} {bv:>12.2f} -> {cv:>12.2f}  ({delta:+.1f}%)")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MCP Hub 오프라인 E2E 부하 테스트")
+    sub = parser.add_subparsers(dest="cmd")
+
+    run = sub.add_parser("run", help="목 업스트림 + 허브를 띄우고 시나리오를 실행")
+    run.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--duration", type=float, default=10.0, help="시나리오별 실행 시간(초)")
+    run.add_argument("--requests", type=int, default=None, help="시나리오별 최대 요청 수")
+    run.add_argument("--timeout", type=float, default=30.0)
+    run.add_argument("--hub-url", default=None, help="이미 떠 있는 허브를 대상으로 실행(메모리 측정 생략)")
+    run.add_argument("--latency-ms", type=float, default=20.0)
+    run.add_argument("--jitter-ms", type=float, default=5.0)
+    run.add_argument("--items", type=int, default=20)
+    run.add_argument("--description-bytes", type=int, default=200)
+    run.add_argument("--error-rate", type=float, default=0.0)
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--out", default=None, help="결과 JSON 경로(기본: bench_results/loadtest-<commit>.json)")
+    run.set_defaults(func=cmd_run)
+
+    cmp_ = sub.add_parser("compare", help="두 결과 JSON 비교")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("candidate")
+    cmp_.set_defaults(func=cmd_compare)
+
+    ns = parser.parse_args(argv)
+    if not getattr(ns, "func", None):
+        parser.print_help()
+        return 2
+    return ns.func(ns)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..app.bindings import BindingInterner
+from ..app.models import HttpMethod, ParamMapping, ResponseMapping, ToolBinding
+from ..app.registry import InMemoryRegistry
+
+
+# 실제 카탈로그처럼 리소스·스키마·매핑이 반복되는 툴 정의를 만든다.
+_RESOURCES = 200
+_SCHEMAS: List[Dict[str, Any]] = [
+    {"type": "object", "properties": {"id": {"type": "integer", "minimum": 1}}, "required": ["id"]},
+    {"type": "object", "properties": {}},
+    {"type": "object", "properties": {"page": {"type": "integer"}, "pageSize": {"type": "integer", "maximum": 100}}},
+    {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "price": {"type": "number"},
+            "description": {"type": "string"},
+            "category": {"type": "string"},
+            "image": {"type": "string", "format": "uri"},
+        },
+        "required": ["title", "price"],
+    },
+    {
+        "type": "object",
+        "properties": {"id": {"type": "integer", "minimum": 1}, "name": {"type": "string"}, "color": {"type": "string"}},
+        "required": ["id"],
+    },
+]
+
+
+def _binding(i: int) -> ToolBinding:
+    resource = f"resource{i % _RESOURCES}"
+    kind = i % len(_SCHEMAS)
+    if kind == 0:
+        method, path, mapping = HttpMethod.GET, f"/{resource}/{{id}}", ParamMapping(path={"id": "id"})
+    elif kind == 1:
+        method, path, mapping = HttpMethod.GET, f"/{resource}", ParamMapping()
+    elif kind == 2:
+        method, path, mapping = HttpMethod.GET, f"/{resource}", ParamMapping(query={"page": "page", "pageSize": "pageSize"})
+    elif kind == 3:
+        body = {k: k for k in ("title", "price", "description", "category", "image")}
+        method, path, mapping = HttpMethod.POST, f"/{resource}", ParamMapping(body=body)
+    else:
+        method, path, mapping = HttpMethod.PUT, f"/{resource}/{{id}}", ParamMapping(
+            path={"id": "id"}, body={"name": "name", "color": "color"}
+        )
+    return ToolBinding(
+        name=f"tool_{i}",
+        description=f"{method.value} {resource}",
+        method=method,
+        pathTemplate=path,
+        paramMapping=mapping,
+        inputSchema=_SCHEMAS[kind],
+        responseMapping=ResponseMapping(pick="$.data") if i % 10 == 0 else None,
+    )
+
+
+def _bindings(count: int) -> Iterator[ToolBinding]:
+    # API로 들어오는 것처럼 매 툴마다 JSON에서 새로 검증한다(스키마 dict를 서로 공유하지 않음).
+    for i in range(count):
+        yield ToolBinding.model_validate_json(_binding(i).model_dump_json())
+
+
+def _retained_bytes(build: Callable[[], Any]) -> int:
+    """build()가 만든 객체가 붙잡고 있는 메모리(바이트)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def run(count: int) -> Dict[str, Any]:
+    def models_only() -> Dict[str, ToolBinding]:
+        # 이전 레지스트리와 같은 보관 형태: 서버별 {name: ToolBinding}
+        return {binding.name: binding for binding in _bindings(count)}
+
+    def compact_registry() -> InMemoryRegistry:
+        registry = InMemoryRegistry(interner=BindingInterner())
+        for binding in _bindings(count):
+            registry.upsert_tool("bench", binding.name, binding)
+        return registry
+
+    before = _retained_bytes(models_only)
+    after = _retained_bytes(compact_registry)
+    stats = compact_registry().stats()
+    return {
+        "tools": count,
+        "pydanticBytesPerTool": round(before / count, 1),
+        "compactBytesPerTool": round(after / count, 1),
+        "reduction": round(before / after, 2) if after else None,
+        "registry": stats,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="툴 바인딩 보관 메모리(툴당 바이트) 비교: pydantic 모델 vs 압축 레코드")
+    parser.add_argument("--tools", type=int, default=100_000)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    ns = parser.parse_args(argv)
+
+    report = run(ns.tools)
+    print(f"tools: {report['tools']:,}")
+    print(f"pydantic ToolBinding : {report['pydanticBytesPerTool']:>10,.1f} B/tool")
+    print(f"compact ToolRecord   : {report['compactBytesPerTool']:>10,.1f} B/tool   (x{report['reduction']} smaller)")
+    print(f"shared: {json.dumps(report['registry'])}")
+    if ns.out:
+        Path(ns.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from ..app.http_adapter import (
+    _build_body, _build_headers, _build_query, _decode_body, _interpolate_path, _passthrough_json,
+)
+from ..app.models import AuthType, HttpMethod, ParamMapping, ResponseMapping, ToolBinding
+from ..app.registry import registry
+from ..app.routes_mcp_meta import tools_list
+from ..app.shaping import apply_pick as _apply_pick, compile_response
+from .mock_upstream import MockOptions, _fruit, _product
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "micro.json"
+DEFAULT_THRESHOLD = 1.30  # 기준 대비 30% 이상 느려지면 회귀로 판단
+
+UPDATE_FRUIT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer", "minimum": 1},
+        "name": {"type": "string"},
+        "color": {"type": "string"},
+        "origin": {"type": "string"},
+        "calories": {"type": "integer", "minimum": 0},
+        "season": {"type": "string", "enum": ["Spring", "Summer", "Autumn", "Winter"]},
+        "type": {"type": "string"},
+        "weight": {"type": "string"},
+        "nutrients": {
+            "type": "object",
+            "properties": {
+                "vitaminC": {"type": "string"},
+                "fiber": {"type": "string"},
+                "potassium": {"type": "string"},
+            },
+            "additionalProperties": False,
+        },
+        "taste": {"type": "string"},
+        "availability": {"type": "string"},
+    },
+    "required": ["id"],
+}
+UPDATE_FRUIT_BODY = {k: k for k in UPDATE_FRUIT_SCHEMA["properties"] if k != "id"}
+UPDATE_FRUIT_ARGS: Dict[str, Any] = {
+    "id": 7, "name": "Mikan", "color": "Orange", "origin": "JP", "calories": 35, "season": "Winter",
+    "type": "Citrus", "weight": "80g", "nutrients": {"vitaminC": "high", "fiber": "medium"},
+    "taste": "sweet", "availability": "Seasonal",
+}
+
+
+def _run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """중간에 실제로 대기하지 않는 코루틴을 이벤트 루프 없이 끝까지 실행한다."""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended; cannot run synchronously")
+
+
+def _bench_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """(이름, 무인자 호출 가능 객체) 목록. setup은 여기서 한 번만 수행한다."""
+    cases: List[Tuple[str, Callable[[], Any]]] = []
+
+    # --- http_adapter 요청 조립 ---
+    cases.append(("interpolate_path", lambda: _interpolate_path("/fruits/{id}", {"id": "id"}, UPDATE_FRUIT_ARGS)))
+    base_headers = {"Accept": "application/json", "User-Agent": "mcp-hub"}
+    cases.append((
+        "build_headers",
+        lambda: _build_headers(base_headers, {"X-Trace": "trace"}, {"trace": "t-1"}, AuthType.bearer, None, "sk-test"),
+    ))
+    cases.append((
+        "build_query",
+        lambda: _build_query({"page": "page", "pageSize": "pageSize"}, {"page": 2, "pageSize": 50}, AuthType.query, "api_key", "k"),
+    ))
+    cases.append(("build_body", lambda: _build_body(UPDATE_FRUIT_BODY, None, UPDATE_FRUIT_ARGS)))
+
+    # --- JSONPath pick (실제 상품 목록 형태) ---
+    opts = MockOptions(items=20, description_bytes=200)
+    products = [_product(i, opts) for i in range(1, 21)]
+    cases.append(("pick_titles_20_products", lambda: _apply_pick(products, "$[*].title")))
+    big_products = [_product(i, opts) for i in range(1, 1001)]
+    cases.append(("pick_titles_1k_products", lambda: _apply_pick(big_products, "$[*].title")))
+    fruit_page = {"page": 1, "pageSize": 50, "data": [_fruit(i, opts) for i in range(1, 51)]}
+    cases.append(("pick_nested_fruit_page", lambda: _apply_pick(fruit_page, "$.data[*].nutrients.vitaminC")))
+
+    # --- 컴파일된 응답 규칙: 필드 투영·문자열 자르기·바이트 상한(파싱된 상품 1,000개 → JSON 바이트) ---
+    project = compile_response(ResponseMapping(fields=["id", "title", "price"]))
+    cases.append(("shape_fields_3_1k_products", lambda: project.shape(big_products)))
+    trimmed = compile_response(ResponseMapping(maxItems=100, maxStringLength=64))
+    cases.append(("shape_slice_truncate_1k_products", lambda: trimmed.shape(big_products)))
+    budget = compile_response(ResponseMapping(fields=["id", "title", "description"], maxBytes=16 * 1024))
+    cases.append(("shape_budget_16k_1k_products", lambda: budget.shape(big_products)))
+
+    # --- pick 없는 JSON 응답 → SSE data 바이트: 파싱·재직렬화 vs 원본 전달 ---
+    listing = json.dumps(big_products).encode("utf-8")
+    pretty_listing = json.dumps(big_products, indent=2).encode("utf-8")
+    cases.append((
+        "response_parse_dumps_1k",
+        lambda: json.dumps(_decode_body(listing, "utf-8", True)[0]).encode("utf-8"),
+    ))
+    cases.append(("response_passthrough_1k", lambda: _passthrough_json(listing, "utf-8")))
+    cases.append(("response_passthrough_pretty_1k", lambda: _passthrough_json(pretty_listing, "utf-8")))
+
+    # --- inputSchema 검증(update_fruit) ---
+    from jsonschema import validate  # type: ignore
+
+    cases.append(("validate_update_fruit", lambda: validate(instance=UPDATE_FRUIT_ARGS, schema=UPDATE_FRUIT_SCHEMA)))
+
+    # --- 세션 ID 정규화 / ASGI 래퍼 ---
+    from ..app.fastmcp_runtime import MessagesNormalizerASGI, _normalize_uuid_if_possible
+
+    cases.append(("normalize_uuid_hyphenated", lambda: _normalize_uuid_if_possible("6F9619FF-8B86-D011-B42D-00C04FC964FF")))
+    cases.append(("normalize_uuid_hex", lambda: _normalize_uuid_if_possible("6f9619ff8b86d011b42d00c04fc964ff")))
+
+    async def _inner(scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        return None
+
+    normalizer = MessagesNormalizerASGI(_inner, message_path="/messages")
+    msg_scope = {
+        "type": "http", "method": "POST", "path": "/messages/", "root_path": "",
+        "query_string": b"session_id=6F9619FF-8B86-D011-B42D-00C04FC964FF",
+    }
+    sse_scope = {"type": "http", "method": "GET", "path": "/sse", "root_path": "", "query_string": b""}
+    other_scope = {"type": "http", "method": "GET", "path": "/sse", "root_path": "", "query_string": b"foo=bar&baz=1"}
+    cases.append(("normalizer_messages", lambda: _run_sync(normalizer(msg_scope, None, None))))
+    cases.append(("normalizer_sse_connect", lambda: _run_sync(normalizer(sse_scope, None, None))))
+    cases.append(("normalizer_other_query", lambda: _run_sync(normalizer(other_scope, None, None))))
+
+    # --- tools.list 생성(10 / 1k / 10k 툴) ---
+    for count, label in ((10, "10"), (1_000, "1k"), (10_000, "10k")):
+        server_id = f"__bench_tools_{label}"
+        for i in range(count):
+            registry.upsert_tool(
+                server_id,
+                f"tool_{i}",
+                ToolBinding(
+                    name=f"tool_{i}",
+                    description=f"bench tool {i}",
+                    method=HttpMethod.GET,
+                    pathTemplate="/products/{id}",
+                    paramMapping=ParamMapping(path={"id": "id"}),
+                    inputSchema={"type": "object", "properties": {"id": {"type": "integer"}}, "required": ["id"]},
+                ),
+            )
+        cases.append((f"tools_list_{label}", lambda sid=server_id: _run_sync(tools_list(sid))))
+
+    return cases
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> float:
+    """timeit으로 1회 호출당 ns를 측정한다(repeat 중 최솟값 사용)."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    while elapsed < min_time:
+        number *= 2
+        elapsed = timer.timeit(number)
+    best = min([elapsed] + timer.repeat(repeat=repeat - 1, number=number))
+    return best / number * 1e9
+
+
+def _load_baseline(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="http_adapter/라우팅 핫패스 마이크로벤치마크")
+    parser.add_argument("--filter", default=None, help="이름에 이 문자열이 포함된 항목만 실행")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="반복당 최소 측정 시간(초)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--threshold", type=float, default=None, help="회귀 판단 배수(기본: 기준 파일 값 또는 1.30)")
+    parser.add_argument("--update-baseline", action="store_true", help="측정 결과로 기준 파일을 갱신")
+    parser.add_argument("--out", default=None, help="측정 결과 JSON 저장 경로")
+    ns = parser.parse_args(argv)
+
+    baseline_path = Path(ns.baseline)
+    baseline = _load_baseline(baseline_path)
+    base_results: Dict[str, Any] = baseline.get("results", {})
+    default_threshold = ns.threshold or float(baseline.get("threshold", DEFAULT_THRESHOLD))
+
+    results: Dict[str, Dict[str, float]] = {}
+    regressions: List[str] = []
+    for name, fn in _bench_cases():
+        if ns.filter and ns.filter not in name:
+            continue
+        ns_per_op = measure(fn, repeat=ns.repeat, min_time=ns.min_time)
+        results[name] = {"ns_per_op": round(ns_per_op, 1)}
+        line = f"{name:<28} {ns_per_op:>14,.1f} ns/op"
+        ref = base_results.get(name)
+        if ref and not ns.update_baseline:
+            threshold = ns.threshold or float(ref.get("threshold", default_threshold))
+            ratio = ns_per_op / float(ref["ns_per_op"])
+            status = "REGRESSION" if ratio > threshold else ("improved" if ratio < 1 / threshold else "ok")
+            line += f"   x{ratio:5.2f} vs baseline ({status})"
+            if ratio > threshold:
+                regressions.append(name)
+        print(line, flush=True)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "threshold": default_threshold,
+        "results": results,
+    }
+    if ns.out:
+        Path(ns.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if ns.update_baseline:
+        merged = dict(base_results)
+        for name, value in results.items():
+            # 항목별 threshold 설정은 유지
+            merged[name] = {**merged.get(name, {}), **value}
+        report["results"] = dict(sorted(merged.items()))
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline updated: {baseline_path}")
+        return 0
+    if regressions:
+        print(f"regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
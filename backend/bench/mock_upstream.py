@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+@dataclass
+class MockOptions:
+    """목 업스트림 동작 설정.
+
+    - latency_ms/jitter_ms: 응답마다 추가되는 지연(평균 ± 지터)
+    - items: 목록 응답(/products, /fruits)의 아이템 수
+    - description_bytes: 아이템 하나의 description 길이(페이로드 크기 조절)
+    - error_rate: 0~1 비율로 500 응답을 반환
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    items: int = 20
+    description_bytes: int = 200
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+def _product(i: int, opts: MockOptions) -> Dict[str, Any]:
+    return {
+        "id": i,
+        "title": f"Product {i}",
+        "price": round(9.99 + i * 1.25, 2),
+        "description": ("lorem ipsum " * (opts.description_bytes // 12 + 1))[: opts.description_bytes],
+        "category": ("electronics", "jewelery", "men's clothing", "women's clothing")[i % 4],
+        "image": f"https://example.invalid/img/{i}.jpg",
+        "rating": {"rate": round((i % 50) / 10.0, 1), "count": 100 + i},
+    }
+
+
+def _fruit(i: int, opts: MockOptions) -> Dict[str, Any]:
+    return {
+        "id": i,
+        "name": f"Fruit {i}",
+        "color": ("Red", "Yellow", "Green", "Orange")[i % 4],
+        "origin": "KR",
+        "calories": 30 + i % 70,
+        "season": ("Spring", "Summer", "Autumn", "Winter")[i % 4],
+        "type": "Berry",
+        "weight": f"{100 + i}g",
+        "nutrients": {"vitaminC": "high", "fiber": "medium", "potassium": "low"},
+        "taste": ("sweet " * (opts.description_bytes // 6 + 1))[: opts.description_bytes],
+        "availability": "Year-round",
+    }
+
+
+def create_mock_app(opts: Optional[MockOptions] = None) -> Starlette:
+    """FakeStore(/products, /carts)와 Fruits(/fruits) 응답 형태를 흉내 내는 ASGI 앱을 만든다."""
+    opts = opts or MockOptions()
+    rng = random.Random(opts.seed)
+    products: List[Dict[str, Any]] = [_product(i, opts) for i in range(1, opts.items + 1)]
+    fruits: List[Dict[str, Any]] = [_fruit(i, opts) for i in range(1, opts.items + 1)]
+    stats = {"requests": 0, "errors": 0}
+
+    async def _delay_or_error() -> Optional[JSONResponse]:
+        stats["requests"] += 1
+        if opts.latency_ms or opts.jitter_ms:
+            delay = max(0.0, opts.latency_ms + rng.uniform(-opts.jitter_ms, opts.jitter_ms))
+            await asyncio.sleep(delay / 1000.0)
+        if opts.error_rate and rng.random() < opts.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+        return None
+
+    async def _body(request: Request) -> Dict[str, Any]:
+        try:
+            data = await request.json()
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    async def product_list(request: Request) -> JSONResponse:
+        err = await _delay_or_error()
+        if err:
+            return err
+        if request.method == "POST":
+            return JSONResponse({"id": len(products) + 1, **await _body(request)}, status_code=201)
+        limit = request.query_params.get("limit")
+        return JSONResponse(products[: int(limit)] if limit else products)
+
+    async def product_item(request: Request) -> JSONResponse:
+        err = await _delay_or_error()
+        if err:
+            return err
+        pid = int(request.path_params["id"])
+        item = products[(pid - 1) % len(products)] if products else {"id": pid}
+        if request.method == "PUT":
+            return JSONResponse({**item, **await _body(request), "id": pid})
+        return JSONResponse(item)
+
+    async def cart_item(request: Request) -> JSONResponse:
+        err = await _delay_or_error()
+        if err:
+            return err
+        cid = int(request.path_params["id"])
+        lines = [{"productId": (cid + k) % max(1, len(products)) + 1, "quantity": k + 1} for k in range(3)]
+        return JSONResponse({"id": cid, "userId": 1, "date": "2020-03-02T00:00:00.000Z", "products": lines})
+
+    async def fruit_list(request: Request) -> JSONResponse:
+        err = await _delay_or_error()
+        if err:
+            return err
+        if request.method == "POST":
+            return JSONResponse({"id": len(fruits) + 1, **await _body(request)}, status_code=201)
+        page = max(1, int(request.query_params.get("page", "1")))
+        size = max(1, int(request.query_params.get("pageSize", str(len(fruits) or 1))))
+        start = (page - 1) * size
+        return JSONResponse({"page": page, "pageSize": size, "total": len(fruits), "data": fruits[start:start + size]})
+
+    async def fruit_item(request: Request) -> JSONResponse:
+        err = await _delay_or_error()
+        if err:
+            return err
+        fid = int(request.path_params["id"])
+        item = fruits[(fid - 1) % len(fruits)] if fruits else {"id": fid}
+        if request.method == "PUT":
+            return JSONResponse({**item, **await _body(request), "id": fid})
+        if request.method == "DELETE":
+            return JSONResponse({"id": fid, "deleted": True})
+        return JSONResponse(item)
+
+    async def mock_stats(request: Request) -> JSONResponse:
+        return JSONResponse(stats)
+
+    app = Starlette(
+        routes=[
+            Route("/products", product_list, methods=["GET", "POST"]),
+            Route("/products/{id:int}", product_item, methods=["GET", "PUT", "DELETE"]),
+            Route("/carts/{id:int}", cart_item, methods=["GET"]),
+            Route("/fruits", fruit_list, methods=["GET", "POST"]),
+            Route("/fruits/{id:int}", fruit_item, methods=["GET", "PUT", "DELETE"]),
+            Route("/_stats", mock_stats, methods=["GET"]),
+        ]
+    )
+    app.state.stats = stats
+    return app
+
+
+class MockUpstream:
+    """목 업스트림을 현재 프로세스의 별도 스레드(별도 이벤트 루프)에서 구동한다."""
+
+    def __init__(self, opts: Optional[MockOptions] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.app = create_mock_app(opts)
+        self.host = host
+        self.port = port
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> "MockUpstream":
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="mock-upstream", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("mock upstream failed to start")
+            time.sleep(0.02)
+        if self.port == 0:
+            # port=0으로 띄운 경우 실제 바인딩된 포트를 조회
+            self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FakeStore/Fruits 목 업스트림 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--description-bytes", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    ns = parser.parse_args()
+    opts = MockOptions(
+        latency_ms=ns.latency_ms,
+        jitter_ms=ns.jitter_ms,
+        items=ns.items,
+        description_bytes=ns.description_bytes,
+        error_rate=ns.error_rate,
+    )
+    uvicorn.run(create_mock_app(opts), host=ns.host, port=ns.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import { Dialog, DialogContent, DialogFooter, DialogHeader, DialogTitle, DialogT
 import { Label } from '@/components/ui/label'
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select'
 import { Switch } from '@/components/ui/switch'
+import { type RegistryMirror, selectTools, subscribeRegistry, summarize } from '@/lib/registryEvents'
 
 function App() {
   // 서버 생성/수정 폼 상태
@@ -46,6 +47,8 @@ function App() {
   const [servers, setServers] = useState<Record<string, any>>({})
   const [tools, setTools] = useState<Record<string, any>>({})
   const [stats, setStats] = useState<{ servers: number; tools: number; activeServers?: number; activeTools?: number }>({ servers: 0, tools: 0 })
+  // /api/events 스트림으로 유지하는 레지스트리 사본 (첫 스냅샷 전에는 null)
+  const [registryMirror, setRegistryMirror] = useState<RegistryMirror | null>(null)
 
   const [log, setLog] = useState<string[]>([])
   const logRef = useRef<HTMLDivElement>(null)
@@ -90,6 +93,8 @@ function App() {
    * 상단 요약 카드에 표시할 통계 갱신
    */
   const refreshStats = async () => {
+    // 스트림이 연결돼 있으면 사본에서 계산하므로 다시 요청하지 않음
+    if (registryMirror) return
     try {
       const data = await getJson('/api/stats')
       setStats({ 
@@ -228,6 +233,7 @@ function App() {
    * 서버 목록 갱신
    */
   const refreshServers = async () => {
+    if (registryMirror) return
     const data = await getJson('/api/servers')
     setServers(data || {})
   }
@@ -236,6 +242,10 @@ function App() {
    * 툴 목록 갱신 (특정 서버 또는 전체)
    */
   const refreshTools = async (targetServerId?: string) => {
+    if (registryMirror) {
+      setTools(selectTools(registryMirror, targetServerId || selectedServerId))
+      return
+    }
     try {
       const serverToUse = targetServerId || selectedServerId
       console.log('refreshTools:', { targetServerId, selectedServerId, serverToUse, serversCount: Object.keys(servers).length })
@@ -442,22 +452,16 @@ function App() {
     localStorage.setItem('mcp_hub_ui', JSON.stringify(payload))
   }, [serverId, baseUrl, toolName, args, responsePick])
 
-  useEffect(() => {
-    refreshServers()
-    refreshStats()
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [])
+  // 폴링 대신 레지스트리 변경 스트림 구독 (스냅샷 1회 + 이후 델타)
+  useEffect(() => subscribeRegistry(setRegistryMirror), [])
 
   useEffect(() => {
-    // 서버 목록이 로드되면 툴 목록도 즉시 동기화하여
-    // 상단 Summary의 Tools 카운트가 0으로 보이지 않도록 함
-    if (Object.keys(servers).length > 0) {
-      refreshTools(selectedServerId || undefined)
-    } else {
-      setTools({})
-    }
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [servers, selectedServerId])
+    // 사본이 바뀌면 서버/툴 목록과 상단 Summary를 함께 갱신
+    if (!registryMirror) return
+    setServers(registryMirror.servers)
+    setTools(selectTools(registryMirror, selectedServerId || undefined))
+    setStats(summarize(registryMirror))
+  }, [registryMirror, selectedServerId])
 
   return (
     <div className="min-h-screen bg-gray-50 text-gray-900 p-6">
@@ -0,0 +1,69 @@
+// /api/events 스트림으로 레지스트리 사본을 유지하는 구독 헬퍼
+// - 처음(또는 재동기화 시) snapshot으로 전체를 받고, 이후 server/tool 델타만 반영한다.
+// - EventSource가 끊기면 브라우저가 Last-Event-ID로 재연결하므로 서버가 놓친 델타부터 이어 보낸다.
+
+export type RegistryMirror = {
+  version: number
+  servers: Record<string, any>
+  tools: Record<string, Record<string, any>>
+}
+
+export function subscribeRegistry(onChange: (mirror: RegistryMirror) => void): () => void {
+  let mirror: RegistryMirror = { version: 0, servers: {}, tools: {} }
+  const source = new EventSource('/api/events')
+
+  const apply = (handler: (data: any) => void) => (e: MessageEvent) => {
+    const data = JSON.parse(e.data)
+    handler(data)
+    mirror = { ...mirror, version: data.version }
+    onChange(mirror)
+  }
+
+  source.addEventListener('snapshot', apply((data) => {
+    mirror = { version: data.version, servers: data.servers || {}, tools: data.tools || {} }
+  }))
+  source.addEventListener('server.upsert', apply((data) => {
+    mirror.servers = { ...mirror.servers, [data.serverId]: data.server }
+    if (!mirror.tools[data.serverId]) mirror.tools = { ...mirror.tools, [data.serverId]: {} }
+  }))
+  source.addEventListener('server.delete', apply((data) => {
+    const { [data.serverId]: _server, ...servers } = mirror.servers
+    const { [data.serverId]: _tools, ...tools } = mirror.tools
+    mirror.servers = servers
+    mirror.tools = tools
+  }))
+  source.addEventListener('tool.upsert', apply((data) => {
+    const serverTools = { ...(mirror.tools[data.serverId] || {}), [data.toolName]: data.tool }
+    mirror.tools = { ...mirror.tools, [data.serverId]: serverTools }
+  }))
+  source.addEventListener('tool.delete', apply((data) => {
+    const { [data.toolName]: _removed, ...serverTools } = mirror.tools[data.serverId] || {}
+    mirror.tools = { ...mirror.tools, [data.serverId]: serverTools }
+  }))
+
+  return () => source.close()
+}
+
+// 선택한 서버(없거나 "__all__"이면 전체)의 툴 목록. 전체일 때 키는 `${serverId}::${toolName}`
+export function selectTools(mirror: RegistryMirror, serverId?: string): Record<string, any> {
+  if (serverId && serverId !== '__all__') return mirror.tools[serverId] || {}
+  const all: Record<string, any> = {}
+  for (const [sid, serverTools] of Object.entries(mirror.tools)) {
+    for (const [name, binding] of Object.entries(serverTools)) {
+      all[`${sid}::${name}`] = { ...binding, serverId: sid }
+    }
+  }
+  return all
+}
+
+// /api/stats와 같은 모양의 요약
+export function summarize(mirror: RegistryMirror) {
+  const servers = Object.values(mirror.servers)
+  const tools = Object.values(mirror.tools).flatMap((serverTools) => Object.values(serverTools))
+  return {
+    servers: servers.length,
+    activeServers: servers.filter((s: any) => s?.active !== false).length,
+    tools: tools.length,
+    activeTools: tools.filter((t: any) => t?.active !== false).length,
+  }
+}